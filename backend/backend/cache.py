@@ -0,0 +1,46 @@
+# backend/cache.py
+
+"""
+Caché compartida entre procesos.
+
+Los códigos OTP y las cachés de catálogo y menú se guardan en la caché
+'default' y tienen que verse igual desde todos los workers de gunicorn.
+LocMem es una caché por proceso: solo sirve en desarrollo (runserver, un
+proceso) y en las pruebas.
+
+settings.CACHE_COMPARTIDA_REQUERIDA (True fuera de DEBUG) activa el chequeo
+backend.E001, que detiene migrate/runserver/check si la caché no es compartida.
+gunicorn no ejecuta los chequeos: en ese caso cache_utilizable() es False y
+la caché de catálogo y el menú precalculado se desactivan en lugar de servir
+datos obsoletos.
+"""
+
+from django.conf import settings
+from django.core import checks
+
+CACHES_POR_PROCESO = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def cache_compartida(alias='default'):
+    """True si la caché `alias` la comparten todos los procesos (Redis, base de datos...)."""
+    return settings.CACHES[alias]['BACKEND'] not in CACHES_POR_PROCESO
+
+
+def cache_utilizable(alias='default'):
+    """False si el despliegue exige caché compartida y la de `alias` es por proceso."""
+    return cache_compartida(alias) or not getattr(settings, 'CACHE_COMPARTIDA_REQUERIDA', False)
+
+
+@checks.register(checks.Tags.caches)
+def revisar_cache_compartida(app_configs, **kwargs):
+    if not getattr(settings, 'CACHE_COMPARTIDA_REQUERIDA', False) or cache_compartida():
+        return []
+    return [checks.Error(
+        "La caché 'default' es local a cada proceso: con varios workers los códigos "
+        "OTP y la invalidación del catálogo no se ven en los demás.",
+        hint="Define REDIS_URL o usa DatabaseCache (python manage.py createcachetable).",
+        id='backend.E001',
+    )]
@@ -0,0 +1,259 @@
+# backend/cache_respuestas.py
+
+"""
+Caché de respuestas para los endpoints públicos de catálogo.
+
+Cada modelo tiene un contador de versión en la caché. La clave de una
+respuesta incluye el endpoint, los parámetros de consulta normalizados y las
+versiones de los modelos de los que depende; las señales post_save /
+post_delete incrementan el contador, así una respuesta obsoleta nunca se
+vuelve a servir: simplemente deja de estar referenciada. Cada app conecta
+sus modelos en su propio signals.py con conectar_invalidacion().
+
+Protección contra estampidas: cuando una entrada vence, solo el worker que
+obtiene el candado (cache.add) la regenera; los demás siguen sirviendo la
+copia vencida o, si no existe, esperan brevemente a que aparezca.
+
+Las mismas versiones alimentan el GET condicional (get_condicional): ETag y
+Last-Modified se calculan sin tocar la BD y, si el cliente ya tiene la
+versión actual, se responde 304 sin ejecutar la vista ni serializar.
+
+Versiones e invalidaciones tienen que ser las mismas en todos los workers:
+si el despliegue exige caché compartida (settings.CACHE_COMPARTIDA_REQUERIDA)
+y la configurada es por proceso, los decoradores no cachean ni responden 304
+(ver backend/cache.py).
+"""
+
+import functools
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Max
+from django.db.models.signals import post_save, post_delete
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+from .cache import cache_utilizable
+
+CACHE_CATALOGO_TTL = getattr(settings, 'CACHE_CATALOGO_TTL', 300)
+# La copia vencida se conserva este tiempo extra para servirla mientras se regenera
+CACHE_CATALOGO_GRACIA = 60
+# Vigencia máxima del candado de regeneración
+CANDADO_SEGUNDOS = 10
+# Espera máxima de un worker sin copia mientras otro regenera
+ESPERA_MAXIMA_SEGUNDOS = 2
+INTERVALO_ESPERA_SEGUNDOS = 0.05
+
+
+def _clave_version(modelo):
+    return f'catalogo:version:{modelo._meta.label_lower}'
+
+
+def _clave_modificado(modelo):
+    return f'catalogo:modificado:{modelo._meta.label_lower}'
+
+
+def _leer_o_inicializar(modelos, clave, inicial):
+    """
+    Lee de una vez la clave de cada modelo; las ausentes (caché vaciada o
+    reiniciada) se fijan sin caducidad a inicial(modelo).
+    """
+    claves = {modelo: clave(modelo) for modelo in modelos}
+    actuales = cache.get_many(list(claves.values()))
+    faltantes = [modelo for modelo in modelos if claves[modelo] not in actuales]
+    if faltantes:
+        for modelo in faltantes:
+            cache.add(claves[modelo], inicial(modelo), None)
+        actuales.update(cache.get_many([claves[modelo] for modelo in faltantes]))
+    return [
+        actuales[claves[modelo]] if claves[modelo] in actuales else inicial(modelo)
+        for modelo in modelos
+    ]
+
+
+def _version_inicial(modelo):
+    # Un contador que volviera a empezar en 1 repetiría versiones ya servidas y
+    # un ETag antiguo obtendría 304 con datos cambiados. El reloj en
+    # nanosegundos siempre queda por delante de los incrementos anteriores.
+    return time.time_ns()
+
+
+def _modificado_inicial(modelo):
+    # Sin registro en la caché: la última escritura según la tabla si tiene
+    # fecha_actualizacion (Plato); si no, se asume "ahora". Un borrado no deja
+    # rastro en la columna, pero cambia la versión y por tanto el ETag, que
+    # tiene prioridad sobre If-Modified-Since.
+    if any(campo.name == 'fecha_actualizacion' for campo in modelo._meta.concrete_fields):
+        ultima = modelo.objects.aggregate(ultima=Max('fecha_actualizacion'))['ultima']
+        if ultima is not None:
+            return int(ultima.timestamp())
+    return int(time.time())
+
+
+def versiones_modelos(*modelos):
+    """Versiones actuales de los modelos (una sola ida a la caché)."""
+    return _leer_o_inicializar(modelos, _clave_version, _version_inicial)
+
+
+def ultima_modificacion(*modelos):
+    """Timestamp (segundos) del último cambio registrado en cualquiera de los modelos."""
+    return max(_leer_o_inicializar(modelos, _clave_modificado, _modificado_inicial))
+
+
+def invalidar_modelo(modelo):
+    """Incrementa la versión del modelo: todas sus respuestas quedan obsoletas."""
+    clave = _clave_version(modelo)
+    try:
+        cache.incr(clave)
+    except ValueError:
+        # La clave no existía (caché reiniciada)
+        cache.set(clave, _version_inicial(modelo), None)
+    cache.set(_clave_modificado(modelo), int(time.time()), None)
+
+
+def invalidar_catalogo_signal(sender, **kwargs):
+    # Tras el commit: si se invalidara antes, otro worker podría guardar
+    # datos aún sin confirmar bajo la versión nueva
+    transaction.on_commit(lambda: invalidar_modelo(sender))
+
+
+def conectar_invalidacion(*modelos):
+    """Invalida la caché de `modelos` al guardar o borrar (se llama desde el signals.py de cada app)."""
+    for modelo in modelos:
+        uid = f'catalogo:{modelo._meta.label_lower}'
+        post_save.connect(invalidar_catalogo_signal, sender=modelo, dispatch_uid=uid)
+        post_delete.connect(invalidar_catalogo_signal, sender=modelo, dispatch_uid=uid)
+
+
+def _clave_respuesta(request, versiones):
+    parametros = sorted(
+        (clave, valor)
+        for clave in request.query_params
+        for valor in request.query_params.getlist(clave)
+    )
+    base = f'{request.get_host()}|{request.path}|{parametros}|{versiones}'
+    return 'catalogo:resp:' + hashlib.sha1(base.encode('utf-8')).hexdigest()
+
+
+def _respuesta(entrada):
+    return Response(entrada['data'], status=entrada['status'])
+
+
+def _regenerar(clave, vista, args, kwargs):
+    response = vista(*args, **kwargs)
+    if response.status_code == 200:
+        cache.set(
+            clave,
+            {'data': response.data, 'status': response.status_code, 'expira': time.time() + CACHE_CATALOGO_TTL},
+            CACHE_CATALOGO_TTL + CACHE_CATALOGO_GRACIA,
+        )
+    return response
+
+
+def cache_respuesta(*modelos):
+    """
+    Decorador para métodos GET de un ViewSet cuya respuesta depende solo de los
+    parámetros de la URL y de los `modelos` indicados (no del usuario).
+    """
+    def decorador(vista):
+        @functools.wraps(vista)
+        def envoltura(self, request, *args, **kwargs):
+            if request.method != 'GET' or not cache_utilizable():
+                return vista(self, request, *args, **kwargs)
+
+            clave = _clave_respuesta(request, versiones_modelos(*modelos))
+            candado = f'{clave}:candado'
+            argumentos = (self, request) + args
+
+            entrada = cache.get(clave)
+            if entrada is not None and entrada['expira'] > time.time():
+                return _respuesta(entrada)
+
+            if cache.add(candado, 1, CANDADO_SEGUNDOS):
+                try:
+                    return _regenerar(clave, vista, argumentos, kwargs)
+                finally:
+                    cache.delete(candado)
+
+            # Otro worker está regenerando
+            if entrada is not None:
+                return _respuesta(entrada)
+
+            limite = time.time() + ESPERA_MAXIMA_SEGUNDOS
+            while time.time() < limite:
+                time.sleep(INTERVALO_ESPERA_SEGUNDOS)
+                entrada = cache.get(clave)
+                if entrada is not None:
+                    return _respuesta(entrada)
+
+            # El otro worker tarda demasiado: se calcula sin esperar más
+            return vista(self, request, *args, **kwargs)
+        return envoltura
+    return decorador
+
+
+# =========================================================
+# GET CONDICIONAL (ETag / Last-Modified)
+# =========================================================
+
+def calcular_etag(request, versiones):
+    base = f'{request.get_host()}|{request.get_full_path()}|{request.META.get("HTTP_ACCEPT", "")}|{versiones}'
+    return 'W/"' + hashlib.sha1(base.encode('utf-8')).hexdigest()[:32] + '"'
+
+
+def _coincide_etag(if_none_match, etag):
+    if if_none_match.strip() == '*':
+        return True
+    # Comparación débil: se ignora el prefijo W/
+    etiquetas = {valor.strip().removeprefix('W/') for valor in if_none_match.split(',')}
+    return etag.removeprefix('W/') in etiquetas
+
+
+def get_condicional(*modelos):
+    """
+    Decorador para métodos GET de un ViewSet de catálogo. Añade ETag y
+    Last-Modified y responde 304 Not Modified si el cliente ya tiene la
+    versión actual, sin ejecutar la vista.
+
+    Si la vista ya fija su propio ETag (p. ej. sirve una copia precalculada
+    de una versión anterior) se respetan sus validadores.
+    """
+    def decorador(vista):
+        @functools.wraps(vista)
+        def envoltura(self, request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD') or not cache_utilizable():
+                return vista(self, request, *args, **kwargs)
+
+            etag = calcular_etag(request, versiones_modelos(*modelos))
+            modificado = ultima_modificacion(*modelos)
+            cabeceras = {
+                'ETag': etag,
+                'Last-Modified': http_date(modificado),
+                # El navegador debe revalidar siempre (no usar caché heurística)
+                'Cache-Control': 'no-cache',
+            }
+
+            if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+            if if_none_match:
+                no_modificado = _coincide_etag(if_none_match, etag)
+            else:
+                # If-Modified-Since solo se evalúa si no viene If-None-Match (RFC 9110)
+                desde = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE'))
+                no_modificado = desde is not None and modificado <= desde
+
+            if no_modificado:
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers=cabeceras)
+
+            response = vista(self, request, *args, **kwargs)
+            if response.status_code == 200:
+                if response.has_header('ETag'):
+                    cabeceras = {'Cache-Control': cabeceras['Cache-Control']}
+                for nombre, valor in cabeceras.items():
+                    response[nombre] = valor
+            return response
+        return envoltura
+    return decorador
@@ -17,5 +17,7 @@ app.config_from_object('django.conf.settings', namespace='CELERY')
 
 # 4. Descubrimiento Automático de Tareas
 # Celery buscará automáticamente tareas en archivos llamados 'tasks.py' 
-# dentro de todas las aplicaciones registradas.
-app.autodiscover_tasks()
\ No newline at end of file
+# dentro de todas las aplicaciones registradas. Las reservas de salón y
+# restaurante las tienen en 'task.py' (CELERY_BEAT_SCHEDULE las usa).
+app.autodiscover_tasks()
+app.autodiscover_tasks(related_name='task')
\ No newline at end of file
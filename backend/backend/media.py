@@ -0,0 +1,252 @@
+# backend/media.py
+
+"""
+Servidor de archivos subidos (MEDIA_ROOT).
+
+ServidorMedia envuelve la aplicación WSGI (backend/wsgi.py) y atiende los
+GET/HEAD bajo MEDIA_URL antes de entrar en Django: sin middlewares, sesión
+ni resolución de URLs. servir_media es la misma lógica como vista, para
+runserver sin wsgi.py y el cliente de pruebas.
+
+- ETag fuerte sin leer archivos grandes: las variantes con hash de
+  contenido (ver abajo) usan ese hash; los archivos de hasta
+  MEDIA_ETAG_HASH_MAXIMO bytes, el sha256 del contenido (memorizado por
+  ruta, tamaño y mtime); los mayores, tamaño + mtime en nanosegundos, como
+  nginx.
+- 304 con If-None-Match / If-Modified-Since; Range de un tramo (206 / 416)
+  con If-Range. Varios tramos -> respuesta completa (RFC 9110).
+- Variantes con hash de contenido de usuarios/imagenes.py
+  (foto__card.<hex>.webp): Cache-Control immutable de un año. El resto:
+  MEDIA_CACHE_SEGUNDOS y revalidación por ETag.
+- Cuerpo con wsgi.file_wrapper (sendfile en gunicorn) o delegado al proxy
+  según settings.MEDIA_PROXY:
+      'nginx'    -> X-Accel-Redirect: MEDIA_PROXY_PREFIJO + ruta (location internal)
+      'sendfile' -> X-Sendfile: ruta absoluta (Apache mod_xsendfile, lighttpd)
+"""
+
+import functools
+import hashlib
+import mimetypes
+import os
+import re
+import stat
+from http import HTTPStatus
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.handlers.wsgi import get_path_info
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+MEDIA_PROXY = getattr(settings, 'MEDIA_PROXY', '')
+MEDIA_PROXY_PREFIJO = getattr(settings, 'MEDIA_PROXY_PREFIJO', '/media-interna/')
+MEDIA_CACHE_SEGUNDOS = getattr(settings, 'MEDIA_CACHE_SEGUNDOS', 3600)
+# Por encima de este tamaño el ETag sale de tamaño + mtime (no se lee el archivo)
+MEDIA_ETAG_HASH_MAXIMO = getattr(settings, 'MEDIA_ETAG_HASH_MAXIMO', 1024 * 1024)
+
+BLOQUE = 64 * 1024
+# Variantes de usuarios/imagenes.py (ruta_variante): foto__card.<sha256[:12]>.webp.
+# El contenido de esa URL no cambia nunca. Solo ese formato: un nombre subido
+# como menu.202401011200.jpg no lleva un hash y puede reemplazarse.
+NOMBRE_CON_HASH = re.compile(r'__(?:thumb|card|hero)\.([0-9a-f]{12})\.(?:webp|jpg)$')
+RANGO = re.compile(r'^bytes=(\d*)-(\d*)$')
+INSATISFACIBLE = 'insatisfacible'
+
+
+@functools.lru_cache(maxsize=4096)
+def _hash_contenido(ruta, tamano, modificado_ns):
+    # tamaño y mtime forman parte de la clave: si el archivo cambia, se recalcula
+    resumen = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(BLOQUE), b''):
+            resumen.update(bloque)
+    return resumen.hexdigest()[:32]
+
+
+def _etag(relativa, ruta, estado):
+    con_hash = NOMBRE_CON_HASH.search(relativa)
+    if con_hash:
+        return f'"{con_hash.group(1)}"'
+    if estado.st_size <= MEDIA_ETAG_HASH_MAXIMO:
+        return f'"{_hash_contenido(ruta, estado.st_size, estado.st_mtime_ns)}"'
+    return f'"{estado.st_size:x}-{estado.st_mtime_ns:x}"'
+
+
+def _buscar(relativa):
+    """(ruta absoluta, os.stat) de un archivo regular bajo MEDIA_ROOT, o None."""
+    try:
+        ruta = safe_join(settings.MEDIA_ROOT, relativa.lstrip('/'))
+        estado = os.stat(ruta)
+    except (SuspiciousFileOperation, OSError, ValueError):
+        return None
+    return (ruta, estado) if stat.S_ISREG(estado.st_mode) else None
+
+
+def _rango(valor, tamano):
+    """(inicio, fin) inclusivo, INSATISFACIBLE o None (se ignora: respuesta completa)."""
+    coincidencia = RANGO.match(valor.strip())
+    if not coincidencia or not any(coincidencia.groups()):
+        return None
+    if tamano == 0:
+        # Un archivo vacío no tiene ningún byte que servir
+        return INSATISFACIBLE
+    desde, hasta = coincidencia.groups()
+    if desde:
+        inicio = int(desde)
+        fin = min(int(hasta), tamano - 1) if hasta else tamano - 1
+        if inicio >= tamano:
+            return INSATISFACIBLE
+        return (inicio, fin) if fin >= inicio else None
+    # bytes=-N: los últimos N bytes
+    sufijo = int(hasta)
+    if sufijo == 0:
+        return INSATISFACIBLE
+    return (max(0, tamano - sufijo), tamano - 1)
+
+
+def _coincide_etag(valor, etag):
+    if valor.strip() == '*':
+        return True
+    return etag in {v.strip().removeprefix('W/') for v in valor.split(',')}
+
+
+def preparar(relativa, metodo, meta, proxy=None):
+    """
+    Respuesta para `relativa` (ruta bajo MEDIA_URL) según las cabeceras de la
+    petición (`meta`: environ WSGI o request.META).
+
+    None si no existe; si no (estado, [(cabecera, valor)], cuerpo), donde
+    cuerpo es None (sin cuerpo) o (ruta, inicio, longitud).
+    `proxy` sustituye a settings.MEDIA_PROXY.
+    """
+    proxy = MEDIA_PROXY if proxy is None else proxy
+    encontrado = _buscar(relativa)
+    if encontrado is None:
+        return None
+    ruta, estado = encontrado
+    tamano = estado.st_size
+    modificado = int(estado.st_mtime)
+
+    etag = _etag(relativa, ruta, estado)
+    ultima_modificacion = http_date(modificado)
+    if NOMBRE_CON_HASH.search(relativa):
+        cache_control = 'public, max-age=31536000, immutable'
+    else:
+        cache_control = f'public, max-age={MEDIA_CACHE_SEGUNDOS}'
+    cabeceras = [
+        ('ETag', etag),
+        ('Last-Modified', ultima_modificacion),
+        ('Cache-Control', cache_control),
+    ]
+
+    if_none_match = meta.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        no_modificado = _coincide_etag(if_none_match, etag)
+    else:
+        desde = parse_http_date_safe(meta.get('HTTP_IF_MODIFIED_SINCE'))
+        no_modificado = desde is not None and modificado <= desde
+    if no_modificado:
+        return HTTPStatus.NOT_MODIFIED, cabeceras, None
+
+    tipo, codificacion = mimetypes.guess_type(ruta)
+    cabeceras += [
+        ('Content-Type', tipo or 'application/octet-stream'),
+        ('Accept-Ranges', 'bytes'),
+        ('X-Content-Type-Options', 'nosniff'),
+    ]
+    if codificacion:
+        cabeceras.append(('Content-Encoding', codificacion))
+
+    if proxy == 'nginx':
+        # nginx sirve el archivo (y resuelve Range) desde una location interna
+        cabeceras.append(('X-Accel-Redirect', MEDIA_PROXY_PREFIJO + quote(relativa.lstrip('/'))))
+        return HTTPStatus.OK, cabeceras + [('Content-Length', '0')], None
+    if proxy == 'sendfile':
+        cabeceras.append(('X-Sendfile', ruta))
+        return HTTPStatus.OK, cabeceras + [('Content-Length', '0')], None
+
+    rango = None
+    if meta.get('HTTP_RANGE'):
+        if_range = meta.get('HTTP_IF_RANGE', '').strip()
+        # If-Range: el tramo solo vale si el cliente tiene esta misma versión
+        if not if_range or if_range in (etag, ultima_modificacion):
+            rango = _rango(meta['HTTP_RANGE'], tamano)
+
+    if rango == INSATISFACIBLE:
+        return (
+            HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE,
+            cabeceras + [('Content-Range', f'bytes */{tamano}'), ('Content-Length', '0')],
+            None,
+        )
+    if rango is None:
+        estado_http, inicio, longitud = HTTPStatus.OK, 0, tamano
+    else:
+        estado_http, inicio, longitud = HTTPStatus.PARTIAL_CONTENT, rango[0], rango[1] - rango[0] + 1
+        cabeceras.append(('Content-Range', f'bytes {rango[0]}-{rango[1]}/{tamano}'))
+    cabeceras.append(('Content-Length', str(longitud)))
+
+    cuerpo = None if metodo == 'HEAD' else (ruta, inicio, longitud)
+    return estado_http, cabeceras, cuerpo
+
+
+def _bloques(ruta, inicio, longitud):
+    with open(ruta, 'rb') as archivo:
+        archivo.seek(inicio)
+        while longitud > 0:
+            bloque = archivo.read(min(BLOQUE, longitud))
+            if not bloque:
+                break
+            longitud -= len(bloque)
+            yield bloque
+
+
+class ServidorMedia:
+    """Middleware WSGI: atiende MEDIA_URL sin pasar por Django."""
+
+    def __init__(self, aplicacion, proxy=None):
+        self.aplicacion = aplicacion
+        self.prefijo = settings.MEDIA_URL
+        self.proxy = proxy
+
+    def __call__(self, environ, start_response):
+        ruta = get_path_info(environ)
+        if not ruta.startswith(self.prefijo) or environ['REQUEST_METHOD'] not in ('GET', 'HEAD'):
+            return self.aplicacion(environ, start_response)
+
+        resultado = preparar(ruta[len(self.prefijo):], environ['REQUEST_METHOD'], environ, self.proxy)
+        if resultado is None:
+            # Django responde el 404 (o lo que corresponda)
+            return self.aplicacion(environ, start_response)
+
+        estado, cabeceras, cuerpo = resultado
+        start_response(f'{estado.value} {estado.phrase}', cabeceras)
+        if cuerpo is None:
+            return []
+        ruta_archivo, inicio, longitud = cuerpo
+        envoltura = environ.get('wsgi.file_wrapper')
+        if inicio == 0 and envoltura is not None and estado == HTTPStatus.OK:
+            # Archivo completo: el servidor puede usar sendfile()
+            return envoltura(open(ruta_archivo, 'rb'), BLOQUE)
+        return _bloques(ruta_archivo, inicio, longitud)
+
+
+@require_safe
+def servir_media(request, path):
+    """La misma respuesta que ServidorMedia, como vista de Django."""
+    resultado = preparar(path, request.method, request.META)
+    if resultado is None:
+        raise Http404('El archivo no existe.')
+
+    estado, cabeceras, cuerpo = resultado
+    if cuerpo is None:
+        response = HttpResponse(status=estado)
+    elif estado == HTTPStatus.OK:
+        response = FileResponse(open(cuerpo[0], 'rb'))
+    else:
+        response = StreamingHttpResponse(_bloques(*cuerpo), status=estado)
+    for nombre, valor in cabeceras:
+        response[nombre] = valor
+    return response
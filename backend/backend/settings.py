@@ -95,6 +95,46 @@ DATABASES = {
     )
 }
 
+# =========================================================
+# CACHÉ (OTP, catálogo, menú) - backend/cache.py
+# =========================================================
+# Tiene que ser compartida por todos los workers: Redis si se define
+# REDIS_URL; si no, en producción la tabla de caché de la base de datos
+# (la crea la migración usuarios 0005). LocMem solo en desarrollo/pruebas.
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+elif DEBUG:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'cache_compartida',
+        }
+    }
+
+# Chequeo backend.E001: fuera de DEBUG la caché no puede ser por proceso
+CACHE_COMPARTIDA_REQUERIDA = os.environ.get('CACHE_COMPARTIDA_REQUERIDA', str(not DEBUG)) == 'True'
+
+# Caché de respuestas del catálogo público (backend/cache_respuestas.py).
+# Sin caché compartida (backend/cache.py) y con CACHE_COMPARTIDA_REQUERIDA no se cachea.
+CACHE_CATALOGO_TTL = int(os.environ.get('CACHE_CATALOGO_TTL', 300))
+
+# Códigos OTP: vigencia (segundos) e intentos fallidos permitidos
+OTP_TTL_SEGUNDOS = int(os.environ.get('OTP_TTL_SEGUNDOS', 600))
+OTP_MAX_INTENTOS = int(os.environ.get('OTP_MAX_INTENTOS', 5))
+
 # Internacionalización
 LANGUAGE_CODE = 'es-es'
 TIME_ZONE = 'America/Caracas' 
@@ -113,13 +153,20 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWT que carga el perfil (rol) junto con el usuario, en una sola consulta
+        'usuarios.authentication.JWTRolAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
     )
 }
 
+# Paginación por cursor (usuarios/paginacion.py). Mientras el frontend no la use
+# en todas las pantallas, solo se aplica si la petición trae ?cursor= o ?page_size=
+PAGINACION_TAMANO = int(os.environ.get('PAGINACION_TAMANO', 50))
+PAGINACION_MAXIMA = int(os.environ.get('PAGINACION_MAXIMA', 200))
+PAGINACION_OBLIGATORIA = os.environ.get('PAGINACION_OBLIGATORIA', 'False') == 'True'
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
@@ -127,6 +174,8 @@ SIMPLE_JWT = {
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
     'AUTH_HEADER_TYPES': ('Bearer',),
+    # Al refrescar se vuelve a leer el rol del perfil
+    'TOKEN_REFRESH_SERIALIZER': 'usuarios.authentication.MyTokenRefreshSerializer',
 }
 
 # =========================================================
@@ -140,6 +189,9 @@ CORS_ALLOWED_ORIGINS = [
     "https://frontend-production-5f03.up.railway.app",
 ]
 
+# Validadores del GET condicional del catálogo, legibles desde el frontend
+CORS_EXPOSE_HEADERS = ['ETag', 'Last-Modified']
+
 CSRF_TRUSTED_ORIGINS = [
     "http://localhost:5173",
     "https://hote-frontend-production.up.railway.app",
@@ -165,8 +217,63 @@ SESSION_SAVE_EVERY_REQUEST = True
 # CONFIGURACIÓN CORREO (MODO EMAILJS)
 # =========================================================
 # Las credenciales (SERVICE_ID, TEMPLATE_ID, etc.) se leen 
-# directamente en views.py desde las variables de entorno.
+# desde las variables de entorno en usuarios/correo.py.
 
 # Usamos el backend 'dummy' para desactivar el SMTP nativo de Django
 # y evitar que intente conexiones bloqueadas por el puerto 587/465.
 EMAIL_BACKEND = 'django.core.mail.backends.dummy.EmailBackend'
+
+# Bandeja de salida de correos (usuarios/correo.py)
+# CORREO_ENVIADOR: 'emailjs' (real) o 'local' (sin red, para pruebas offline)
+# CORREO_DESPACHO: 'hilo' (segundo plano), 'sincrono' o 'externo' (comando despachar_correos)
+CORREO_ENVIADOR = os.environ.get('CORREO_ENVIADOR', 'emailjs')
+CORREO_DESPACHO = os.environ.get('CORREO_DESPACHO', 'hilo')
+CORREO_LOTE = int(os.environ.get('CORREO_LOTE', 50))
+CORREO_MAX_INTENTOS = int(os.environ.get('CORREO_MAX_INTENTOS', 5))
+
+# Confirmaciones de reservas de salón y restaurante (task.py de cada app) que no
+# se pudieron encolar o agotaron sus reintentos: las envía por lotes Celery beat
+# cada CONFIRMACIONES_INTERVALO segundos o, sin broker, el comando
+# enviar_confirmaciones_pendientes
+CONFIRMACIONES_INTERVALO = int(os.environ.get('CONFIRMACIONES_INTERVALO', 300))
+CELERY_BEAT_SCHEDULE = {
+    'confirmaciones-salon-pendientes': {
+        'task': 'reserva_salon.task.enviar_confirmaciones_salon_pendientes',
+        'schedule': CONFIRMACIONES_INTERVALO,
+    },
+    'confirmaciones-restaurante-pendientes': {
+        'task': 'reserva_restaurante.task.enviar_confirmaciones_restaurante_pendientes',
+        'schedule': CONFIRMACIONES_INTERVALO,
+    },
+}
+
+# Menú precalculado del restaurante (plato/menu.py): 'hilo' (segundo plano) o 'sincrono'
+MENU_RECONSTRUCCION = os.environ.get('MENU_RECONSTRUCCION', 'hilo')
+MENU_TTL = int(os.environ.get('MENU_TTL', 3600))
+
+# URL pública del backend (https://api.ejemplo.com) para las URLs absolutas de
+# contenido que se construye fuera de una petición (menú precalculado).
+# Vacía: se toma el host de cada petición.
+URL_PUBLICA_BACKEND = os.environ.get('URL_PUBLICA_BACKEND', '')
+
+# Disponibilidad del restaurante (reserva_restaurante/disponibilidad.py)
+RESTAURANTE_DURACION_MINUTOS = int(os.environ.get('RESTAURANTE_DURACION_MINUTOS', 120))
+RESTAURANTE_INTERVALO_MINUTOS = int(os.environ.get('RESTAURANTE_INTERVALO_MINUTOS', 30))
+RESTAURANTE_PRIMER_TURNO = os.environ.get('RESTAURANTE_PRIMER_TURNO', '18:00')
+RESTAURANTE_ULTIMO_TURNO = os.environ.get('RESTAURANTE_ULTIMO_TURNO', '22:00')
+
+# Salones de eventos (reserva_salon/disponibilidad.py)
+SALON_DURACION_MINUTOS = int(os.environ.get('SALON_DURACION_MINUTOS', 360))
+SALON_DURACION_MAXIMA_MINUTOS = int(os.environ.get('SALON_DURACION_MAXIMA_MINUTOS', 1440))
+SALON_CALENDARIO_MAXIMO_DIAS = int(os.environ.get('SALON_CALENDARIO_MAXIMO_DIAS', 92))
+
+# Variantes de imágenes (usuarios/imagenes.py): 'hilo' (segundo plano), 'sincrono' o 'externo'
+IMAGENES_PROCESAMIENTO = os.environ.get('IMAGENES_PROCESAMIENTO', 'hilo')
+
+# Archivos subidos (backend/media.py)
+# MEDIA_PROXY: '' (los sirve la app con sendfile), 'nginx' (X-Accel-Redirect) o 'sendfile' (X-Sendfile)
+MEDIA_PROXY = os.environ.get('MEDIA_PROXY', '')
+MEDIA_PROXY_PREFIJO = os.environ.get('MEDIA_PROXY_PREFIJO', '/media-interna/')
+MEDIA_CACHE_SEGUNDOS = int(os.environ.get('MEDIA_CACHE_SEGUNDOS', 3600))
+# Hasta este tamaño (bytes) el ETag es el hash del contenido; por encima, tamaño + mtime
+MEDIA_ETAG_HASH_MAXIMO = int(os.environ.get('MEDIA_ETAG_HASH_MAXIMO', 1024 * 1024))
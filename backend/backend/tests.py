@@ -0,0 +1,164 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+from wsgiref.util import FileWrapper
+
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
+
+from . import media
+
+
+class ServirMediaTest(SimpleTestCase):
+
+    def setUp(self):
+        self.raiz = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.raiz)
+        ajustes = override_settings(MEDIA_ROOT=self.raiz)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        self.contenido = bytes(range(256)) * 4
+        self.escribir('fotos/suite.jpg', self.contenido)
+
+    def escribir(self, relativa, contenido):
+        ruta = os.path.join(self.raiz, relativa)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        with open(ruta, 'wb') as archivo:
+            archivo.write(contenido)
+
+    def get(self, relativa, **cabeceras):
+        return self.client.get(reverse('media', args=[relativa]), **cabeceras)
+
+    def cuerpo(self, respuesta):
+        return b''.join(respuesta.streaming_content)
+
+    def test_completo_y_304(self):
+        respuesta = self.get('fotos/suite.jpg')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(self.cuerpo(respuesta), self.contenido)
+        self.assertEqual(respuesta['Accept-Ranges'], 'bytes')
+        etag = respuesta['ETag']
+
+        self.assertEqual(self.get('fotos/suite.jpg', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.assertEqual(self.get('fotos/suite.jpg', HTTP_IF_NONE_MATCH=f'"otro", W/{etag}').status_code, 304)
+        self.assertEqual(self.get('fotos/suite.jpg', HTTP_IF_NONE_MATCH='"otro"').status_code, 200)
+        self.assertEqual(
+            self.get('fotos/suite.jpg', HTTP_IF_MODIFIED_SINCE=respuesta['Last-Modified']).status_code, 304
+        )
+        self.assertEqual(self.get('fotos/no-existe.jpg').status_code, 404)
+
+    def test_rangos(self):
+        respuesta = self.get('fotos/suite.jpg', HTTP_RANGE='bytes=10-19')
+        self.assertEqual(respuesta.status_code, 206)
+        self.assertEqual(respuesta['Content-Range'], 'bytes 10-19/1024')
+        self.assertEqual(self.cuerpo(respuesta), self.contenido[10:20])
+
+        respuesta = self.get('fotos/suite.jpg', HTTP_RANGE='bytes=-4')
+        self.assertEqual(self.cuerpo(respuesta), self.contenido[-4:])
+        respuesta = self.get('fotos/suite.jpg', HTTP_RANGE='bytes=1000-')
+        self.assertEqual(respuesta['Content-Range'], 'bytes 1000-1023/1024')
+
+        respuesta = self.get('fotos/suite.jpg', HTTP_RANGE='bytes=2000-')
+        self.assertEqual(respuesta.status_code, 416)
+        self.assertEqual(respuesta['Content-Range'], 'bytes */1024')
+        # Varios tramos o sintaxis desconocida: archivo completo
+        self.assertEqual(self.get('fotos/suite.jpg', HTTP_RANGE='bytes=0-1,5-6').status_code, 200)
+
+    def test_if_range(self):
+        etag = self.get('fotos/suite.jpg')['ETag']
+        self.assertEqual(self.get('fotos/suite.jpg', HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=etag).status_code, 206)
+        # Otra versión del archivo: se envía entero
+        self.assertEqual(self.get('fotos/suite.jpg', HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"viejo"').status_code, 200)
+        fecha_vieja = http_date(0)
+        self.assertEqual(self.get('fotos/suite.jpg', HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE=fecha_vieja).status_code, 200)
+
+    def test_archivo_vacio(self):
+        self.escribir('fotos/vacia.jpg', b'')
+        for rango in ('bytes=-5', 'bytes=0-', 'bytes=0-0'):
+            respuesta = self.get('fotos/vacia.jpg', HTTP_RANGE=rango)
+            self.assertEqual(respuesta.status_code, 416, rango)
+            self.assertEqual(respuesta['Content-Range'], 'bytes */0')
+        self.assertEqual(self.get('fotos/vacia.jpg').status_code, 200)
+
+    def test_etag_sin_leer_archivos_grandes(self):
+        self.escribir('fotos/suite__card.3f9a1c0b7d2e.webp', b'webp')
+        respuesta = self.get('fotos/suite__card.3f9a1c0b7d2e.webp')
+        self.assertEqual(respuesta['ETag'], '"3f9a1c0b7d2e"')
+        self.assertIn('immutable', respuesta['Cache-Control'])
+
+        # Un nombre con dígitos que no es una variante no es inmutable
+        self.escribir('fotos/menu.202401011200.jpg', b'jpg')
+        respuesta = self.get('fotos/menu.202401011200.jpg')
+        self.assertNotIn('immutable', respuesta['Cache-Control'])
+        self.assertNotEqual(respuesta['ETag'], '"202401011200"')
+
+        estado = os.stat(os.path.join(self.raiz, 'fotos/suite.jpg'))
+        with mock.patch.object(media, 'MEDIA_ETAG_HASH_MAXIMO', 100), \
+                mock.patch.object(media, '_hash_contenido', side_effect=AssertionError):
+            respuesta = self.get('fotos/suite.jpg')
+        self.assertEqual(respuesta['ETag'], f'"{estado.st_size:x}-{estado.st_mtime_ns:x}"')
+
+
+class ServidorMediaTest(SimpleTestCase):
+
+    def setUp(self):
+        self.raiz = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.raiz)
+        ajustes = override_settings(MEDIA_ROOT=self.raiz)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+        os.makedirs(os.path.join(self.raiz, 'fotos'))
+        self.contenido = b'0123456789' * 10
+        with open(os.path.join(self.raiz, 'fotos', 'suite.jpg'), 'wb') as archivo:
+            archivo.write(self.contenido)
+        self.django = mock.Mock(return_value=[b'django'])
+
+    def llamar(self, ruta, proxy=None, **cabeceras):
+        environ = RequestFactory().get(ruta, **cabeceras).environ
+        environ['wsgi.file_wrapper'] = FileWrapper
+        respuesta = {}
+
+        def start_response(estado, cabeceras):
+            respuesta['estado'] = estado
+            respuesta['cabeceras'] = dict(cabeceras)
+
+        cuerpo = media.ServidorMedia(self.django, proxy=proxy)(environ, start_response)
+        respuesta['cuerpo'] = cuerpo
+        return respuesta
+
+    def test_archivo_completo_con_file_wrapper(self):
+        respuesta = self.llamar('/media/fotos/suite.jpg')
+        self.assertEqual(respuesta['estado'], '200 OK')
+        self.assertEqual(respuesta['cabeceras']['Content-Length'], '100')
+        # El servidor WSGI puede usar sendfile()
+        self.assertIsInstance(respuesta['cuerpo'], FileWrapper)
+        self.assertEqual(b''.join(respuesta['cuerpo']), self.contenido)
+        respuesta['cuerpo'].close()
+        self.django.assert_not_called()
+
+    def test_rango_y_304(self):
+        respuesta = self.llamar('/media/fotos/suite.jpg', HTTP_RANGE='bytes=90-')
+        self.assertEqual(respuesta['estado'], '206 Partial Content')
+        self.assertNotIsInstance(respuesta['cuerpo'], FileWrapper)
+        self.assertEqual(b''.join(respuesta['cuerpo']), self.contenido[90:])
+
+        etag = respuesta['cabeceras']['ETag']
+        respuesta = self.llamar('/media/fotos/suite.jpg', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((respuesta['estado'], respuesta['cuerpo']), ('304 Not Modified', []))
+
+    def test_x_accel_redirect(self):
+        respuesta = self.llamar('/media/fotos/suite.jpg', proxy='nginx')
+        self.assertEqual(respuesta['estado'], '200 OK')
+        self.assertEqual(respuesta['cabeceras']['X-Accel-Redirect'], media.MEDIA_PROXY_PREFIJO + 'fotos/suite.jpg')
+        self.assertEqual(respuesta['cabeceras']['Content-Length'], '0')
+        self.assertEqual(respuesta['cuerpo'], [])
+
+        respuesta = self.llamar('/media/fotos/suite.jpg', proxy='sendfile')
+        self.assertEqual(respuesta['cabeceras']['X-Sendfile'], os.path.join(self.raiz, 'fotos', 'suite.jpg'))
+
+    def test_el_resto_pasa_a_django(self):
+        for ruta in ('/media/fotos/no-existe.jpg', '/api/platos/', '/media/../settings.py'):
+            self.assertEqual(self.llamar(ruta)['cuerpo'], [b'django'], ruta)
+        self.assertEqual(self.django.call_count, 3)
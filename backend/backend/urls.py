@@ -2,15 +2,13 @@
 
 from django.contrib import admin
 from django.urls import path, include, re_path
-from django.conf import settings
-from django.conf.urls.static import static
-from django.views.static import serve # <--- VITAL PARA RAILWAY
 
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
 from usuarios.views import RegisterUserView, MyTokenObtainPairView
+from .media import servir_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -39,14 +37,10 @@ urlpatterns = [
     path('api/insumos-productos/', include('insumo_producto.urls')),
 
     # --------------------------------------------------------
-    # EL FIX PARA IMÁGENES EN RAILWAY (PRODUCCIÓN)
+    # IMÁGENES SUBIDAS (MEDIA), TAMBIÉN CON DEBUG=False
     # --------------------------------------------------------
-    # Esto le permite a Django servir las fotos aunque DEBUG=False
-    re_path(r'^media/(?P<path>.*)$', serve, {
-        'document_root': settings.MEDIA_ROOT,
-    }),
-]
-
-# Configuración para desarrollo local
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    # En producción las atiende ServidorMedia (backend/wsgi.py) antes de
+    # llegar aquí; esta ruta cubre runserver/pruebas con la misma lógica
+    # (ETag, Range, caché inmutable, X-Accel-Redirect).
+    re_path(r'^media/(?P<path>.*)$', servir_media, name='media'),
+]
\ No newline at end of file
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+# Los archivos de MEDIA_URL se sirven antes de entrar en Django (backend/media.py)
+from backend.media import ServidorMedia  # noqa: E402
+
+application = ServidorMedia(application)
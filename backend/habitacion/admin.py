@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from .models import Habitacion
+from backend.cache_respuestas import invalidar_modelo
 
 @admin.register(Habitacion)
 class HabitacionAdmin(admin.ModelAdmin):
@@ -74,20 +75,28 @@ class HabitacionAdmin(admin.ModelAdmin):
     
     def marcar_disponibles(self, request, queryset):
         updated = queryset.update(estado='disponible')
+        # update() no dispara señales: invalidamos la caché del catálogo
+        invalidar_modelo(Habitacion)
         self.message_user(request, f'{updated} habitaciones marcadas como disponibles.')
     marcar_disponibles.short_description = 'Marcar como disponibles'
     
     def marcar_mantenimiento(self, request, queryset):
         updated = queryset.update(estado='mantenimiento')
+        # update() no dispara señales: invalidamos la caché del catálogo
+        invalidar_modelo(Habitacion)
         self.message_user(request, f'{updated} habitaciones enviadas a mantenimiento.')
     marcar_mantenimiento.short_description = 'Enviar a mantenimiento'
     
     def activar_seleccionadas(self, request, queryset):
         updated = queryset.update(activa=True)
+        # update() no dispara señales: invalidamos la caché del catálogo
+        invalidar_modelo(Habitacion)
         self.message_user(request, f'{updated} habitaciones activadas.')
     activar_seleccionadas.short_description = 'Activar habitaciones'
     
     def desactivar_seleccionadas(self, request, queryset):
         updated = queryset.update(activa=False)
+        # update() no dispara señales: invalidamos la caché del catálogo
+        invalidar_modelo(Habitacion)
         self.message_user(request, f'{updated} habitaciones desactivadas.')
     desactivar_seleccionadas.short_description = 'Desactivar habitaciones'
\ No newline at end of file
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class HabitacionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'habitacion'
+
+    def ready(self):
+        # Invalidación de la caché de catálogo y variantes de imágenes
+        import habitacion.signals
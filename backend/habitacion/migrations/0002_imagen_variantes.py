@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habitacion', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='habitacion',
+            name='imagen_variantes',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddField(
+            model_name='imagenhabitacion',
+            name='imagen_variantes',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
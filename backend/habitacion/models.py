@@ -23,6 +23,8 @@ class ImagenHabitacion(models.Model):
         null=True,
         help_text="URL de imagen externa (opcional)"
     )
+    # Rutas y tamaños de las variantes thumb/card/hero (usuarios/imagenes.py)
+    imagen_variantes = models.JSONField(default=dict, blank=True, editable=False)
     orden = models.PositiveIntegerField(
         default=0,
         help_text="Orden en que se mostrará la imagen"
@@ -86,7 +88,14 @@ class Habitacion(models.Model):
         (TIPO_TRIPLE, 'Triple (3 personas)'),
         (TIPO_CUADRUPLE, 'Cuádruple (4 personas)'),
     ]
-    
+
+    # Capacidad máxima de huéspedes según el tipo de ocupación
+    CAPACIDAD_POR_TIPO = {
+        TIPO_DOBLE: 2,
+        TIPO_TRIPLE: 3,
+        TIPO_CUADRUPLE: 4,
+    }
+
     TAMANO_CAMA_CHOICES = [
         (CAMA_QUEEN, 'Queen'),
         (CAMA_KING, 'King'),
@@ -175,6 +184,8 @@ class Habitacion(models.Model):
         null=True,
         help_text="Imagen principal de la habitación"
     )
+    # Rutas y tamaños de las variantes thumb/card/hero (usuarios/imagenes.py)
+    imagen_variantes = models.JSONField(default=dict, blank=True, editable=False)
     metros_cuadrados = models.PositiveIntegerField(
         default=45,
         help_text="Metros cuadrados de la habitación"
@@ -200,9 +211,24 @@ class Habitacion(models.Model):
         """Método para obtener el display de la condición"""
         return dict(self.CONDICION_CHOICES).get(self.condicion, '')
     
+    @staticmethod
+    def prefetch_imagenes_activas():
+        """
+        Prefetch de las imágenes activas (una sola consulta para todo el listado).
+        Las deja en `imagenes_activas`, que get_imagenes_urls usa si existe.
+        """
+        return models.Prefetch(
+            'imagenes',
+            queryset=ImagenHabitacion.objects.filter(activa=True).order_by('orden', 'id'),
+            to_attr='imagenes_activas',
+        )
+
     def get_imagenes_urls(self):
         """Retorna una lista de URLs de todas las imágenes de la habitación"""
-        imagenes = self.imagenes.filter(activa=True).order_by('orden')
+        # Usa el prefetch de la vista si existe; si no, consulta puntual
+        imagenes = getattr(self, 'imagenes_activas', None)
+        if imagenes is None:
+            imagenes = self.imagenes.filter(activa=True).order_by('orden', 'id')
         urls = []
         
         # Primero agregar la imagen principal si existe
@@ -1,14 +1,17 @@
 # habitacion/serializers.py
 from rest_framework import serializers
+from usuarios.imagenes import VariantesImagenField
 from .models import Habitacion, ImagenHabitacion
 
 class ImagenHabitacionSerializer(serializers.ModelSerializer):
     """
     Serializer para las imágenes adicionales (si las usas en el futuro).
     """
+    imagen_variantes = VariantesImagenField()
+
     class Meta:
         model = ImagenHabitacion
-        fields = ['id', 'imagen', 'url_imagen', 'orden', 'activa', 'habitacion']
+        fields = ['id', 'imagen', 'imagen_variantes', 'url_imagen', 'orden', 'activa', 'habitacion']
 
 
 class HabitacionSerializer(serializers.ModelSerializer):
@@ -20,6 +23,8 @@ class HabitacionSerializer(serializers.ModelSerializer):
     
     # Este campo es calculado (read_only) para listar todas las urls (principal + extras)
     imagenes = serializers.SerializerMethodField()
+    # URLs de las variantes thumb/card/hero de la imagen principal
+    imagen_variantes = VariantesImagenField()
     
     class Meta:
         model = Habitacion
@@ -0,0 +1,8 @@
+# habitacion/signals.py
+
+from backend.cache_respuestas import conectar_invalidacion
+from usuarios.imagenes import conectar_variantes
+from .models import Habitacion, ImagenHabitacion
+
+conectar_invalidacion(Habitacion, ImagenHabitacion)
+conectar_variantes(Habitacion, ImagenHabitacion)
@@ -0,0 +1,154 @@
+import io
+import os
+import shutil
+import tempfile
+
+from PIL import Image
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from usuarios.imagenes import procesar_imagen
+from .models import Habitacion, ImagenHabitacion
+
+
+class HabitacionListadoConsultasTest(TestCase):
+    """
+    El listado de habitaciones debe costar un número fijo de consultas
+    (habitaciones + prefetch de imágenes activas), sin importar cuántas haya.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        # Los listados pasan por la caché de catálogo; cada prueba parte vacía
+        cache.clear()
+
+    def crear_habitaciones(self, cantidad):
+        inicio = Habitacion.objects.count()
+        # Ejecuta los on_commit de las señales (invalidación de la caché)
+        with self.captureOnCommitCallbacks(execute=True):
+            self._crear(inicio, cantidad)
+
+    def _crear(self, inicio, cantidad):
+        for i in range(inicio, inicio + cantidad):
+            habitacion = Habitacion.objects.create(numero_habitacion=f'T{i}')
+            ImagenHabitacion.objects.create(habitacion=habitacion, url_imagen=f'https://img.test/{i}-1.jpg', orden=1)
+            ImagenHabitacion.objects.create(habitacion=habitacion, url_imagen=f'https://img.test/{i}-0.jpg', orden=0)
+            ImagenHabitacion.objects.create(habitacion=habitacion, url_imagen=f'https://img.test/{i}-x.jpg', activa=False)
+
+    def test_listado_consultas_constantes(self):
+        url = reverse('habitacion-list')
+
+        self.crear_habitaciones(3)
+        with self.assertNumQueries(2):
+            respuesta = self.client.get(url)
+        self.assertEqual(len(respuesta.data), 3)
+
+        self.crear_habitaciones(20)
+        with self.assertNumQueries(2):
+            respuesta = self.client.get(url)
+        self.assertEqual(len(respuesta.data), 23)
+
+    def test_disponibles_consultas_constantes(self):
+        url = reverse('habitacion-disponibles')
+
+        self.crear_habitaciones(3)
+        with self.assertNumQueries(2):
+            self.client.get(url)
+
+        self.crear_habitaciones(20)
+        with self.assertNumQueries(2):
+            respuesta = self.client.get(url)
+        self.assertEqual(respuesta.data['total'], 23)
+
+    def test_imagenes_activas_en_orden(self):
+        self.crear_habitaciones(1)
+        respuesta = self.client.get(reverse('habitacion-list'))
+        self.assertEqual(respuesta.data[0]['imagenes'], [
+            'https://img.test/0-0.jpg',
+            'https://img.test/0-1.jpg',
+        ])
+
+    def test_listado_cacheado_e_invalidado(self):
+        url = reverse('habitacion-list')
+        self.crear_habitaciones(2)
+        self.client.get(url)
+
+        # Segunda petición idéntica: sin consultas
+        with self.assertNumQueries(0):
+            respuesta = self.client.get(url)
+        self.assertEqual(len(respuesta.data), 2)
+
+        # Un cambio en Habitacion invalida la respuesta guardada
+        self.crear_habitaciones(1)
+        respuesta = self.client.get(url)
+        self.assertEqual(len(respuesta.data), 3)
+
+    def test_get_condicional(self):
+        url = reverse('habitacion-list')
+        self.crear_habitaciones(2)
+        respuesta = self.client.get(url)
+        etag = respuesta['ETag']
+        self.assertIn('Last-Modified', respuesta)
+
+        # Mismo ETag: 304 sin consultas ni cuerpo
+        with self.assertNumQueries(0):
+            respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertEqual(respuesta.content, b'')
+
+        respuesta = self.client.get(url, HTTP_IF_MODIFIED_SINCE=respuesta['Last-Modified'])
+        self.assertEqual(respuesta.status_code, 304)
+
+        # Tras un cambio el ETag deja de coincidir
+        self.crear_habitaciones(1)
+        respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotEqual(respuesta['ETag'], etag)
+        self.assertEqual(len(respuesta.data), 3)
+
+
+class VariantesImagenTest(TestCase):
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        ajustes = override_settings(MEDIA_ROOT=self.media)
+        ajustes.enable()
+        self.addCleanup(ajustes.disable)
+
+    def imagen(self, nombre, tamano):
+        contenido = io.BytesIO()
+        Image.new('RGB', tamano, (120, 80, 40)).save(contenido, 'JPEG')
+        return SimpleUploadedFile(nombre, contenido.getvalue(), content_type='image/jpeg')
+
+    def test_genera_variantes_y_las_expone(self):
+        habitacion = Habitacion.objects.create(numero_habitacion='V1', imagen=self.imagen('suite.jpg', (2400, 1600)))
+        self.assertTrue(procesar_imagen(Habitacion, habitacion.pk))
+        # Ya al día: no se vuelve a procesar
+        self.assertFalse(procesar_imagen(Habitacion, habitacion.pk))
+
+        variantes = self.client.get(reverse('habitacion-detail', args=[habitacion.pk])).data['imagen_variantes']
+        self.assertEqual(set(variantes), {'thumb', 'card', 'hero'})
+        self.assertEqual((variantes['hero']['ancho'], variantes['hero']['alto']), (1600, 1067))
+        self.assertEqual(variantes['thumb']['ancho'], 320)
+        self.assertRegex(variantes['card']['webp'], r'/media/habitaciones/suite__card\.[0-9a-f]{12}\.webp$')
+        self.assertRegex(variantes['card']['jpeg'], r'/media/habitaciones/suite__card\.[0-9a-f]{12}\.jpg$')
+
+    def test_reemplazo_borra_variantes_anteriores(self):
+        habitacion = Habitacion.objects.create(numero_habitacion='V2', imagen=self.imagen('a.jpg', (400, 300)))
+        procesar_imagen(Habitacion, habitacion.pk)
+        anterior = Habitacion.objects.get(pk=habitacion.pk).imagen_variantes['variantes']['thumb']['webp']
+
+        habitacion.imagen = self.imagen('b.jpg', (400, 300))
+        habitacion.save()
+        procesar_imagen(Habitacion, habitacion.pk)
+
+        variantes = Habitacion.objects.get(pk=habitacion.pk).imagen_variantes
+        self.assertEqual(variantes['origen'], habitacion.imagen.name)
+        # Nunca se amplía una imagen más pequeña que la variante
+        self.assertEqual(variantes['variantes']['hero']['ancho'], 400)
+        self.assertFalse(os.path.exists(os.path.join(self.media, anterior)))
@@ -2,11 +2,14 @@
 from rest_framework import viewsets, status, parsers
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q
+from django.db.models import Q, Exists, OuterRef
+from django.utils.dateparse import parse_date
 
-# Solo importamos el modelo y serializer de Habitacion
-from .models import Habitacion
+from .models import Habitacion, ImagenHabitacion
 from .serializers import HabitacionSerializer
+from reserva_habitacion.models import ReservaHabitacion
+from backend.cache_respuestas import cache_respuesta, get_condicional
+from usuarios.paginacion import CursorPaginacion
 
 class HabitacionViewSet(viewsets.ModelViewSet):
     """
@@ -15,6 +18,8 @@ class HabitacionViewSet(viewsets.ModelViewSet):
     """
     queryset = Habitacion.objects.all()
     serializer_class = HabitacionSerializer
+    pagination_class = CursorPaginacion
+    orden_paginacion = 'numero_habitacion'
     
     # ⚠️ IMPORTANTE: Permite recibir archivos (imágenes) y datos de formulario a la vez
     parser_classes = (parsers.MultiPartParser, parsers.FormParser)
@@ -23,7 +28,7 @@ class HabitacionViewSet(viewsets.ModelViewSet):
         """
         Filtros simples por parámetros URL
         """
-        queryset = Habitacion.objects.all()
+        queryset = Habitacion.objects.prefetch_related(Habitacion.prefetch_imagenes_activas())
         
         # Filtro por estado
         estado = self.request.query_params.get('estado')
@@ -61,16 +66,58 @@ class HabitacionViewSet(viewsets.ModelViewSet):
             queryset = queryset.filter(activa=True)
         
         return queryset
+
+    @get_condicional(Habitacion, ImagenHabitacion)
+    @cache_respuesta(Habitacion, ImagenHabitacion)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @get_condicional(Habitacion, ImagenHabitacion)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
     
     @action(detail=False, methods=['get'])
+    @get_condicional(Habitacion, ImagenHabitacion, ReservaHabitacion)
+    @cache_respuesta(Habitacion, ImagenHabitacion, ReservaHabitacion)
     def disponibles(self, request):
         """
-        Endpoint simple para habitaciones disponibles
+        Habitaciones disponibles, opcionalmente para un rango de fechas.
+
+        Con ?checkin=YYYY-MM-DD&checkout=YYYY-MM-DD se excluyen, en una sola
+        consulta (NOT EXISTS), las habitaciones con reservas activas que se
+        solapan con el rango. Filtros: categoria, tipo_ocupacion, huespedes,
+        precio_min y precio_max.
         """
         habitaciones = Habitacion.objects.filter(
             estado='disponible', 
             activa=True
-        )
+        ).prefetch_related(Habitacion.prefetch_imagenes_activas())
+        
+        # Filtro por rango de fechas (anti-join contra reserva_habitacion)
+        checkin = request.query_params.get('checkin')
+        checkout = request.query_params.get('checkout')
+        if checkin or checkout:
+            try:
+                fecha_checkin = parse_date(checkin or '')
+                fecha_checkout = parse_date(checkout or '')
+            except ValueError:
+                fecha_checkin = fecha_checkout = None
+
+            if not fecha_checkin or not fecha_checkout:
+                return Response(
+                    {'error': 'Debe indicar checkin y checkout con formato YYYY-MM-DD.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if fecha_checkin >= fecha_checkout:
+                return Response(
+                    {'error': 'El check-out debe ser posterior al check-in.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            reservas_conflictivas = ReservaHabitacion.reservas_superpuestas(
+                fecha_checkin, fecha_checkout
+            ).filter(habitacion=OuterRef('pk'))
+            habitaciones = habitaciones.filter(~Exists(reservas_conflictivas))
         
         # Aplicar filtros adicionales si existen
         categoria = request.query_params.get('categoria')
@@ -81,14 +128,37 @@ class HabitacionViewSet(viewsets.ModelViewSet):
         if tipo_ocupacion:
             habitaciones = habitaciones.filter(tipo_ocupacion=tipo_ocupacion)
         
+        # Filtro por número de huéspedes (capacidad según tipo de ocupación)
+        huespedes = request.query_params.get('huespedes')
+        if huespedes:
+            try:
+                huespedes = int(huespedes)
+            except ValueError:
+                return Response(
+                    {'error': 'El número de huéspedes debe ser un entero.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            tipos_validos = [
+                tipo for tipo, capacidad in Habitacion.CAPACIDAD_POR_TIPO.items()
+                if capacidad >= huespedes
+            ]
+            habitaciones = habitaciones.filter(tipo_ocupacion__in=tipos_validos)
+        
         precio_max = request.query_params.get('precio_max')
         if precio_max:
             habitaciones = habitaciones.filter(precio_base__lte=precio_max)
         
+        precio_min = request.query_params.get('precio_min')
+        if precio_min:
+            habitaciones = habitaciones.filter(precio_base__gte=precio_min)
+        
         serializer = self.get_serializer(habitaciones, many=True)
+        data = serializer.data
         return Response({
-            'total': habitaciones.count(),
-            'habitaciones': serializer.data
+            'total': len(data),
+            'checkin': checkin,
+            'checkout': checkout,
+            'habitaciones': data
         })
     
     @action(detail=True, methods=['post'])
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class PlatoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'plato'
+
+    def ready(self):
+        # Índice de búsqueda, menú precalculado y caché de catálogo
+        import plato.signals
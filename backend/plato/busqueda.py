@@ -0,0 +1,123 @@
+# plato/busqueda.py
+
+"""
+Búsqueda de texto completo sobre los platos (nombre, ingredientes, descripción).
+
+    SQLite      -> tabla virtual FTS5 `plato_busqueda` (rowid = plato.id) con
+                   tokenizador unicode61 sin diacríticos e índice de prefijos.
+                   Se mantiene al día con las señales post_save / post_delete.
+    PostgreSQL  -> columna generada `plato.busqueda` (tsvector, índice GIN)
+                   con la configuración `espanol_sin_acentos` (spanish + unaccent).
+                   La base de datos la recalcula sola en cada INSERT/UPDATE.
+                   Si la extensión unaccent no se pudo instalar (servicios
+                   gestionados sin permisos) solo se quitan las tildes del
+                   español; ver plato/migrations/0002_busqueda_texto.py.
+
+Cada término de la consulta se busca como prefijo ("pol" encuentra "Pollo"),
+sin distinguir acentos ni mayúsculas, y los resultados se ordenan por
+relevancia (el nombre pesa más que los ingredientes, y estos más que la
+descripción). Otros motores usan icontains.
+"""
+
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+TABLA_FTS = 'plato_busqueda'
+CONFIGURACION_PG = 'espanol_sin_acentos'
+CAMPOS_INDEXADOS = ('nombre', 'ingredientes', 'descripcion')
+# Términos máximos considerados por consulta
+MAXIMO_TERMINOS = 8
+
+
+def normalizar(texto):
+    """Minúsculas y sin acentos: 'Jamón Ibérico' -> 'jamon iberico'."""
+    descompuesto = unicodedata.normalize('NFKD', texto or '')
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+
+def terminos(texto):
+    # Solo caracteres de palabra: nada de la sintaxis de FTS5 / tsquery llega a la consulta
+    return re.findall(r'\w+', normalizar(texto))[:MAXIMO_TERMINOS]
+
+
+# =========================================================
+# CONSULTA
+# =========================================================
+
+def buscar_platos(queryset, texto):
+    """
+    Filtra `queryset` por `texto` y anota `relevancia` (mayor = mejor).
+    El orden lo decide quien llama.
+    """
+    lista = terminos(texto)
+    if not lista:
+        # Solo signos de puntuación: nada que buscar
+        return queryset.none().annotate(relevancia=Value(0.0, output_field=FloatField()))
+
+    if connection.vendor == 'sqlite':
+        consulta = ' '.join(f'"{t}"*' for t in lista)
+        return queryset.filter(
+            id__in=RawSQL(f'SELECT rowid FROM {TABLA_FTS} WHERE {TABLA_FTS} MATCH %s', (consulta,))
+        ).annotate(relevancia=RawSQL(
+            # bm25 devuelve valores negativos (más negativo = más relevante)
+            f'SELECT -bm25({TABLA_FTS}, 10.0, 4.0, 1.0) FROM {TABLA_FTS} '
+            f'WHERE {TABLA_FTS} MATCH %s AND rowid = plato.id',
+            (consulta,),
+            output_field=FloatField(),
+        ))
+
+    if connection.vendor == 'postgresql':
+        consulta = ' & '.join(f'{t}:*' for t in lista)
+        tsquery = f"to_tsquery('{CONFIGURACION_PG}', %s)"
+        return queryset.filter(
+            RawSQL(f'plato.busqueda @@ {tsquery}', (consulta,), output_field=BooleanField())
+        ).annotate(relevancia=RawSQL(
+            f'ts_rank(plato.busqueda, {tsquery})', (consulta,), output_field=FloatField()
+        ))
+
+    filtro = Q()
+    for termino in lista:
+        filtro &= (
+            Q(nombre__icontains=termino) |
+            Q(descripcion__icontains=termino) |
+            Q(ingredientes__icontains=termino)
+        )
+    return queryset.filter(filtro).annotate(relevancia=Value(0.0, output_field=FloatField()))
+
+
+# =========================================================
+# ÍNDICE (SQLite)
+# =========================================================
+
+def indexar_plato(plato):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLA_FTS} WHERE rowid = %s', [plato.pk])
+        cursor.execute(
+            f'INSERT INTO {TABLA_FTS} (rowid, nombre, ingredientes, descripcion) VALUES (%s, %s, %s, %s)',
+            [plato.pk, plato.nombre, plato.ingredientes, plato.descripcion],
+        )
+
+
+def desindexar_plato(plato_id):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLA_FTS} WHERE rowid = %s', [plato_id])
+
+
+def reconstruir_indice():
+    """Regenera el índice completo (p. ej. tras cargas con bulk_create o update())."""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLA_FTS}')
+        cursor.execute(
+            f'INSERT INTO {TABLA_FTS} (rowid, nombre, ingredientes, descripcion) '
+            'SELECT id, nombre, ingredientes, descripcion FROM plato'
+        )
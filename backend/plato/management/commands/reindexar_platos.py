@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from plato.busqueda import reconstruir_indice
+
+
+class Command(BaseCommand):
+    help = 'Regenera el índice de búsqueda de platos (SQLite FTS5; en PostgreSQL la columna es generada).'
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            self.stdout.write('PostgreSQL mantiene plato.busqueda automáticamente: nada que hacer.')
+            return
+        reconstruir_indice()
+        self.stdout.write(self.style.SUCCESS('Índice de búsqueda de platos regenerado.'))
@@ -0,0 +1,188 @@
+# plato/menu.py
+
+"""
+Menú precalculado del restaurante.
+
+`por_categoria` (sin filtros) y `disponibles` sirven siempre el mismo menú:
+los platos activos y disponibles. En lugar de serializarlo en cada petición
+se construye una sola vez (una consulta + prefetch de alérgenos), se
+renderiza a JSON y se guarda en la caché como bytes junto con las versiones
+de Plato y Alergeno con las que se construyó.
+
+Cualquier cambio en Plato / Alergeno (señales en plato/signals.py) despierta
+un hilo en segundo plano que lo reconstruye. Mientras tanto se sigue
+sirviendo la copia anterior con sus propios validadores (ETag), de modo que
+ningún cliente guarda datos viejos bajo un ETag nuevo. Cualquier worker que
+encuentre la copia con versiones viejas la reconstruye también (la caché es
+compartida, backend/cache.py) y MENU_TTL acota su vida si se pierde un aviso.
+
+Las URLs de imágenes salen absolutas, como en el resto de la API: se
+construyen con settings.URL_PUBLICA_BACKEND o, si no está definida, con el
+host de la petición (una copia por host; los avisos de las señales solo
+pueden reconstruir la de la URL configurada).
+
+Modos (settings.MENU_RECONSTRUCCION):
+    'hilo'     -> reconstrucción en segundo plano (por defecto).
+    'sincrono' -> se reconstruye al confirmar la transacción (pruebas).
+"""
+
+import logging
+import threading
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.http import HttpResponse
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
+
+from backend.cache import cache_utilizable
+from backend.cache_respuestas import calcular_etag, ultima_modificacion, versiones_modelos
+
+from .models import Plato, Alergeno
+from .serializers import PlatoSerializer, PlatoListSerializer
+
+logger = logging.getLogger(__name__)
+
+MENU_RECONSTRUCCION = getattr(settings, 'MENU_RECONSTRUCCION', 'hilo')
+MENU_TTL = getattr(settings, 'MENU_TTL', 3600)
+URL_PUBLICA_BACKEND = getattr(settings, 'URL_PUBLICA_BACKEND', '')
+CLAVE_MENU = 'menu:snapshot'
+DOCUMENTOS = ('por_categoria', 'disponibles')
+
+
+class _PeticionBase:
+    """
+    Ocupa el lugar de `request` en el contexto de los serializadores al
+    construir fuera de una petición: solo resuelve URLs absolutas.
+    """
+
+    def __init__(self, base):
+        self.base = base
+
+    def build_absolute_uri(self, location=None):
+        return urljoin(self.base, location or '/')
+
+
+def url_base(request=None):
+    """URL pública del backend terminada en '/' (None sin configuración ni petición)."""
+    if URL_PUBLICA_BACKEND:
+        return URL_PUBLICA_BACKEND.rstrip('/') + '/'
+    return request.build_absolute_uri('/') if request is not None else None
+
+
+def _clave(base):
+    return f'{CLAVE_MENU}:{base}'
+
+
+def agrupar_por_categoria(platos, contexto=None):
+    """{'categorias': {display: [platos]}, 'total_platos': n} con una sola serialización."""
+    platos = list(platos)
+    categorias = {}
+    for plato, datos in zip(platos, PlatoListSerializer(platos, many=True, context=contexto or {}).data):
+        categorias.setdefault(plato.get_categoria_display(), []).append(datos)
+    return {'categorias': categorias, 'total_platos': len(platos)}
+
+
+def construir_menu(base):
+    """Construye y guarda el menú precalculado con URLs bajo `base`. Retorna la entrada."""
+    # Las versiones se leen ANTES de consultar: si algo cambia durante la
+    # construcción, la entrada nace obsoleta y se vuelve a construir.
+    versiones = versiones_modelos(Plato, Alergeno)
+    modificado = ultima_modificacion(Plato, Alergeno)
+
+    platos = list(
+        Plato.objects.filter(activo=True, disponible=True)
+        .prefetch_related('alergenos')
+        .order_by('categoria', 'orden', 'nombre')
+    )
+    contexto = {'request': _PeticionBase(base)}
+    renderer = JSONRenderer()
+    entrada = {
+        'versiones': versiones,
+        'modificado': modificado,
+        'por_categoria': renderer.render(agrupar_por_categoria(platos, contexto)),
+        'disponibles': renderer.render({
+            'total': len(platos),
+            'platos': PlatoSerializer(platos, many=True, context=contexto).data,
+        }),
+    }
+    if cache_utilizable():
+        cache.set(_clave(base), entrada, MENU_TTL)
+    return entrada
+
+
+def respuesta_menu(request, documento):
+    """HttpResponse con los bytes precalculados de `documento`."""
+    base = url_base(request)
+    entrada = cache.get(_clave(base)) if cache_utilizable() else None
+    if entrada is None:
+        entrada = construir_menu(base)
+    elif entrada['versiones'] != versiones_modelos(Plato, Alergeno):
+        if MENU_RECONSTRUCCION == 'sincrono':
+            entrada = construir_menu(base)
+        else:
+            # Obsoleta: se sirve igualmente y se reconstruye en segundo plano
+            notificar_reconstruccion(base)
+
+    response = HttpResponse(entrada[documento], content_type='application/json')
+    response['ETag'] = calcular_etag(request, entrada['versiones'])
+    response['Last-Modified'] = http_date(entrada['modificado'])
+    return response
+
+
+# =========================================================
+# RECONSTRUCCIÓN EN SEGUNDO PLANO
+# =========================================================
+
+_despertar = threading.Event()
+_pendientes = set()
+_pendientes_lock = threading.Lock()
+_hilo = None
+_hilo_lock = threading.Lock()
+
+
+def _bucle_reconstruccion():
+    while True:
+        _despertar.wait()
+        with _pendientes_lock:
+            _despertar.clear()
+            bases = list(_pendientes)
+            _pendientes.clear()
+        for base in bases:
+            try:
+                close_old_connections()
+                construir_menu(base)
+            except Exception:
+                logger.exception("Error reconstruyendo el menú")
+            finally:
+                close_old_connections()
+
+
+def _asegurar_hilo():
+    global _hilo
+    if _hilo is not None and _hilo.is_alive():
+        return
+    with _hilo_lock:
+        if _hilo is None or not _hilo.is_alive():
+            _hilo = threading.Thread(target=_bucle_reconstruccion, name='reconstruccion-menu', daemon=True)
+            _hilo.start()
+
+
+def notificar_reconstruccion(base=None):
+    base = base or url_base()
+    if base is None:
+        # Sin URL configurada no se sabe para qué host: la siguiente petición
+        # ve las versiones nuevas y la reconstruye
+        return
+    if MENU_RECONSTRUCCION == 'sincrono':
+        try:
+            construir_menu(base)
+        except Exception:
+            logger.exception("Error reconstruyendo el menú")
+    else:
+        with _pendientes_lock:
+            _pendientes.add(base)
+        _asegurar_hilo()
+        _despertar.set()
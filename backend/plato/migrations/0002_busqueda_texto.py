@@ -0,0 +1,96 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:52
+
+from django.db import migrations
+
+SQLITE_CREAR = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS plato_busqueda USING fts5("
+    "nombre, ingredientes, descripcion, "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "INSERT INTO plato_busqueda (rowid, nombre, ingredientes, descripcion) "
+    "SELECT id, nombre, ingredientes, descripcion FROM plato",
+]
+SQLITE_BORRAR = [
+    "DROP TABLE IF EXISTS plato_busqueda",
+]
+
+# unaccent es una extensión "trusted" desde PostgreSQL 13 (basta ser dueño de
+# la base), pero en algunos servicios gestionados solo la instala un
+# administrador. Sin ella la migración no falla: la configuración queda sin
+# el diccionario unaccent y la columna quita igualmente las tildes del
+# español con translate() (inmutable, apto para columnas generadas). Para
+# el resto de diacríticos, un administrador instala la extensión y ejecuta:
+#   ALTER TEXT SEARCH CONFIGURATION espanol_sin_acentos
+#       ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+#   UPDATE plato SET nombre = nombre;  -- recalcula la columna generada
+SIN_TILDES_DE = 'áéíóúüñàèìòùÁÉÍÓÚÜÑÀÈÌÒÙ'
+SIN_TILDES_A = 'aeiouunaeiouAEIOUUNAEIOU'
+
+
+def _vector(campo, peso):
+    return (
+        f"setweight(to_tsvector('espanol_sin_acentos'::regconfig, "
+        f"translate(coalesce({campo}, ''), '{SIN_TILDES_DE}', '{SIN_TILDES_A}')), '{peso}')"
+    )
+
+
+POSTGRES_CREAR = [
+    """
+    DO $$
+    BEGIN
+        CREATE EXTENSION IF NOT EXISTS unaccent;
+    EXCEPTION WHEN insufficient_privilege OR undefined_file THEN
+        RAISE WARNING 'Sin permiso para CREATE EXTENSION unaccent: la búsqueda de platos solo normaliza las tildes del español';
+    END
+    $$
+    """,
+    """
+    DO $$
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'espanol_sin_acentos') THEN
+            CREATE TEXT SEARCH CONFIGURATION espanol_sin_acentos (COPY = pg_catalog.spanish);
+            IF EXISTS (SELECT 1 FROM pg_ts_dict WHERE dictname = 'unaccent') THEN
+                ALTER TEXT SEARCH CONFIGURATION espanol_sin_acentos
+                    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+            END IF;
+        END IF;
+    END
+    $$
+    """,
+    # Columna generada: PostgreSQL la recalcula en cada INSERT/UPDATE
+    f"""
+    ALTER TABLE plato ADD COLUMN busqueda tsvector GENERATED ALWAYS AS (
+        {_vector('nombre', 'A')} ||
+        {_vector('ingredientes', 'B')} ||
+        {_vector('descripcion', 'C')}
+    ) STORED
+    """,
+    "CREATE INDEX plato_busqueda_gin ON plato USING GIN (busqueda)",
+]
+POSTGRES_BORRAR = [
+    "DROP INDEX IF EXISTS plato_busqueda_gin",
+    "ALTER TABLE plato DROP COLUMN IF EXISTS busqueda",
+]
+
+
+def _ejecutar(schema_editor, por_motor):
+    for sentencia in por_motor.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sentencia)
+
+
+def crear_indice(apps, schema_editor):
+    _ejecutar(schema_editor, {'sqlite': SQLITE_CREAR, 'postgresql': POSTGRES_CREAR})
+
+
+def borrar_indice(apps, schema_editor):
+    _ejecutar(schema_editor, {'sqlite': SQLITE_BORRAR, 'postgresql': POSTGRES_BORRAR})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plato', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, borrar_indice),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:01
+
+import unicodedata
+
+from django.db import migrations, models
+
+# Orden de Plato.ALERGENO_CHOICES al crear la máscara (bit = posición)
+CLAVES_ALERGENOS = [
+    'gluten', 'lacteos', 'frutos_secos', 'mariscos', 'huevos', 'soja',
+    'pescado', 'mostaza', 'sesamo', 'apio', 'altramuces', 'moluscos',
+]
+
+
+def _clave(texto):
+    descompuesto = unicodedata.normalize('NFKD', texto or '')
+    sin_acentos = ''.join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+    clave = '_'.join(sin_acentos.replace('-', ' ').split())
+    return clave if clave in CLAVES_ALERGENOS else None
+
+
+def calcular_mascaras(apps, schema_editor):
+    Plato = apps.get_model('plato', 'Plato')
+    mascaras = {}
+    filas = Plato.alergenos.through.objects.values_list('plato_id', 'alergeno__nombre', 'alergeno__icono')
+    for plato_id, nombre, icono in filas:
+        clave = _clave(icono) or _clave(nombre)
+        if clave:
+            mascaras[plato_id] = mascaras.get(plato_id, 0) | (1 << CLAVES_ALERGENOS.index(clave))
+    for plato_id, mascara in mascaras.items():
+        Plato.objects.filter(pk=plato_id).update(alergenos_mascara=mascara)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plato', '0002_busqueda_texto'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plato',
+            name='alergenos_mascara',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Bits de ALERGENO_CHOICES presentes en el plato'),
+        ),
+        migrations.RunPython(calcular_mascaras, migrations.RunPython.noop),
+    ]
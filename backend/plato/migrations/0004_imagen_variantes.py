@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('plato', '0003_alergenos_mascara'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='plato',
+            name='imagen_variantes',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -1,5 +1,17 @@
 from django.db import models
 
+from .busqueda import normalizar
+
+
+def clave_alergeno(texto):
+    """
+    Clave de ALERGENO_CHOICES que corresponde a un nombre o icono libre:
+    'Frutos Secos' -> 'frutos_secos', 'Lácteos' -> 'lacteos'. None si no es
+    uno de los alérgenos fijos.
+    """
+    clave = '_'.join(normalizar(texto).replace('-', ' ').split())
+    return clave if clave in Plato.BIT_ALERGENO else None
+
 
 class Plato(models.Model):
     """
@@ -58,6 +70,8 @@ class Plato(models.Model):
         (ALERGENO_ALTRAMUCES, 'Altramuces'),
         (ALERGENO_MOLUSCOS, 'Moluscos'),
     ]
+    # Bit de cada alérgeno en alergenos_mascara (por posición: agregar nuevos solo al final)
+    BIT_ALERGENO = {clave: 1 << i for i, (clave, _) in enumerate(ALERGENO_CHOICES)}
     
     # Campos del modelo
     id = models.AutoField(primary_key=True)
@@ -89,6 +103,8 @@ class Plato(models.Model):
         null=True,
         help_text="Imagen del plato"
     )
+    # Rutas y tamaños de las variantes thumb/card/hero (usuarios/imagenes.py)
+    imagen_variantes = models.JSONField(default=dict, blank=True, editable=False)
     url_imagen = models.URLField(
         max_length=500,
         blank=True,
@@ -101,6 +117,13 @@ class Plato(models.Model):
         default=0,
         help_text="Orden en que se mostrará en el menú"
     )
+    # Copia desnormalizada de 'alergenos' (la mantiene plato/signals.py):
+    # permite filtrar con una sola operación de bits, sin JOIN ni DISTINCT
+    alergenos_mascara = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Bits de ALERGENO_CHOICES presentes en el plato"
+    )
     fecha_creacion = models.DateTimeField(auto_now_add=True, null=True)
     fecha_actualizacion = models.DateTimeField(auto_now=True)
     
@@ -131,6 +154,52 @@ class Plato(models.Model):
         """Retorna la lista de nombres de alérgenos"""
         return [alergeno.nombre for alergeno in self.alergenos.all()]
 
+    def get_alergenos_mascara(self):
+        """Alérgenos decodificados de alergenos_mascara (sin consultas)"""
+        return [
+            {'clave': clave, 'nombre': nombre}
+            for clave, nombre in self.ALERGENO_CHOICES
+            if self.alergenos_mascara & self.BIT_ALERGENO[clave]
+        ]
+
+    @classmethod
+    def mascara_alergenos(cls, valores):
+        """
+        Convierte nombres/claves de alérgenos en una máscara de bits.
+        Retorna (mascara, otros): `otros` son los valores sin bit asignado.
+        """
+        mascara = 0
+        otros = []
+        for valor in valores:
+            clave = clave_alergeno(valor)
+            if clave:
+                mascara |= cls.BIT_ALERGENO[clave]
+            elif valor.strip():
+                otros.append(valor.strip())
+        return mascara, otros
+
+    @classmethod
+    def recalcular_mascaras(cls, ids):
+        """Recalcula alergenos_mascara de los platos indicados. Retorna {id: mascara}."""
+        mascaras = dict.fromkeys(ids, 0)
+        if not mascaras:
+            return mascaras
+        filas = cls.alergenos.through.objects.filter(plato_id__in=mascaras).values_list(
+            'plato_id', 'alergeno__nombre', 'alergeno__icono'
+        )
+        for plato_id, nombre, icono in filas:
+            clave = clave_alergeno(icono) or clave_alergeno(nombre)
+            if clave:
+                mascaras[plato_id] |= cls.BIT_ALERGENO[clave]
+
+        # Un UPDATE por valor distinto de máscara
+        por_mascara = {}
+        for plato_id, mascara in mascaras.items():
+            por_mascara.setdefault(mascara, []).append(plato_id)
+        for mascara, grupo in por_mascara.items():
+            cls.objects.filter(pk__in=grupo).update(alergenos_mascara=mascara)
+        return mascaras
+
 
 class Alergeno(models.Model):
     """
@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from usuarios.imagenes import VariantesImagenField
 from .models import Plato, Alergeno
 
 
@@ -18,8 +19,9 @@ class PlatoSerializer(serializers.ModelSerializer):
     """
     
     url_imagen_completa = serializers.SerializerMethodField()
+    imagen_variantes = VariantesImagenField()
     lista_ingredientes = serializers.SerializerMethodField()
-    alergenos_detalle = AlergenoSerializer(many=True, read_only=True)
+    alergenos_detalle = serializers.SerializerMethodField()
     categoria_display = serializers.CharField(source='get_categoria_display', read_only=True)
     
     class Meta:
@@ -32,6 +34,9 @@ class PlatoSerializer(serializers.ModelSerializer):
     def get_lista_ingredientes(self, obj):
         return obj.get_lista_ingredientes()
 
+    def get_alergenos_detalle(self, obj):
+        return obj.get_alergenos_mascara()
+
 
 class PlatoListSerializer(serializers.ModelSerializer):
     """
@@ -41,11 +46,13 @@ class PlatoListSerializer(serializers.ModelSerializer):
     """
     
     url_imagen_completa = serializers.SerializerMethodField()
+    imagen_variantes = VariantesImagenField()
     categoria_display = serializers.CharField(source='get_categoria_display', read_only=True)
     
     # Agregamos lista_ingredientes y alergenos para filtros visuales rápidos si se necesitan
     lista_ingredientes = serializers.SerializerMethodField()
-    alergenos_detalle = AlergenoSerializer(many=True, read_only=True)
+    # Decodificado de alergenos_mascara: sin consulta por plato
+    alergenos_detalle = serializers.SerializerMethodField()
     
     class Meta:
         model = Plato
@@ -59,6 +66,7 @@ class PlatoListSerializer(serializers.ModelSerializer):
             'activo', 
             'orden', 
             'url_imagen_completa',
+            'imagen_variantes',
             # --- CAMPOS AGREGADOS PARA EL ADMIN ---
             'descripcion',   # Necesario para la tabla y el modal de editar
             'ingredientes',  # Necesario para el buscador y editar
@@ -72,4 +80,7 @@ class PlatoListSerializer(serializers.ModelSerializer):
         return obj.get_url_imagen()
 
     def get_lista_ingredientes(self, obj):
-        return obj.get_lista_ingredientes()
\ No newline at end of file
+        return obj.get_lista_ingredientes()
+
+    def get_alergenos_detalle(self, obj):
+        return obj.get_alergenos_mascara()
@@ -0,0 +1,99 @@
+# plato/signals.py
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+
+from backend.cache_respuestas import conectar_invalidacion, invalidar_modelo
+from usuarios.imagenes import conectar_variantes
+from .busqueda import CAMPOS_INDEXADOS, indexar_plato, desindexar_plato
+from .menu import notificar_reconstruccion
+from .models import Plato, Alergeno
+
+
+# =========================================================
+# CACHÉ DE CATÁLOGO Y VARIANTES DE IMÁGENES
+# =========================================================
+
+# Antes que las señales del menú: al confirmar, la versión ya es la nueva
+# cuando se reconstruye
+conectar_invalidacion(Plato, Alergeno)
+conectar_variantes(Plato)
+
+
+@receiver(m2m_changed, sender=Plato.alergenos.through)
+def invalidar_alergenos_plato_signal(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(lambda: invalidar_modelo(Plato))
+
+
+@receiver(post_save, sender=Plato)
+def indexar_plato_signal(sender, instance, update_fields=None, **kwargs):
+    # save(update_fields=[...]) que no toca texto (orden, disponible...) no reindexa
+    if update_fields is not None and not set(update_fields) & set(CAMPOS_INDEXADOS):
+        return
+    indexar_plato(instance)
+
+
+@receiver(post_delete, sender=Plato)
+def desindexar_plato_signal(sender, instance, **kwargs):
+    desindexar_plato(instance.pk)
+
+
+# =========================================================
+# MÁSCARA DE ALÉRGENOS
+# =========================================================
+
+@receiver(m2m_changed, sender=Plato.alergenos.through)
+def sincronizar_mascara_signal(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        # alergeno.platos.clear(): después ya no se sabe qué platos tenía
+        instance._platos_afectados = list(instance.platos.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        mascaras = Plato.recalcular_mascaras([instance.pk])
+        instance.alergenos_mascara = mascaras[instance.pk]
+    elif action == 'post_clear':
+        Plato.recalcular_mascaras(getattr(instance, '_platos_afectados', []))
+    else:
+        Plato.recalcular_mascaras(pk_set)
+
+
+@receiver(post_save, sender=Alergeno)
+def alergeno_guardado_signal(sender, instance, created, **kwargs):
+    # Renombrar un alérgeno o cambiar su icono puede cambiar su bit
+    if not created:
+        Plato.recalcular_mascaras(instance.platos.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Alergeno)
+def alergeno_por_borrar_signal(sender, instance, **kwargs):
+    # El borrado en cascada de la tabla intermedia no emite m2m_changed
+    instance._platos_afectados = list(instance.platos.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Alergeno)
+def alergeno_borrado_signal(sender, instance, **kwargs):
+    Plato.recalcular_mascaras(getattr(instance, '_platos_afectados', []))
+
+
+# =========================================================
+# MENÚ PRECALCULADO
+# =========================================================
+
+@receiver(post_save, sender=Plato)
+@receiver(post_save, sender=Alergeno)
+@receiver(post_delete, sender=Plato)
+@receiver(post_delete, sender=Alergeno)
+def reconstruir_menu_signal(sender, **kwargs):
+    transaction.on_commit(notificar_reconstruccion)
+
+
+@receiver(m2m_changed, sender=Plato.alergenos.through)
+def reconstruir_menu_alergenos_signal(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        transaction.on_commit(notificar_reconstruccion)
+
@@ -0,0 +1,195 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from backend.cache_respuestas import invalidar_modelo
+from . import menu, views
+
+from .busqueda import buscar_platos
+from .models import Alergeno, Plato
+
+
+class BusquedaPlatosTest(TestCase):
+
+    def setUp(self):
+        self.pollo = Plato.objects.create(nombre='Pollo a la brasa', ingredientes='pollo, papas', precio=Decimal('15'))
+        self.arroz = Plato.objects.create(nombre='Arroz con vegetales', ingredientes='arroz, pollo', precio=Decimal('12'))
+        self.sopa = Plato.objects.create(nombre='Sopa del día', descripcion='Caldo de pollo casero', precio=Decimal('8'))
+        self.jamon = Plato.objects.create(nombre='Jamón Ibérico', precio=Decimal('20'))
+
+    def buscar(self, texto):
+        return list(buscar_platos(Plato.objects.all(), texto).order_by('-relevancia', 'nombre'))
+
+    def test_nombre_pesa_mas_que_ingredientes_y_descripcion(self):
+        self.assertEqual(self.buscar('pollo'), [self.pollo, self.arroz, self.sopa])
+
+    def test_prefijo_y_sin_acentos(self):
+        self.assertEqual(self.buscar('pol'), [self.pollo, self.arroz, self.sopa])
+        self.assertEqual(self.buscar('JAMON iber'), [self.jamon])
+        self.assertEqual(self.buscar('"*'), [])
+
+    def test_indice_al_dia_al_guardar_y_borrar(self):
+        self.jamon.nombre = 'Jamón serrano'
+        self.jamon.save()
+        self.assertEqual(self.buscar('serrano'), [self.jamon])
+        self.assertEqual(self.buscar('iberico'), [])
+        self.jamon.delete()
+        self.assertEqual(self.buscar('serrano'), [])
+
+    def test_listado_por_relevancia_sin_paginar(self):
+        # ?page_size= no aplica: el cursor reordenaría por su propia clave
+        respuesta = APIClient().get(reverse('plato-list'), {'search': 'pollo', 'page_size': 1})
+        self.assertEqual([fila['id'] for fila in respuesta.data], [self.pollo.pk, self.arroz.pk, self.sopa.pk])
+
+
+class MascaraAlergenosTest(TestCase):
+
+    def setUp(self):
+        self.gluten = Alergeno.objects.create(nombre='Gluten')
+        self.nueces = Alergeno.objects.create(nombre='Frutos Secos')
+        self.sulfitos = Alergeno.objects.create(nombre='Sulfitos')
+        self.pan = Plato.objects.create(nombre='Pan de nueces', precio=Decimal('5'))
+        self.pan.alergenos.add(self.gluten, self.nueces)
+        self.vino = Plato.objects.create(nombre='Vino tinto', precio=Decimal('9'))
+        self.vino.alergenos.add(self.sulfitos)
+        self.fruta = Plato.objects.create(nombre='Ensalada de frutas', precio=Decimal('6'))
+
+    def mascara(self, plato):
+        return Plato.objects.get(pk=plato.pk).alergenos_mascara
+
+    def ids(self, **parametros):
+        respuesta = APIClient().get(reverse('plato-list'), parametros)
+        return sorted(fila['id'] for fila in respuesta.data)
+
+    def test_mascara_sigue_a_la_relacion(self):
+        bits = Plato.BIT_ALERGENO
+        self.assertEqual(self.mascara(self.pan), bits['gluten'] | bits['frutos_secos'])
+        # Sin bit asignado: solo en la relación
+        self.assertEqual(self.mascara(self.vino), 0)
+
+        self.pan.alergenos.remove(self.gluten)
+        self.assertEqual(self.mascara(self.pan), bits['frutos_secos'])
+        self.nueces.platos.clear()
+        self.assertEqual(self.mascara(self.pan), 0)
+
+    def test_renombrar_y_borrar_alergeno(self):
+        self.gluten.nombre = 'Trigo'
+        self.gluten.save()
+        self.assertEqual(self.mascara(self.pan), Plato.BIT_ALERGENO['frutos_secos'])
+        self.nueces.delete()
+        self.assertEqual(self.mascara(self.pan), 0)
+
+    def test_filtros_por_alergenos(self):
+        self.assertEqual(self.ids(alergenos='gluten'), [self.pan.pk])
+        self.assertEqual(self.ids(alergenos='Lácteos,Sulfitos'), [self.vino.pk])
+        self.assertEqual(self.ids(sin_alergenos='frutos-secos'), sorted([self.vino.pk, self.fruta.pk]))
+        self.assertEqual(self.ids(sin_alergenos='gluten,Sulfitos'), [self.fruta.pk])
+
+
+@mock.patch.object(menu, 'MENU_RECONSTRUCCION', 'sincrono')
+class MenuPrecalculadoTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.plato = Plato.objects.create(nombre='Arepa', precio=Decimal('4'), imagen='platos/arepa.jpg')
+        self.url = reverse('plato-disponibles')
+
+    def platos(self):
+        return APIClient().get(self.url).json()['platos']
+
+    def test_urls_de_imagen_absolutas(self):
+        self.assertEqual(self.platos()[0]['imagen'], 'http://testserver/media/platos/arepa.jpg')
+        with mock.patch.object(menu, 'URL_PUBLICA_BACKEND', 'https://api.hotel.test'):
+            self.assertEqual(self.platos()[0]['imagen'], 'https://api.hotel.test/media/platos/arepa.jpg')
+        por_categoria = APIClient().get(reverse('plato-por-categoria')).json()
+        self.assertEqual(por_categoria['categorias']['Plato Principal'][0]['imagen'], 'http://testserver/media/platos/arepa.jpg')
+
+    def test_copia_con_versiones_viejas_se_reconstruye(self):
+        self.platos()
+        # Cambio invalidado por otro worker: este proceso no recibe el aviso
+        Plato.objects.filter(pk=self.plato.pk).update(nombre='Arepa reina')
+        invalidar_modelo(Plato)
+        self.assertEqual(self.platos()[0]['nombre'], 'Arepa reina')
+
+    @override_settings(CACHE_COMPARTIDA_REQUERIDA=True)
+    def test_sin_cache_compartida_no_se_guarda(self):
+        self.platos()
+        self.assertIsNone(cache.get(menu._clave('http://testserver/')))
+        Plato.objects.filter(pk=self.plato.pk).update(nombre='Arepa pelúa')
+        self.assertEqual(self.platos()[0]['nombre'], 'Arepa pelúa')
+
+
+class OperacionesMasivasTest(TestCase):
+
+    def setUp(self):
+        self.platos = [Plato.objects.create(nombre=nombre, precio=Decimal('5'), orden=i)
+                       for i, nombre in enumerate(('Arepa', 'Cachapa', 'Hallaca'))]
+        self.client = APIClient()
+        avisos = mock.patch.multiple(views, invalidar_modelo=mock.DEFAULT, notificar_reconstruccion=mock.DEFAULT)
+        self.avisos = avisos.start()
+        self.addCleanup(avisos.stop)
+
+    def post(self, accion, datos):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            respuesta = self.client.post(reverse(f'plato-{accion}'), datos, format='json')
+            # Nada se invalida antes del commit
+            self.assertFalse(self.avisos['invalidar_modelo'].called)
+        self.callbacks = callbacks
+        return respuesta
+
+    def valores(self, campo):
+        return list(Plato.objects.order_by('pk').values_list(campo, flat=True))
+
+    def assertUnAvisoPorLote(self):
+        self.avisos['invalidar_modelo'].assert_called_once_with(Plato)
+        self.avisos['notificar_reconstruccion'].assert_called_once_with()
+
+    def test_reordenar_en_un_update(self):
+        arepa, cachapa, hallaca = self.platos
+        orden = [{'id': hallaca.pk, 'orden': 0}, {'id': arepa.pk, 'orden': 2}, {'id': 9999, 'orden': 1}]
+        with self.assertNumQueries(3):  # SAVEPOINT, UPDATE ... CASE WHEN, RELEASE
+            respuesta = self.post('actualizar-orden', {'orden': orden})
+        self.assertEqual(respuesta.data['actualizados'], 2)
+        self.assertEqual(self.valores('orden'), [2, 1, 0])
+        self.assertUnAvisoPorLote()
+
+    def test_disponibilidad_mixta(self):
+        arepa, cachapa, hallaca = self.platos
+        Plato.objects.filter(pk=hallaca.pk).update(disponible=False)
+        cambios = [{'id': arepa.pk, 'disponible': False}, {'id': cachapa.pk, 'disponible': 'false'},
+                   {'id': hallaca.pk, 'disponible': 1}]
+        respuesta = self.post('disponibilidad-masiva', {'platos': cambios})
+        self.assertEqual(respuesta.data['actualizados'], 3)
+        self.assertEqual(self.valores('disponible'), [False, False, True])
+        self.assertUnAvisoPorLote()
+
+        self.avisos['invalidar_modelo'].reset_mock()
+        self.avisos['notificar_reconstruccion'].reset_mock()
+        self.post('disponibilidad-masiva', {'ids': [arepa.pk, cachapa.pk], 'disponible': True})
+        self.assertEqual(self.valores('disponible'), [True, True, True])
+        self.assertUnAvisoPorLote()
+
+    def test_datos_invalidos(self):
+        for accion, datos in (
+            ('actualizar-orden', {}),
+            ('actualizar-orden', {'orden': [{'id': 1}]}),
+            ('actualizar-orden', {'orden': [{'id': 'uno', 'orden': 0}]}),
+            ('actualizar-orden', {'orden': [{'id': i, 'orden': i} for i in range(views.MAXIMO_LOTE + 1)]}),
+            ('disponibilidad-masiva', {'ids': [1]}),
+            ('disponibilidad-masiva', {'ids': [1], 'disponible': 'quizas'}),
+            ('disponibilidad-masiva', {'platos': [{'id': 1}]}),
+            ('disponibilidad-masiva', {'ids': [], 'disponible': True}),
+            ('disponibilidad-masiva', {'ids': list(range(views.MAXIMO_LOTE + 1)), 'disponible': True}),
+        ):
+            self.assertEqual(self.post(accion, datos).status_code, 400, datos)
+        self.assertEqual(self.callbacks, [])
+        self.assertEqual(self.valores('orden'), [0, 1, 2])
+
+    def test_sin_coincidencias_no_invalida(self):
+        respuesta = self.post('disponibilidad-masiva', {'ids': [9999], 'disponible': False})
+        self.assertEqual(respuesta.data['actualizados'], 0)
+        self.assertFalse(self.avisos['notificar_reconstruccion'].called)
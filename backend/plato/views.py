@@ -2,10 +2,19 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticatedOrReadOnly # Recomendado
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
 from .models import Plato, Alergeno
+from .busqueda import buscar_platos, terminos
+from .menu import agrupar_por_categoria, notificar_reconstruccion, respuesta_menu
+from backend.cache_respuestas import cache_respuesta, get_condicional, invalidar_modelo
 from .serializers import PlatoSerializer, PlatoListSerializer, AlergenoSerializer
 
+LIMITE_AUTOCOMPLETAR = 10
+# Platos máximos por petición en las operaciones masivas
+MAXIMO_LOTE = 500
+
 
 class PlatoViewSet(viewsets.ModelViewSet):
     """
@@ -13,6 +22,9 @@ class PlatoViewSet(viewsets.ModelViewSet):
     """
     queryset = Plato.objects.all()
     serializer_class = PlatoSerializer
+    # Sin paginación por cursor: el listado sale en el orden del menú o, con
+    # ?search=, por relevancia, y el cursor lo reordenaría por su propia clave.
+    # La carta es acotada.
     # permission_classes = [IsAuthenticatedOrReadOnly] # Descomenta si usas autenticación
 
     def get_serializer_class(self):
@@ -68,41 +80,69 @@ class PlatoViewSet(viewsets.ModelViewSet):
         if precio_min:
             queryset = queryset.filter(precio__gte=precio_min)
         
-        search = self.request.query_params.get('search')
-        if search:
-            queryset = queryset.filter(
-                Q(nombre__icontains=search) |
-                Q(descripcion__icontains=search) |
-                Q(ingredientes__icontains=search)
-            )
-        
-        # Filtro por alérgenos
+        # Filtro por alérgenos (máscara de bits): ?alergenos=... platos que contienen
+        # alguno; ?sin_alergenos=gluten,frutos_secos platos que no contienen ninguno
         alergenos = self.request.query_params.get('alergenos')
         if alergenos:
-            alergenos_list = alergenos.split(',')
-            queryset = queryset.filter(alergenos__nombre__in=alergenos_list).distinct()
+            bits, otros = Plato.mascara_alergenos(alergenos.split(','))
+            filtro = Q(alergenos_buscados__gt=0)
+            if otros:
+                # Alérgenos fuera de ALERGENO_CHOICES no tienen bit: se buscan por la relación
+                filtro |= Q(alergenos__nombre__in=otros)
+            queryset = queryset.alias(alergenos_buscados=F('alergenos_mascara').bitand(bits)).filter(filtro)
+            if otros:
+                queryset = queryset.distinct()
+
+        sin_alergenos = self.request.query_params.get('sin_alergenos')
+        if sin_alergenos:
+            bits, otros = Plato.mascara_alergenos(sin_alergenos.split(','))
+            queryset = queryset.alias(alergenos_excluidos=F('alergenos_mascara').bitand(bits)).filter(alergenos_excluidos=0)
+            if otros:
+                queryset = queryset.exclude(alergenos__nombre__in=otros)
         
+        # Búsqueda de texto completo: resultados por relevancia
+        search = self.request.query_params.get('search')
+        if search:
+            return buscar_platos(queryset, search).order_by('-relevancia', 'nombre')
+
         return queryset.order_by('categoria', 'orden', 'nombre')
+
+    @get_condicional(Plato, Alergeno)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @get_condicional(Plato, Alergeno)
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
     
     # ... (El resto de tus acciones personalizadas se quedan igual: por_categoria, disponibles, etc.)
     @action(detail=False, methods=['get'])
+    @get_condicional(Plato, Alergeno)
     def por_categoria(self, request):
-        queryset = self.get_queryset()
-        platos_por_categoria = {}
-        for plato in queryset:
-            categoria = plato.get_categoria_display()
-            if categoria not in platos_por_categoria:
-                platos_por_categoria[categoria] = []
-            serializer = PlatoListSerializer(plato)
-            platos_por_categoria[categoria].append(serializer.data)
-        return Response({'categorias': platos_por_categoria, 'total_platos': queryset.count()})
+        # Sin filtros es siempre el mismo menú: se sirve el precalculado
+        if not request.query_params:
+            return respuesta_menu(request, 'por_categoria')
+        return self._por_categoria_filtrado(request)
+
+    @cache_respuesta(Plato, Alergeno)
+    def _por_categoria_filtrado(self, request):
+        return Response(agrupar_por_categoria(self.get_queryset(), self.get_serializer_context()))
     
     @action(detail=False, methods=['get'])
+    @get_condicional(Plato, Alergeno)
     def disponibles(self, request):
-        platos = Plato.objects.filter(disponible=True, activo=True)
-        serializer = self.get_serializer(platos, many=True)
-        return Response({'total': platos.count(), 'platos': serializer.data})
-    
+        return respuesta_menu(request, 'disponibles')
+
+    @action(detail=False, methods=['get'])
+    @get_condicional(Plato)
+    def autocompletar(self, request):
+        """Sugerencias por prefijo para el buscador: ?q=pol -> [{id, nombre, categoria}]"""
+        texto = request.query_params.get('q', '')
+        if not terminos(texto):
+            return Response([])
+        platos = buscar_platos(Plato.objects.filter(activo=True), texto).order_by('-relevancia', 'nombre')
+        return Response(list(platos.values('id', 'nombre', 'categoria')[:LIMITE_AUTOCOMPLETAR]))
+
     @action(detail=True, methods=['post'])
     def cambiar_disponibilidad(self, request, pk=None):
         plato = self.get_object()
@@ -114,19 +154,77 @@ class PlatoViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=['post'])
     def actualizar_orden(self, request):
-        orden_data = request.data.get('orden', [])
-        if not orden_data: return Response({'error': 'Faltan datos'}, status=status.HTTP_400_BAD_REQUEST)
-        ids = [i.get('id') for i in orden_data if i.get('id')]
-        platos = {p.id: p for p in Plato.objects.filter(id__in=ids)}
-        actualizar = []
-        for item in orden_data:
-            pid = item.get('id')
-            if pid in platos:
-                platos[pid].orden = item.get('orden')
-                actualizar.append(platos[pid])
-        if actualizar: Plato.objects.bulk_update(actualizar, ['orden'])
-        return Response({'message': 'Orden actualizado'})
+        """
+        Reordena varios platos en un solo UPDATE (CASE WHEN).
+        Body: {"orden": [{"id": 3, "orden": 0}, {"id": 7, "orden": 1}, ...]}
+        """
+        try:
+            nuevos = {int(item['id']): int(item['orden']) for item in request.data.get('orden') or []}
+        except (KeyError, TypeError, ValueError):
+            return Response({'error': 'Cada elemento debe tener "id" y "orden" enteros.'}, status=status.HTTP_400_BAD_REQUEST)
+        if not nuevos:
+            return Response({'error': 'Faltan datos'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(nuevos) > MAXIMO_LOTE:
+            return Response({'error': f'Máximo {MAXIMO_LOTE} platos por petición.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            actualizados = Plato.objects.filter(id__in=nuevos).update(
+                orden=Case(*[When(id=pid, then=Value(orden)) for pid, orden in nuevos.items()]),
+                fecha_actualizacion=timezone.now(),
+            )
+            if actualizados:
+                _notificar_cambio_masivo()
+        return Response({'message': 'Orden actualizado', 'actualizados': actualizados})
+
+    @action(detail=False, methods=['post'])
+    def disponibilidad_masiva(self, request):
+        """
+        Cambia la disponibilidad de muchos platos a la vez (máximo dos UPDATE).
+        Body: {"ids": [1, 2, 3], "disponible": false}
+           o  {"platos": [{"id": 1, "disponible": true}, {"id": 2, "disponible": false}]}
+        """
+        try:
+            if 'platos' in request.data:
+                cambios = {int(item['id']): _a_booleano(item['disponible']) for item in request.data['platos']}
+            else:
+                disponible = _a_booleano(request.data['disponible'])
+                cambios = {int(pid): disponible for pid in request.data['ids']}
+        except (KeyError, TypeError, ValueError):
+            return Response(
+                {'error': 'Envíe "ids" + "disponible" o una lista "platos" con "id" y "disponible".'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not cambios:
+            return Response({'error': 'Faltan datos'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(cambios) > MAXIMO_LOTE:
+            return Response({'error': f'Máximo {MAXIMO_LOTE} platos por petición.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        ahora = timezone.now()
+        actualizados = 0
+        with transaction.atomic():
+            for valor in (True, False):
+                ids = [pid for pid, disponible in cambios.items() if disponible is valor]
+                if ids:
+                    actualizados += Plato.objects.filter(id__in=ids).update(disponible=valor, fecha_actualizacion=ahora)
+            if actualizados:
+                _notificar_cambio_masivo()
+        return Response({'message': 'Disponibilidad actualizada', 'actualizados': actualizados})
+
+
+def _a_booleano(valor):
+    if isinstance(valor, bool):
+        return valor
+    if str(valor).lower() in ('true', '1'):
+        return True
+    if str(valor).lower() in ('false', '0'):
+        return False
+    raise ValueError(valor)
+
 
+def _notificar_cambio_masivo():
+    """update() no emite post_save: una sola invalidación y un solo aviso al menú por lote."""
+    transaction.on_commit(lambda: invalidar_modelo(Plato))
+    transaction.on_commit(notificar_reconstruccion)
 
 class AlergenoViewSet(viewsets.ReadOnlyModelViewSet):
     queryset = Alergeno.objects.all()
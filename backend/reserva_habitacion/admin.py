@@ -3,7 +3,10 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.db.models import Sum
-from .models import ReservaHabitacion
+from .models import ReservaHabitacion, NocheHabitacion
+from usuarios.models import ResumenDiario
+from usuarios.resumen import actualizar_resumen_fechas
+from backend.cache_respuestas import invalidar_modelo
 # Importar el modelo de la relación (Tabla Pivote)
 from reserva_servicio.models import ServicioReserva 
 
@@ -167,17 +170,30 @@ class ReservaHabitacionAdmin(admin.ModelAdmin):
     
     actions = ['confirmar_reservas', 'cancelar_reservas', 'completar_reservas']
     
+    def _actualizar_resumen(self, queryset):
+        # update() no dispara señales: refrescamos los días afectados del Dashboard
+        # y la caché de disponibilidad de habitaciones
+        fechas = queryset.order_by().values_list('fecha_checkin', flat=True).distinct()
+        actualizar_resumen_fechas(ResumenDiario.LINEA_HABITACION, fechas)
+        invalidar_modelo(ReservaHabitacion)
+    
     def confirmar_reservas(self, request, queryset):
         updated = queryset.filter(estado='pendiente').update(estado='confirmada')
+        self._actualizar_resumen(queryset)
         self.message_user(request, f'{updated} reservas confirmadas.')
     confirmar_reservas.short_description = 'Confirmar reservas seleccionadas'
     
     def cancelar_reservas(self, request, queryset):
         updated = queryset.exclude(estado='cancelada').update(estado='cancelada')
+        # update() no pasa por save(): liberamos las noches manualmente
+        NocheHabitacion.objects.filter(reserva__in=queryset).delete()
+        self._actualizar_resumen(queryset)
         self.message_user(request, f'{updated} reservas canceladas.')
     cancelar_reservas.short_description = 'Cancelar reservas seleccionadas'
     
     def completar_reservas(self, request, queryset):
         updated = queryset.filter(estado='confirmada').update(estado='completada')
+        NocheHabitacion.objects.filter(reserva__in=queryset, reserva__estado='completada').delete()
+        self._actualizar_resumen(queryset)
         self.message_user(request, f'{updated} reservas completadas.')
     completar_reservas.short_description = 'Completar reservas seleccionadas'
\ No newline at end of file
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ReservaHabitacionConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reserva_habitacion'
+
+    def ready(self):
+        # Invalidación de la caché de catálogo (disponibilidad de habitaciones)
+        import reserva_habitacion.signals
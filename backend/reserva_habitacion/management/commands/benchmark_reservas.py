@@ -0,0 +1,233 @@
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from habitacion.models import Habitacion
+from reserva_habitacion.models import ReservaHabitacion, NocheHabitacion
+from reserva_restaurante.disponibilidad import DURACION, reservas_que_ocupan
+from reserva_restaurante.models import ReservaRestaurante
+from restaurante_mesa.models import RestauranteMesa
+from reserva_salon.models import ReservaSalon
+from salon_eventos.models import SalonEvento
+
+ESTADOS_ACTIVOS = ['pendiente', 'confirmada']
+LOTE = 2000
+
+
+class Command(BaseCommand):
+    help = (
+        'Siembra un volumen grande de reservas y muestra el plan (EXPLAIN) y la '
+        'latencia de las consultas de solapamiento más usadas. '
+        'Por defecto todo se revierte al terminar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--habitaciones', type=int, default=200)
+        parser.add_argument('--reservas', type=int, default=100000,
+                            help='Reservas de habitación a sembrar (salón y restaurante usan la mitad).')
+        parser.add_argument('--repeticiones', type=int, default=200)
+        parser.add_argument('--analyze', action='store_true',
+                            help='EXPLAIN ANALYZE (solo PostgreSQL).')
+        parser.add_argument('--conservar', action='store_true',
+                            help='No revertir los datos sembrados.')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(42)
+        self.stdout.write(f'Motor: {connection.vendor}')
+
+        with transaction.atomic():
+            inicio = time.perf_counter()
+            self.sembrar(options['habitaciones'], options['reservas'])
+            self.stdout.write(f'Siembra completada en {time.perf_counter() - inicio:.1f}s\n')
+
+            for nombre, consulta in self.consultas():
+                self.medir(nombre, consulta, options['repeticiones'], options['analyze'])
+
+            if not options['conservar']:
+                transaction.set_rollback(True)
+                self.stdout.write(self.style.WARNING('Datos sembrados revertidos.'))
+
+    # =========================================================
+    # SIEMBRA
+    # =========================================================
+
+    def sembrar(self, total_habitaciones, total_reservas):
+        rng = self.rng
+        self.usuario, _ = User.objects.get_or_create(username='benchmark_reservas')
+        self.hoy = date.today()
+
+        self.habitaciones = Habitacion.objects.bulk_create([
+            Habitacion(numero_habitacion=f'B{i}', condicion=Habitacion.CONDICION_BASICA)
+            for i in range(total_habitaciones)
+        ])
+        self.salones = SalonEvento.objects.bulk_create([
+            SalonEvento(nombre=f'Salón benchmark {i}', montaje_minutos=60, desmontaje_minutos=30) for i in range(10)
+        ])
+        self.mesas = RestauranteMesa.objects.bulk_create([
+            RestauranteMesa(numero_mesa=f'B{i}', capacidad=4) for i in range(30)
+        ])
+
+        # Habitaciones: estancias consecutivas por habitación (sin solapes activos)
+        por_habitacion = max(1, total_reservas // total_habitaciones)
+        desde = self.hoy - timedelta(days=por_habitacion * 4)
+        reservas = []
+        for habitacion in self.habitaciones:
+            fecha = desde
+            for _ in range(por_habitacion):
+                fecha += timedelta(days=rng.randint(0, 2))
+                noches = rng.randint(1, 5)
+                reservas.append(ReservaHabitacion(
+                    usuario=self.usuario,
+                    habitacion=habitacion,
+                    fecha_checkin=fecha,
+                    fecha_checkout=fecha + timedelta(days=noches),
+                    estado=rng.choice(['confirmada', 'confirmada', 'completada', 'cancelada', 'pendiente']),
+                    codigo_confirmacion=f'BENCH-{len(reservas)}',
+                ))
+                fecha += timedelta(days=noches)
+        reservas = ReservaHabitacion.objects.bulk_create(reservas, batch_size=LOTE)
+
+        NocheHabitacion.objects.bulk_create([
+            NocheHabitacion(reserva=r, habitacion_id=r.habitacion_id, fecha=r.fecha_checkin + timedelta(days=i))
+            for r in reservas if r.estado in ESTADOS_ACTIVOS
+            for i in range((r.fecha_checkout - r.fecha_checkin).days)
+        ], batch_size=LOTE)
+
+        # Salones y restaurante: fechas aleatorias en los últimos/próximos 2 años
+        ahora = timezone.now()
+        total_otros = total_reservas // 2
+        eventos = []
+        for i in range(total_otros):
+            # bulk_create no pasa por save(): se calculan fin y bloqueo aquí
+            salon = rng.choice(self.salones)
+            inicio = ahora + timedelta(hours=rng.randint(-17520, 17520))
+            fin = inicio + timedelta(hours=rng.randint(2, 8))
+            bloqueo_inicio, bloqueo_fin = salon.intervalo_bloqueo(inicio, fin)
+            eventos.append(ReservaSalon(
+                usuario=self.usuario,
+                salon=salon,
+                fecha_evento=inicio,
+                fecha_fin=fin,
+                bloqueo_inicio=bloqueo_inicio,
+                bloqueo_fin=bloqueo_fin,
+                cantidad_invitados=rng.randint(10, 200),
+                estado=rng.choice(['pendiente', 'confirmada', 'cancelada']),
+                codigo_evento=f'BEV-{i}',
+            ))
+        eventos = ReservaSalon.objects.bulk_create(eventos, batch_size=LOTE)
+        # Muestra de (salón, fecha) existentes para consultar casos con coincidencia
+        self.eventos = [(e.salon, e.fecha_evento) for e in eventos[:1000]]
+        ReservaRestaurante.objects.bulk_create([
+            ReservaRestaurante(
+                usuario=self.usuario,
+                mesa=rng.choice(self.mesas),
+                fecha_reserva=ahora + timedelta(minutes=30 * rng.randint(-35040, 35040)),
+                cantidad_personas=rng.randint(1, 4),
+                estado=rng.choice(['pendiente', 'confirmada', 'cancelada']),
+                codigo_reserva=f'BRE-{i}',
+            )
+            for i in range(total_otros)
+        ], batch_size=LOTE)
+
+        # Estadísticas actualizadas para que el planificador elija índices como en producción
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        self.stdout.write(
+            f'Sembrado: {len(reservas)} reservas de habitación, '
+            f'{NocheHabitacion.objects.count()} noches, '
+            f'{total_otros} reservas de salón y {total_otros} de restaurante.'
+        )
+
+    # =========================================================
+    # CONSULTAS CALIENTES
+    # =========================================================
+
+    def rango_aleatorio(self):
+        checkin = self.hoy + timedelta(days=self.rng.randint(-60, 60))
+        return checkin, checkin + timedelta(days=self.rng.randint(1, 7))
+
+    def consultas(self):
+        """(nombre, función que devuelve un QuerySet con parámetros aleatorios)"""
+
+        def solapamiento_habitacion():
+            checkin, checkout = self.rango_aleatorio()
+            return ReservaHabitacion.reservas_superpuestas(checkin, checkout).filter(
+                habitacion_id=self.rng.choice(self.habitaciones).pk
+            )
+
+        def noches_ocupadas():
+            checkin, checkout = self.rango_aleatorio()
+            return NocheHabitacion.objects.filter(
+                habitacion_id=self.rng.choice(self.habitaciones).pk,
+                fecha__gte=checkin,
+                fecha__lt=checkout,
+            )
+
+        def habitaciones_disponibles():
+            checkin, checkout = self.rango_aleatorio()
+            conflictos = ReservaHabitacion.reservas_superpuestas(checkin, checkout).filter(
+                habitacion=OuterRef('pk')
+            )
+            return Habitacion.objects.filter(activa=True).filter(~Exists(conflictos))
+
+        def salon_ocupado():
+            salon, fecha_evento = self.rng.choice(self.eventos)
+            return ReservaSalon.reservas_superpuestas(salon, fecha_evento, fecha_evento + timedelta(hours=6))
+
+        def calendario_salones():
+            desde = timezone.now() + timedelta(days=self.rng.randint(-60, 60))
+            return ReservaSalon.objects.filter(
+                estado__in=ESTADOS_ACTIVOS,
+                bloqueo_fin__gt=desde,
+                bloqueo_inicio__lt=desde + timedelta(days=7),
+            ).select_related('salon', 'usuario')
+
+        def mesa_ocupada():
+            # La misma consulta que mesa_libre (serializer de reservas de mesa)
+            inicio = timezone.now() + timedelta(minutes=30 * self.rng.randint(-35040, 35040))
+            return reservas_que_ocupan(inicio, inicio + DURACION, mesas=[self.rng.choice(self.mesas).pk])
+
+        return [
+            ('Solapamiento reserva_habitacion (serializer / pre-reserva)', solapamiento_habitacion),
+            ('Noches ocupadas (NocheHabitacion.hay_conflicto)', noches_ocupadas),
+            ('Habitaciones disponibles (NOT EXISTS)', habitaciones_disponibles),
+            ('Salón ocupado (solicitar_codigo_salon)', salon_ocupado),
+            ('Calendario de salones (7 días)', calendario_salones),
+            (f'Mesa ocupada (bloqueo de {int(DURACION.total_seconds() // 60)} minutos)', mesa_ocupada),
+        ]
+
+    # =========================================================
+    # MEDICIÓN
+    # =========================================================
+
+    def medir(self, nombre, consulta, repeticiones, analyze):
+        self.stdout.write(self.style.MIGRATE_HEADING(nombre))
+
+        opciones = {'analyze': True} if analyze and connection.vendor == 'postgresql' else {}
+        self.stdout.write(consulta().explain(**opciones))
+
+        tiempos = []
+        for _ in range(repeticiones):
+            queryset = consulta()
+            inicio = time.perf_counter()
+            # Las comprobaciones de conflicto usan exists(); el listado se evalúa entero
+            if queryset.model is Habitacion:
+                list(queryset.values_list('pk', flat=True))
+            else:
+                queryset.exists()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+
+        tiempos.sort()
+        p95 = tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))]
+        self.stdout.write(
+            f'  mediana {statistics.median(tiempos):.3f} ms | p95 {p95:.3f} ms | '
+            f'máx {tiempos[-1]:.3f} ms ({repeticiones} repeticiones)\n'
+        )
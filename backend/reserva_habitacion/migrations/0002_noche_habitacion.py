@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:38
+
+import django.db.models.deletion
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def poblar_noches(apps, schema_editor):
+    """
+    Genera el inventario de noches para las reservas activas existentes.
+
+    Si ya había reservas activas solapadas la migración se detiene y las
+    lista: con ignore_conflicts la más nueva perdería noches en silencio y
+    fallaría con IntegrityError al volver a guardarse. Hay que cancelar o
+    mover las sobrantes y volver a migrar.
+    """
+    ReservaHabitacion = apps.get_model('reserva_habitacion', 'ReservaHabitacion')
+    NocheHabitacion = apps.get_model('reserva_habitacion', 'NocheHabitacion')
+
+    reservas = ReservaHabitacion.objects.filter(
+        estado__in=['pendiente', 'confirmada'],
+        habitacion__isnull=False,
+        fecha_checkin__isnull=False,
+        fecha_checkout__isnull=False,
+    ).order_by('fecha_creacion', 'id')
+
+    ocupadas = {}   # (habitacion_id, fecha) -> codigo de la reserva que la ocupa
+    conflictos = []
+    noches = []
+    for reserva in reservas.iterator():
+        dias = (reserva.fecha_checkout - reserva.fecha_checkin).days
+        for i in range(dias):
+            clave = (reserva.habitacion_id, reserva.fecha_checkin + timedelta(days=i))
+            if clave in ocupadas:
+                conflictos.append((reserva.codigo_confirmacion, ocupadas[clave], *clave))
+                continue
+            ocupadas[clave] = reserva.codigo_confirmacion
+            noches.append(NocheHabitacion(reserva_id=reserva.id, habitacion_id=clave[0], fecha=clave[1]))
+
+    if conflictos:
+        detalle = '\n'.join(
+            f'  reserva {codigo} choca con {otra}: habitación {habitacion_id}, noche {fecha}'
+            for codigo, otra, habitacion_id, fecha in conflictos[:50]
+        )
+        raise RuntimeError(
+            f'Hay {len(conflictos)} noches reservadas dos veces entre reservas activas. '
+            f'Cancela o mueve las reservas repetidas y vuelve a ejecutar migrate:\n{detalle}'
+        )
+
+    NocheHabitacion.objects.bulk_create(noches, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habitacion', '0001_initial'),
+        ('reserva_habitacion', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NocheHabitacion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Noche')),
+                ('habitacion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='noches_ocupadas', to='habitacion.habitacion', verbose_name='Habitación')),
+                ('reserva', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='noches', to='reserva_habitacion.reservahabitacion', verbose_name='Reserva')),
+            ],
+            options={
+                'verbose_name': 'Noche Ocupada',
+                'verbose_name_plural': 'Noches Ocupadas',
+                'db_table': 'noche_habitacion',
+                'ordering': ['habitacion', 'fecha'],
+                'constraints': [models.UniqueConstraint(fields=('habitacion', 'fecha'), name='unique_noche_habitacion')],
+            },
+        ),
+        migrations.RunPython(poblar_noches, migrations.RunPython.noop),
+    ]
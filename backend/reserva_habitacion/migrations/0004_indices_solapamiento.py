@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habitacion', '0001_initial'),
+        ('reserva_habitacion', '0003_indice_fecha_creacion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservahabitacion',
+            index=models.Index(fields=['habitacion', 'fecha_checkout', 'fecha_checkin', 'estado'], name='reserva_hab_solape_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('habitacion', '0002_imagen_variantes'),
+        ('reserva_habitacion', '0004_indices_solapamiento'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservahabitacion',
+            index=models.Index(fields=['fecha_checkin'], name='reserva_hab_checkin_idx'),
+        ),
+    ]
@@ -1,8 +1,9 @@
 # reserva_habitacion/models.py
 
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User 
 from habitacion.models import Habitacion
+from tarifa_dinamica.precios import calcular_total_estancia
 from decimal import Decimal
 import uuid 
 import random
@@ -24,6 +25,9 @@ class ReservaHabitacion(models.Model):
         (ESTADO_COMPLETADA, 'Completada (Check-Out)'),
     ]
 
+    # Estados que bloquean la habitación para otras reservas
+    ESTADOS_ACTIVOS = [ESTADO_PENDIENTE, ESTADO_CONFIRMADA]
+
     usuario = models.ForeignKey(
         User, 
         on_delete=models.CASCADE, 
@@ -94,11 +98,37 @@ class ReservaHabitacion(models.Model):
         verbose_name = 'Reserva de Habitación'
         verbose_name_plural = 'Reservas de Habitaciones'
         ordering = ['-fecha_creacion']
+        indexes = [
+            # Orden por defecto (admin y listados sin paginar): -fecha_creacion, -id.
+            # La paginación por cursor usa -id: fecha_creacion admite NULL.
+            models.Index(fields=['fecha_creacion', 'id'], name='reserva_hab_creacion_idx'),
+            # Recálculo del resumen diario por rango [día, día + 1) (usuarios/resumen.py)
+            models.Index(fields=['fecha_checkin'], name='reserva_hab_checkin_idx'),
+            # Consulta de solapamiento (reservas_superpuestas). fecha_checkout va
+            # primero: "checkout > checkin pedido" descarta todo el historial
+            # pasado; el estado se filtra dentro del propio índice.
+            models.Index(
+                fields=['habitacion', 'fecha_checkout', 'fecha_checkin', 'estado'],
+                name='reserva_hab_solape_idx',
+            ),
+        ]
         
     def __str__(self):
         usuario_str = self.usuario.username if self.usuario else "Sin Usuario"
         return f'Reserva #{self.codigo_confirmacion} - {usuario_str}'
 
+    @classmethod
+    def reservas_superpuestas(cls, fecha_checkin, fecha_checkout):
+        """
+        Reservas activas cuyo rango se solapa con [fecha_checkin, fecha_checkout).
+        Lógica de solapamiento: (StartA < EndB) y (EndA > StartB)
+        """
+        return cls.objects.filter(
+            estado__in=cls.ESTADOS_ACTIVOS,
+            fecha_checkin__lt=fecha_checkout,
+            fecha_checkout__gt=fecha_checkin
+        )
+
     def generar_otp(self):
         """Genera un código OTP de 6 dígitos y establece su expiración"""
         self.codigo_otp = ''.join(random.choices(string.digits, k=6))
@@ -131,21 +161,113 @@ class ReservaHabitacion(models.Model):
         if not self.codigo_confirmacion:
             self.codigo_confirmacion = str(uuid.uuid4()).split('-')[0].upper()
 
-        # 2. Lógica de cálculo del total
+        # 2. Lógica de cálculo del total (tarifas dinámicas o precio_base por noche)
         if self.fecha_checkin and self.fecha_checkout and self.habitacion:
-            diferencia = self.fecha_checkout - self.fecha_checkin
-            dias = diferencia.days
-            
-            if dias > 0:
-                # Obtención del precio_base desde el modelo Habitacion
-                precio_noche = getattr(self.habitacion, 'precio_base', Decimal('0.00'))
-                
-                if precio_noche is None:
-                    precio_noche = Decimal('0.00')
-                
-                # Cálculo final: Precio x Noches
-                self.total = Decimal(str(precio_noche)) * Decimal(dias)
-            else:
-                self.total = Decimal('0.00')
-
-        super(ReservaHabitacion, self).save(*args, **kwargs)
\ No newline at end of file
+            self.total = calcular_total_estancia(
+                self.habitacion, self.fecha_checkin, self.fecha_checkout
+            )
+
+        # 3. Guardar y sincronizar el inventario de noches en la misma transacción.
+        # Si alguna noche ya está ocupada, la restricción única de NocheHabitacion
+        # lanza IntegrityError y la reserva completa se revierte.
+        with transaction.atomic():
+            super(ReservaHabitacion, self).save(*args, **kwargs)
+            if self._noches_cambiaron(kwargs.get('update_fields')):
+                self.sincronizar_noches()
+        self._estado_noches = self._datos_noches()
+
+    # Campos de los que dependen las filas de NocheHabitacion
+    CAMPOS_NOCHES = ('habitacion', 'habitacion_id', 'fecha_checkin', 'fecha_checkout', 'estado')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instancia = super().from_db(db, field_names, values)
+        instancia._estado_noches = instancia._datos_noches()
+        return instancia
+
+    def _datos_noches(self):
+        # Desde __dict__: un campo diferido (.only()) no dispara otra consulta
+        return tuple(self.__dict__.get(campo) for campo in ('habitacion_id', 'fecha_checkin', 'fecha_checkout', 'estado'))
+
+    def _noches_cambiaron(self, update_fields=None):
+        """
+        False si el guardado no toca las noches (p. ej. solo el OTP): un
+        update_fields sin esos campos o los mismos valores con que se cargó.
+        """
+        if update_fields is not None and not set(update_fields) & set(self.CAMPOS_NOCHES):
+            return False
+        return getattr(self, '_estado_noches', None) != self._datos_noches()
+
+    def sincronizar_noches(self):
+        """
+        Regenera las filas de NocheHabitacion de esta reserva: una por cada
+        noche ocupada mientras la reserva esté activa, ninguna en otro caso.
+        """
+        self.noches.all().delete()
+
+        if (self.estado not in self.ESTADOS_ACTIVOS
+                or not self.habitacion_id
+                or not self.fecha_checkin
+                or not self.fecha_checkout):
+            return
+
+        dias = (self.fecha_checkout - self.fecha_checkin).days
+        NocheHabitacion.objects.bulk_create([
+            NocheHabitacion(
+                reserva=self,
+                habitacion_id=self.habitacion_id,
+                fecha=self.fecha_checkin + timedelta(days=i)
+            )
+            for i in range(dias)
+        ])
+
+
+class NocheHabitacion(models.Model):
+    """
+    Inventario materializado de noches ocupadas (una fila por habitación y noche).
+
+    La restricción única (habitacion, fecha) impide a nivel de base de datos
+    que dos reservas activas ocupen la misma habitación la misma noche, sin
+    necesidad de bloquear tablas. Se mantiene desde ReservaHabitacion.save().
+    """
+
+    reserva = models.ForeignKey(
+        ReservaHabitacion,
+        on_delete=models.CASCADE,
+        related_name='noches',
+        verbose_name='Reserva'
+    )
+    habitacion = models.ForeignKey(
+        Habitacion,
+        on_delete=models.CASCADE,
+        related_name='noches_ocupadas',
+        verbose_name='Habitación'
+    )
+    fecha = models.DateField(verbose_name='Noche')
+
+    class Meta:
+        db_table = 'noche_habitacion'
+        verbose_name = 'Noche Ocupada'
+        verbose_name_plural = 'Noches Ocupadas'
+        ordering = ['habitacion', 'fecha']
+        constraints = [
+            models.UniqueConstraint(fields=['habitacion', 'fecha'], name='unique_noche_habitacion')
+        ]
+
+    def __str__(self):
+        return f'Habitación {self.habitacion_id} - {self.fecha}'
+
+    @classmethod
+    def hay_conflicto(cls, habitacion_id, fecha_checkin, fecha_checkout, excluir_reserva=None):
+        """
+        Indica si alguna noche de [fecha_checkin, fecha_checkout) ya está ocupada.
+        Búsqueda sobre el índice único (habitacion, fecha).
+        """
+        noches = cls.objects.filter(
+            habitacion_id=habitacion_id,
+            fecha__gte=fecha_checkin,
+            fecha__lt=fecha_checkout
+        )
+        if excluir_reserva is not None:
+            noches = noches.exclude(reserva=excluir_reserva)
+        return noches.exists()
\ No newline at end of file
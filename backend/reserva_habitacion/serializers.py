@@ -1,9 +1,10 @@
 # reserva_habitacion/serializers.py
 
 from rest_framework import serializers
-from .models import ReservaHabitacion
+from .models import ReservaHabitacion, NocheHabitacion
 from habitacion.models import Habitacion 
 from django.utils import timezone 
+from django.db import IntegrityError
 from django.db.models import Q 
 
 class ReservaHabitacionSerializer(serializers.ModelSerializer):
@@ -59,29 +60,34 @@ class ReservaHabitacionSerializer(serializers.ModelSerializer):
         # =========================================================
         # 3. VALIDACIÓN DE DISPONIBILIDAD (Superposición de fechas)
         # =========================================================
-        superpuestas = ReservaHabitacion.objects.filter(
-            habitacion=habitacion,
-            fecha_checkin__lt=fecha_checkout, 
-            fecha_checkout__gt=fecha_checkin,
-            # Solo se consideran conflictos reservas que no estén canceladas
-            estado__in=[ReservaHabitacion.ESTADO_PENDIENTE, ReservaHabitacion.ESTADO_CONFIRMADA] 
-        )
-        
-        # Si estamos editando una reserva, excluimos la reserva actual de la búsqueda de conflictos
-        if self.instance: 
-            superpuestas = superpuestas.exclude(pk=self.instance.pk)
-
-        if superpuestas.exists():
+        # Consulta puntual sobre el inventario de noches (solo reservas activas).
+        # Si estamos editando una reserva, excluimos sus propias noches.
+        if NocheHabitacion.hay_conflicto(
+            habitacion.pk, fecha_checkin, fecha_checkout, excluir_reserva=self.instance
+        ):
             raise serializers.ValidationError({
                 'habitacion': f'Habitación {habitacion.numero_habitacion} no disponible en ese rango de fechas (ya existe una reserva activa).'
             })
 
-        if superpuestas.exists():
+        return data
+
+    def create(self, validated_data):
+        # Dos solicitudes concurrentes pueden pasar validate(); la restricción
+        # única de NocheHabitacion decide cuál se guarda.
+        try:
+            return super().create(validated_data)
+        except IntegrityError:
             raise serializers.ValidationError({
-                'habitacion': f'Habitación {habitacion.numero_habitacion} no disponible en ese rango de fechas (ya existe una reserva activa).'
+                'habitacion': 'Habitación no disponible en ese rango de fechas (ya existe una reserva activa).'
             })
 
-        return data
+    def update(self, instance, validated_data):
+        try:
+            return super().update(instance, validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError({
+                'habitacion': 'Habitación no disponible en ese rango de fechas (ya existe una reserva activa).'
+            })
 
     def to_representation(self, instance):
         """
@@ -0,0 +1,7 @@
+# reserva_habitacion/signals.py
+
+from backend.cache_respuestas import conectar_invalidacion
+from .models import ReservaHabitacion
+
+# La disponibilidad del catálogo de habitaciones depende de las reservas
+conectar_invalidacion(ReservaHabitacion)
@@ -0,0 +1,111 @@
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from habitacion.models import Habitacion
+from usuarios.otp import OTP_RESERVA_HABITACION, emitir_codigo, sujeto_usuario
+from .models import ReservaHabitacion, NocheHabitacion
+
+
+class NochesHabitacionTest(TestCase):
+
+    def setUp(self):
+        self.habitacion = Habitacion.objects.create(numero_habitacion='N1')
+        self.reserva = ReservaHabitacion.objects.create(
+            habitacion=self.habitacion,
+            fecha_checkin=date(2030, 1, 10),
+            fecha_checkout=date(2030, 1, 13),
+        )
+
+    def noches(self):
+        return list(self.reserva.noches.order_by('fecha').values_list('fecha', flat=True))
+
+    def test_guardado_sin_cambios_no_regenera_noches(self):
+        ids = set(self.reserva.noches.values_list('id', flat=True))
+        self.assertEqual(len(ids), 3)
+
+        reserva = ReservaHabitacion.objects.get(pk=self.reserva.pk)
+        reserva.huespedes = 2
+        reserva.save()
+        reserva.save(update_fields=['huespedes'])
+        self.assertEqual(set(reserva.noches.values_list('id', flat=True)), ids)
+
+    def test_cambio_de_fechas_o_estado_sincroniza(self):
+        reserva = ReservaHabitacion.objects.get(pk=self.reserva.pk)
+        reserva.fecha_checkout = date(2030, 1, 11)
+        reserva.save()
+        self.assertEqual(self.noches(), [date(2030, 1, 10)])
+
+        reserva.estado = ReservaHabitacion.ESTADO_CANCELADA
+        reserva.save(update_fields=['estado'])
+        self.assertEqual(self.noches(), [])
+
+    def test_conflicto_de_noches(self):
+        self.assertTrue(NocheHabitacion.hay_conflicto(
+            self.habitacion.pk, date(2030, 1, 12), date(2030, 1, 12) + timedelta(days=2)
+        ))
+        self.assertFalse(NocheHabitacion.hay_conflicto(
+            self.habitacion.pk, date(2030, 1, 13), date(2030, 1, 15)
+        ))
+
+
+class CrearReservaConCodigoTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = User.objects.create_user('huesped', 'huesped@test.com', 'x')
+        self.habitacion = Habitacion.objects.create(numero_habitacion='C1')
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+        _, self.codigo = emitir_codigo(OTP_RESERVA_HABITACION, sujeto_usuario(self.usuario))
+
+    def crear(self, checkin, checkout, codigo=None):
+        return self.client.post(reverse('reserva-habitacion-list'), {
+            'habitacion': self.habitacion.pk,
+            'fecha_checkin': checkin.isoformat(),
+            'fecha_checkout': checkout.isoformat(),
+            'codigo_verificacion': codigo or self.codigo,
+        }, format='json')
+
+    def test_solicitud_invalida_no_gasta_el_codigo(self):
+        hoy = timezone.localdate()
+        respuesta = self.crear(hoy + timedelta(days=5), hoy + timedelta(days=3))
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertIn('fecha_checkout', respuesta.data)
+
+        respuesta = self.crear(hoy + timedelta(days=3), hoy + timedelta(days=5))
+        self.assertEqual(respuesta.status_code, 201)
+
+        # Ya usado
+        respuesta = self.crear(hoy + timedelta(days=10), hoy + timedelta(days=11))
+        self.assertEqual(respuesta.status_code, 400)
+
+
+class PaginacionReservasTest(TestCase):
+
+    def test_cursor_incluye_filas_sin_fecha_creacion(self):
+        usuario = User.objects.create_user('listado', 'listado@test.com', 'x')
+        ids = []
+        for i in range(5):
+            habitacion = Habitacion.objects.create(numero_habitacion=f'P{i}')
+            ids.append(ReservaHabitacion.objects.create(
+                usuario=usuario, habitacion=habitacion,
+                fecha_checkin=date(2030, 4, 1), fecha_checkout=date(2030, 4, 2),
+            ).pk)
+        # Filas antiguas, anteriores a la columna
+        ReservaHabitacion.objects.filter(pk__in=ids[1:3]).update(fecha_creacion=None)
+
+        client = APIClient()
+        client.force_authenticate(usuario)
+        vistos = []
+        url = reverse('reserva-habitacion-list') + '?page_size=2'
+        while url:
+            pagina = client.get(url).data
+            vistos += [fila['id'] for fila in pagina['results']]
+            url = pagina['next']
+        self.assertEqual(vistos, sorted(ids, reverse=True))
@@ -1,14 +1,16 @@
-import random
-import os
-import requests
 from rest_framework import viewsets, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.db.models import Q 
-from django.contrib.sessions.backends.db import SessionStore 
-from .models import ReservaHabitacion
+from .models import ReservaHabitacion, NocheHabitacion
 from .serializers import ReservaHabitacionSerializer
 from usuarios.permissions import IsAdministrador, IsRecepcionista, IsOwnerOrAdmin
+from usuarios.paginacion import CursorPaginacion
+from usuarios.correo import encolar_correo, emailjs_configurado
+from usuarios.otp import (
+    OTP_RESERVA_HABITACION, OTP_VALIDO, OTP_EXPIRADO, OTP_BLOQUEADO,
+    emitir_codigo, verificar_codigo, invalidar_codigo, sujeto_usuario
+)
 
 # --- 1. SOLICITAR CÓDIGO (Con Validación Previa) ---
 @api_view(['POST'])
@@ -23,75 +25,41 @@ def solicitar_codigo_pre_reserva(request):
     checkout = request.data.get('checkout')
 
     if habitacion_id and checkin and checkout:
-        # Buscamos conflictos de fechas en reservas activas
-        reservas_conflictivas = ReservaHabitacion.objects.filter(
-            habitacion_id=habitacion_id,
-            estado__in=['pendiente', 'confirmada', 'checkin'] # Estados que ocupan la habitación
-        ).filter(
-            # Lógica de solapamiento: (StartA < EndB) y (EndA > StartB)
-            Q(fecha_checkin__lt=checkout) & Q(fecha_checkout__gt=checkin)
-        )
+        # Consulta puntual sobre el inventario de noches ocupadas
+        reservas_conflictivas = NocheHabitacion.hay_conflicto(habitacion_id, checkin, checkout)
 
-        if reservas_conflictivas.exists():
+        if reservas_conflictivas:
             return Response(
                 {"error": "Lo sentimos, esta habitación ya está reservada para las fechas seleccionadas."},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
     # --- B. GENERACIÓN DE CÓDIGO (Solo si está libre) ---
-    codigo = str(random.randint(100000, 999999))
-    
-    request.session['reserva_otp'] = codigo
-    request.session.modified = True
-    request.session.save()
+    # Se guarda en caché con TTL (sin tocar la tabla de sesiones)
+    sujeto, codigo = emitir_codigo(OTP_RESERVA_HABITACION, sujeto_usuario(user))
     
     # DEBUG Logs
     print(f"\n🚀 [SOLICITUD EMAILJS] Usuario: {user.username}")
     print(f"📧 Enviando a: {user.email}")
     print(f"📢 Código generado: {codigo}")
     
-    # --- C. ENVÍO EMAILJS ---
-    service_id = os.environ.get("EMAILJS_SERVICE_ID")
-    template_id = os.environ.get("EMAILJS_TEMPLATE_ID")
-    user_id = os.environ.get("EMAILJS_USER_ID")        # Public Key
-    private_key = os.environ.get("EMAILJS_PRIVATE_KEY") # Private Key
-
-    url = "https://api.emailjs.com/api/v1.0/email/send"
-
-    payload = {
-        "service_id": service_id,
-        "template_id": template_id,
-        "user_id": user_id,
-        "accessToken": private_key,
-        "template_params": {
-            "to_name": user.first_name,
-            "to_email": user.email,
-            "message": codigo,
-            "reply_to": "no-reply@hotelindigo.com"
-        }
-    }
-    
-    headers = { "Content-Type": "application/json" }
-
+    # --- C. ENVÍO (bandeja de salida, sin llamadas de red en la petición) ---
     try:
-        if not all([service_id, template_id, user_id, private_key]):
+        encolar_correo(user.email, codigo, nombre=user.first_name)
+
+        if not emailjs_configurado():
             # MODO FALLBACK SI NO HAY VARIABLES (Para desarrollo)
             print("⚠️ Faltan variables de entorno. Usando modo simulación.")
             return Response({
                 'message': 'Modo simulación: Código generado.',
                 'debug_code': codigo, # Solo para pruebas
-                'session_key_manual': request.session.session_key 
+                'session_key_manual': sujeto 
             })
 
-        response = requests.post(url, json=payload, headers=headers)
-        
-        if response.status_code == 200:
-            return Response({
-                'message': 'Código enviado exitosamente vía EmailJS.',
-                'session_key_manual': request.session.session_key 
-            })
-        else:
-            raise Exception(f"API Error: {response.status_code} - {response.text}")
+        return Response({
+            'message': 'Código enviado exitosamente vía EmailJS.',
+            'session_key_manual': sujeto 
+        })
         
     except Exception as e:
         print(f"❌ Error crítico en envío: {str(e)}")
@@ -99,7 +67,7 @@ def solicitar_codigo_pre_reserva(request):
         return Response({
             'message': 'Error de envío, usa este código de prueba.',
             'debug_code': codigo,
-            'session_key_manual': request.session.session_key,
+            'session_key_manual': sujeto,
             'error_info': str(e)
         }, status=status.HTTP_200_OK)
 
@@ -108,6 +76,9 @@ def solicitar_codigo_pre_reserva(request):
 class ReservaHabitacionViewSet(viewsets.ModelViewSet):
     queryset = ReservaHabitacion.objects.all().select_related('usuario', 'habitacion')
     serializer_class = ReservaHabitacionSerializer
+    pagination_class = CursorPaginacion
+    # fecha_creacion admite NULL (filas antiguas): el cursor las saltaría
+    orden_paginacion = '-id'
 
     def get_queryset(self):
         user = self.request.user
@@ -127,52 +98,30 @@ class ReservaHabitacionViewSet(viewsets.ModelViewSet):
 
     def create(self, request, *args, **kwargs):
         codigo_ingresado = request.data.get('codigo_verificacion')
-        habitacion_id = request.data.get('habitacion')
-        fecha_checkin = request.data.get('fecha_checkin')
-        fecha_checkout = request.data.get('fecha_checkout')
-        
-        codigo_real = request.session.get('reserva_otp')
-        manual_key = request.data.get('session_key_manual')
-
-        # Recuperación manual
-        if not codigo_real and manual_key:
-            try:
-                s = SessionStore(session_key=manual_key)
-                codigo_real = s.get('reserva_otp')
-            except Exception as e:
-                print(f"Error recuperando sesión manual: {e}")
-
-        # Validaciones OTP
-        if not codigo_real:
+
+        # Primero los datos (incluye la disponibilidad de las noches): una
+        # solicitud inválida no debe gastar el código del usuario
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # Validaciones OTP (el código está ligado al usuario autenticado)
+        resultado, _ = verificar_codigo(
+            OTP_RESERVA_HABITACION, sujeto_usuario(request.user), codigo_ingresado, consumir=False
+        )
+        if resultado in (OTP_EXPIRADO, OTP_BLOQUEADO):
             return Response({"detail": "Código expirado. Solicítalo de nuevo."}, status=status.HTTP_400_BAD_REQUEST)
             
-        if str(codigo_ingresado) != str(codigo_real):
+        if resultado != OTP_VALIDO:
             return Response({"detail": "Código incorrecto."}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Validación Final de Disponibilidad (Doble check de seguridad)
-        reservas_existentes = ReservaHabitacion.objects.filter(
-            habitacion_id=habitacion_id,
-            estado__in=['pendiente', 'confirmada', 'checkin'],
-            fecha_checkin__lt=fecha_checkout,
-            fecha_checkout__gt=fecha_checkin
-        )
+        # La restricción única de NocheHabitacion cubre las solicitudes concurrentes
+        self.perform_create(serializer)
 
-        if reservas_existentes.exists():
-            return Response({"detail": "Habitación ocupada."}, status=status.HTTP_400_BAD_REQUEST)
+        # Limpieza del código usado, solo con la reserva ya guardada
+        invalidar_codigo(OTP_RESERVA_HABITACION, sujeto_usuario(request.user))
 
-        # Limpieza Sesión
-        try:
-            del request.session['reserva_otp']
-        except KeyError: pass
-            
-        if manual_key:
-             s = SessionStore(session_key=manual_key)
-             if s.exists(manual_key):
-                 if 'reserva_otp' in s: del s['reserva_otp']
-                 s.save()
-
-        request.session.modified = True
-        return super().create(request, *args, **kwargs)
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
     def perform_create(self, serializer):
         serializer.save(usuario=self.request.user)
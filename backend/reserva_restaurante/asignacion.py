@@ -0,0 +1,354 @@
+# reserva_restaurante/asignacion.py
+
+"""
+Asignación automática de mesas para un servicio del restaurante.
+
+Objetivo: sentar el máximo de comensales respetando `capacidad` y los
+horarios (cada reserva ocupa su mesa DURACION). Heurística:
+
+1. Best-fit decreasing: las reservas se ordenan de mayor a menor grupo y
+   cada una toma la mesa libre más ajustada; si ninguna mesa sola sirve,
+   el par de mesas adyacentes libre más ajustado.
+2. Reparación local: para cada reserva que quedó sin mesa se busca una mesa
+   (o par) bloqueada por UNA sola reserva que pueda mudarse a otra unidad
+   libre; si existe, se muda y se sienta a la que faltaba.
+
+planificar_servicio parte de la asignación actual: cada reserva prefiere su
+mesa de ahora si es tan ajustada como la mejor libre, y las que no se pueden
+colocar conservan la suya, que queda fija para las demás. Solo se guarda si
+se sientan al menos tantos comensales como ahora y ninguna mesa queda
+compartida.
+
+El núcleo (optimizar_asignacion) trabaja con datos planos y no toca la base
+de datos, así se puede medir aislado (comando benchmark_asignacion).
+"""
+
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from restaurante_mesa.models import RestauranteMesa
+
+from .disponibilidad import DURACION, ESTADOS_ACTIVOS
+from .models import ReservaRestaurante
+
+
+class _Ocupacion:
+    """Intervalos ocupados por mesa, ordenados por inicio (sin solapes entre sí)."""
+
+    def __init__(self, mesas):
+        self.intervalos = {mesa_id: [] for mesa_id in mesas}
+
+    def bloqueos(self, mesa_id, inicio, fin):
+        """Reservas de la mesa que se solapan con [inicio, fin)."""
+        intervalos = self.intervalos[mesa_id]
+        i = bisect_left(intervalos, (inicio,))
+        # Solo el intervalo anterior puede empezar antes y seguir ocupando
+        if i and intervalos[i - 1][1] > inicio:
+            i -= 1
+        bloqueos = []
+        while i < len(intervalos) and intervalos[i][0] < fin:
+            if intervalos[i][1] > inicio:
+                bloqueos.append(intervalos[i][2])
+            i += 1
+        return bloqueos
+
+    def libre(self, unidad, inicio, fin):
+        for mesa_id in unidad:
+            intervalos = self.intervalos[mesa_id]
+            i = bisect_left(intervalos, (inicio,))
+            if i < len(intervalos) and intervalos[i][0] < fin:
+                return False
+            if i and intervalos[i - 1][1] > inicio:
+                return False
+        return True
+
+    def ocupar(self, unidad, inicio, fin, reserva_id):
+        for mesa_id in unidad:
+            insort(self.intervalos[mesa_id], (inicio, fin, reserva_id))
+
+    def liberar(self, unidad, inicio, fin, reserva_id):
+        for mesa_id in unidad:
+            self.intervalos[mesa_id].remove((inicio, fin, reserva_id))
+
+
+def _unidades(mesas, adyacencias, combinar):
+    """Mesas solas y, si se permite, pares adyacentes: [(capacidad, (mesa_id, ...))]."""
+    unidades = sorted((capacidad, (mesa_id,)) for mesa_id, capacidad in mesas.items())
+    if combinar:
+        pares = {tuple(sorted(par)) for par in adyacencias if len(set(par)) == 2 and set(par) <= mesas.keys()}
+        unidades += sorted((mesas[a] + mesas[b], (a, b)) for a, b in pares)
+    return unidades
+
+
+def _normalizar(unidad):
+    # Los pares de _unidades van ordenados por id
+    return tuple(sorted(unidad))
+
+
+def optimizar_asignacion(mesas, reservas, adyacencias=(), combinar=True, fijas=None, preferidas=None):
+    """
+    mesas:       {mesa_id: capacidad}
+    reservas:    [(reserva_id, inicio, fin, personas)]  (inicio/fin comparables)
+    adyacencias: pares (mesa_a, mesa_b) que se pueden juntar
+    fijas:       {reserva_id: (mesa_id, ...)} que no se mueven (ya sentadas)
+    preferidas:  {reserva_id: (mesa_id, ...)} unidad que se conserva si está
+                 libre y es tan ajustada como la mejor candidata (menos cambios)
+
+    Retorna (asignacion {reserva_id: (mesa_id, ...)}, sin_mesa [reserva_id]).
+    """
+    fijas = fijas or {}
+    preferidas = {r: _normalizar(u) for r, u in (preferidas or {}).items()}
+    unidades = _unidades(mesas, adyacencias, combinar)
+    capacidad_unidad = {unidad: capacidad for capacidad, unidad in unidades}
+    # Candidatas de cada reserva: primero mesas solas, luego pares; cada grupo
+    # de menor a mayor capacidad (la primera libre es la más ajustada)
+    solas = [u for u in unidades if len(u[1]) == 1]
+    pares = [u for u in unidades if len(u[1]) == 2]
+    capacidades_solas = [c for c, _ in solas]
+    capacidades_pares = [c for c, _ in pares]
+
+    por_tamano = {}
+
+    def candidatas(personas):
+        if personas not in por_tamano:
+            por_tamano[personas] = (
+                [u for _, u in solas[bisect_left(capacidades_solas, personas):]] +
+                [u for _, u in pares[bisect_left(capacidades_pares, personas):]]
+            )
+        return por_tamano[personas]
+
+    datos = {r[0]: r for r in reservas}
+    ocupacion = _Ocupacion(mesas)
+    asignacion = {}
+
+    for reserva_id, unidad in fijas.items():
+        if reserva_id in datos and all(m in mesas for m in unidad):
+            _, inicio, fin, _ = datos[reserva_id]
+            ocupacion.ocupar(unidad, inicio, fin, reserva_id)
+            asignacion[reserva_id] = tuple(unidad)
+
+    # 1. Best-fit decreasing
+    pendientes = sorted(
+        (r for r in reservas if r[0] not in asignacion),
+        key=lambda r: (-r[3], r[1]),
+    )
+    sin_mesa = []
+    # La ocupación solo crece: si (personas, inicio, fin) no cupo, tampoco cabrá después
+    fallidas = set()
+    for reserva_id, inicio, fin, personas in pendientes:
+        clave = (personas, inicio, fin)
+        if clave not in fallidas:
+            preferida = preferidas.get(reserva_id)
+            for unidad in candidatas(personas):
+                if ocupacion.libre(unidad, inicio, fin):
+                    if (
+                        preferida in capacidad_unidad and preferida != unidad
+                        and len(preferida) == len(unidad)
+                        and capacidad_unidad[preferida] == capacidad_unidad[unidad]
+                        and ocupacion.libre(preferida, inicio, fin)
+                    ):
+                        unidad = preferida
+                    ocupacion.ocupar(unidad, inicio, fin, reserva_id)
+                    asignacion[reserva_id] = unidad
+                    break
+            else:
+                fallidas.add(clave)
+        if reserva_id not in asignacion:
+            sin_mesa.append(reserva_id)
+
+    # 2. Reparación local: mudar una única reserva bloqueante. Un intento
+    #    fallido solo se repite si alguna reparación cambió la ocupación.
+    restantes = []
+    fallidas = set()
+    for reserva_id in sin_mesa:
+        _, inicio, fin, personas = datos[reserva_id]
+        clave = (personas, inicio, fin)
+        if clave not in fallidas and _reparar(
+            reserva_id, inicio, fin, personas, candidatas, ocupacion, asignacion, datos, fijas
+        ):
+            fallidas.clear()
+        else:
+            fallidas.add(clave)
+            restantes.append(reserva_id)
+
+    return asignacion, restantes
+
+
+def _reparar(reserva_id, inicio, fin, personas, candidatas, ocupacion, asignacion, datos, fijas):
+    for unidad in candidatas(personas):
+        bloqueos = {b for mesa_id in unidad for b in ocupacion.bloqueos(mesa_id, inicio, fin)}
+        if len(bloqueos) != 1:
+            continue
+        bloqueante = bloqueos.pop()
+        if bloqueante in fijas:
+            continue
+
+        _, b_inicio, b_fin, b_personas = datos[bloqueante]
+        b_unidad = asignacion[bloqueante]
+        ocupacion.liberar(b_unidad, b_inicio, b_fin, bloqueante)
+        for destino in candidatas(b_personas):
+            if destino[0] in unidad or destino[-1] in unidad or not ocupacion.libre(destino, b_inicio, b_fin):
+                continue
+            ocupacion.ocupar(destino, b_inicio, b_fin, bloqueante)
+            asignacion[bloqueante] = destino
+            ocupacion.ocupar(unidad, inicio, fin, reserva_id)
+            asignacion[reserva_id] = unidad
+            return True
+        ocupacion.ocupar(b_unidad, b_inicio, b_fin, bloqueante)
+    return False
+
+
+# =========================================================
+# SERVICIO (BASE DE DATOS)
+# =========================================================
+
+def _sentados(reservas, unidades, mesas):
+    """Comensales con mesa (o par) de capacidad suficiente."""
+    return sum(
+        r.cantidad_personas for r in reservas
+        if unidades.get(r.pk) and sum(mesas.get(m, 0) for m in unidades[r.pk]) >= r.cantidad_personas
+    )
+
+
+def _compartidas(reservas, unidades):
+    """[(mesa_id, reserva_a, reserva_b)] de reservas con horarios solapados en la misma mesa."""
+    por_mesa = {}
+    for reserva in reservas:
+        for mesa_id in unidades.get(reserva.pk, ()):
+            por_mesa.setdefault(mesa_id, []).append((reserva.fecha_reserva, reserva.pk))
+    compartidas = []
+    for mesa_id, ocupaciones in por_mesa.items():
+        ocupaciones.sort()
+        # Todas duran DURACION: basta comparar cada una con la anterior
+        for (inicio_a, a), (inicio_b, b) in zip(ocupaciones, ocupaciones[1:]):
+            if inicio_b < inicio_a + DURACION:
+                compartidas.append((mesa_id, a, b))
+    return compartidas
+
+
+def planificar_servicio(fecha, aplicar=False, combinar=True):
+    """
+    Calcula (y opcionalmente guarda) la asignación de mesas de las reservas
+    activas de `fecha`. Las reservas cuya hora ya pasó no se mueven, ni las
+    del día anterior que aún ocupan su mesa.
+
+    Con `aplicar` solo se guarda si la propuesta no sienta menos comensales
+    que la asignación actual y no deja ninguna mesa compartida; si no, se
+    devuelve la propuesta con 'aplicado' False y el motivo en 'error'.
+
+    Al aplicar, lectura, cálculo y escritura van en una transacción que
+    bloquea todas las mesas (en orden de pk, como el serializador): una
+    reserva nueva espera al plan y el plan no se calcula sobre datos viejos.
+    """
+    if not aplicar:
+        return _planificar(fecha, False, combinar)
+    with transaction.atomic():
+        list(RestauranteMesa.objects.select_for_update().order_by('pk').values_list('pk', flat=True))
+        return _planificar(fecha, True, combinar)
+
+
+def _planificar(fecha, aplicar, combinar):
+    desde = timezone.make_aware(datetime.combine(fecha, datetime.min.time()))
+    hasta = desde + timedelta(days=1)
+    ahora = timezone.now()
+
+    mesas = dict(RestauranteMesa.objects.values_list('id', 'capacidad'))
+    mesas = {mesa_id: capacidad or 0 for mesa_id, capacidad in mesas.items()}
+    adyacencias = list(RestauranteMesa.adyacentes.through.objects.values_list(
+        'from_restaurantemesa_id', 'to_restaurantemesa_id'
+    ))
+    reservas = list(
+        ReservaRestaurante.objects.filter(
+            estado__in=ESTADOS_ACTIVOS,
+            fecha_reserva__gt=desde - DURACION,
+            fecha_reserva__lt=hasta,
+        ).only('id', 'codigo_reserva', 'mesa', 'mesa_adicional', 'fecha_reserva', 'cantidad_personas')
+    )
+    del_dia = [r for r in reservas if r.fecha_reserva >= desde]
+
+    def unidad_actual(reserva):
+        return tuple(m for m in (reserva.mesa_id, reserva.mesa_adicional_id) if m)
+
+    actuales = {r.pk: unidad_actual(r) for r in reservas}
+    fijas = {r.pk: actuales[r.pk] for r in reservas if r.fecha_reserva <= ahora or r.fecha_reserva < desde}
+    datos = [(r.pk, r.fecha_reserva, r.fecha_reserva + DURACION, r.cantidad_personas) for r in reservas]
+
+    sin_colocar = set()
+    inicio_calculo = time.perf_counter()
+    while True:
+        asignacion, sin_mesa = optimizar_asignacion(
+            mesas, datos, adyacencias=adyacencias, combinar=combinar, fijas=fijas, preferidas=actuales,
+        )
+        # Una reserva sin mesa nueva se queda en la suya: esas mesas son fijas
+        # y se recalcula, para que nadie más termine sentado en ellas
+        nuevas_fijas = [reserva_id for reserva_id in sin_mesa if reserva_id not in fijas]
+        if not nuevas_fijas:
+            break
+        for reserva_id in nuevas_fijas:
+            fijas[reserva_id] = actuales[reserva_id]
+            sin_colocar.add(reserva_id)
+    tiempo_ms = (time.perf_counter() - inicio_calculo) * 1000
+
+    propuesta = {**actuales, **asignacion}
+    sentados_actual = _sentados(del_dia, actuales, mesas)
+    sentados = _sentados(del_dia, propuesta, mesas)
+    compartidas = _compartidas(reservas, propuesta)
+
+    cambios = []
+    for reserva in del_dia:
+        nueva = asignacion.get(reserva.pk)
+        if nueva is None or set(nueva) == set(unidad_actual(reserva)):
+            continue
+        anterior = unidad_actual(reserva)
+        # En un par, la mesa principal es la de mayor capacidad
+        principal, *resto = sorted(nueva, key=lambda m: -mesas[m])
+        reserva.mesa_id = principal
+        reserva.mesa_adicional_id = resto[0] if resto else None
+        cambios.append((reserva, anterior))
+
+    error = None
+    if compartidas:
+        error = 'La propuesta deja mesas compartidas por reservas con horarios solapados.'
+    elif sentados < sentados_actual:
+        error = 'La propuesta sienta menos comensales que la asignación actual.'
+
+    aplicado = bool(aplicar) and error is None
+    if aplicado and cambios:
+        ReservaRestaurante.objects.bulk_update(
+            [reserva for reserva, _ in cambios], ['mesa', 'mesa_adicional']
+        )
+
+    resultado = {
+        'fecha': fecha.isoformat(),
+        'aplicado': aplicado,
+        'tiempo_ms': round(tiempo_ms, 2),
+        'reservas': len(del_dia),
+        'asignadas': sum(1 for r in del_dia if r.pk not in sin_colocar),
+        'comensales_totales': sum(r.cantidad_personas for r in del_dia),
+        'comensales_sentados_actual': sentados_actual,
+        'comensales_sentados': sentados,
+        # Sin mesa en la propuesta: conservan la actual
+        'sin_mesa': [
+            {'id': r.pk, 'codigo_reserva': r.codigo_reserva, 'cantidad_personas': r.cantidad_personas}
+            for r in del_dia if r.pk in sin_colocar
+        ],
+        'cambios': [
+            {
+                'id': reserva.pk,
+                'codigo_reserva': reserva.codigo_reserva,
+                'mesas_anteriores': list(anterior),
+                'mesas': [m for m in (reserva.mesa_id, reserva.mesa_adicional_id) if m],
+            }
+            for reserva, anterior in cambios
+        ],
+        'mesas_compartidas': [
+            {'mesa': mesa_id, 'reservas': [a, b]} for mesa_id, a, b in compartidas
+        ],
+    }
+    if error:
+        resultado['error'] = error
+    return resultado
@@ -0,0 +1,143 @@
+# reserva_restaurante/disponibilidad.py
+
+"""
+Disponibilidad de mesas del restaurante por turnos.
+
+Cada reserva ocupa su mesa durante RESTAURANTE_DURACION_MINUTOS a partir de
+fecha_reserva. Para una noche completa se hace UNA consulta por rango (índice
+reserva_rest_solape_idx), se fusionan los intervalos ocupados de cada mesa y
+se recorren los turnos con un barrido de dos punteros: O(mesas × turnos) en
+memoria, sin una consulta por turno ni por mesa.
+"""
+
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from restaurante_mesa.models import RestauranteMesa
+
+from .models import ReservaRestaurante
+
+ESTADOS_ACTIVOS = [ReservaRestaurante.ESTADO_PENDIENTE, ReservaRestaurante.ESTADO_CONFIRMADA]
+
+# Tiempo que una reserva ocupa la mesa
+DURACION = timedelta(minutes=getattr(settings, 'RESTAURANTE_DURACION_MINUTOS', 120))
+# Separación entre turnos de la cuadrícula
+INTERVALO = timedelta(minutes=getattr(settings, 'RESTAURANTE_INTERVALO_MINUTOS', 30))
+# Primer y último turno en que se puede sentar a una mesa (hora local)
+PRIMER_TURNO = time.fromisoformat(getattr(settings, 'RESTAURANTE_PRIMER_TURNO', '18:00'))
+ULTIMO_TURNO = time.fromisoformat(getattr(settings, 'RESTAURANTE_ULTIMO_TURNO', '22:00'))
+
+
+def turnos_del_dia(fecha):
+    """Inicios de turno (datetimes con zona horaria) para una fecha."""
+    actual = timezone.make_aware(datetime.combine(fecha, PRIMER_TURNO))
+    ultimo = timezone.make_aware(datetime.combine(fecha, ULTIMO_TURNO))
+    turnos = []
+    while actual <= ultimo:
+        turnos.append(actual)
+        actual += INTERVALO
+    return turnos
+
+
+def reservas_que_ocupan(desde, hasta, mesas=None, excluir_reserva=None):
+    """Reservas activas que ocupan alguna parte de [desde, hasta) (en `mesas`, si se indican)."""
+    reservas = ReservaRestaurante.objects.filter(
+        estado__in=ESTADOS_ACTIVOS,
+        fecha_reserva__gt=desde - DURACION,
+        fecha_reserva__lt=hasta,
+    )
+    if mesas is not None:
+        reservas = reservas.filter(Q(mesa_id__in=mesas) | Q(mesa_adicional_id__in=mesas))
+    if excluir_reserva is not None:
+        reservas = reservas.exclude(pk=excluir_reserva.pk)
+    return reservas
+
+
+def intervalos_ocupados(desde, hasta, mesas=None, excluir_reserva=None):
+    """
+    {mesa_id: [(inicio, fin), ...]} de las reservas activas que ocupan alguna
+    parte de [desde, hasta). Intervalos ordenados y fusionados (disjuntos).
+    Una reserva con mesas combinadas ocupa tanto `mesa` como `mesa_adicional`.
+    """
+    reservas = reservas_que_ocupan(desde, hasta, mesas=mesas, excluir_reserva=excluir_reserva)
+
+    por_mesa = {}
+    filas = reservas.order_by('fecha_reserva').values_list('mesa_id', 'mesa_adicional_id', 'fecha_reserva')
+    for mesa_id, mesa_adicional_id, inicio in filas:
+        fin = inicio + DURACION
+        for ocupada in (mesa_id, mesa_adicional_id):
+            if ocupada is None:
+                continue
+            intervalos = por_mesa.setdefault(ocupada, [])
+            if intervalos and inicio < intervalos[-1][1]:
+                # Se solapa con el anterior (p. ej. reservas dobles antiguas): se fusionan
+                intervalos[-1] = (intervalos[-1][0], max(intervalos[-1][1], fin))
+            else:
+                intervalos.append((inicio, fin))
+    return por_mesa
+
+
+def turnos_libres(intervalos, turnos):
+    """
+    Barrido de dos punteros: para cada turno (ordenados), True si
+    [turno, turno + DURACION) no toca ningún intervalo ocupado.
+    """
+    libres = []
+    i = 0
+    for turno in turnos:
+        while i < len(intervalos) and intervalos[i][1] <= turno:
+            i += 1
+        libres.append(i == len(intervalos) or intervalos[i][0] >= turno + DURACION)
+    return libres
+
+
+def mesa_libre(mesa, inicio, excluir_reserva=None):
+    """True si `mesa` está libre durante [inicio, inicio + DURACION)."""
+    ocupados = intervalos_ocupados(inicio, inicio + DURACION, mesas=[mesa.pk], excluir_reserva=excluir_reserva)
+    return not ocupados.get(mesa.pk)
+
+
+def cuadricula_disponibilidad(fecha, personas=None):
+    """
+    Disponibilidad de todas las mesas en todos los turnos de `fecha`.
+    Con `personas` solo se consideran mesas con capacidad suficiente y se
+    sugiere la más ajustada (la de menor capacidad que sirva).
+    """
+    mesas = RestauranteMesa.objects.all()
+    if personas:
+        mesas = mesas.filter(capacidad__gte=personas)
+    mesas = list(mesas.order_by('capacidad', 'id'))
+    turnos = turnos_del_dia(fecha)
+    if not turnos:
+        return {'fecha': fecha.isoformat(), 'duracion_minutos': int(DURACION.total_seconds() // 60), 'mesas': [], 'turnos': []}
+
+    ocupados = intervalos_ocupados(turnos[0], turnos[-1] + DURACION, mesas=[m.pk for m in mesas])
+
+    libres_por_turno = [[] for _ in turnos]
+    for mesa in mesas:
+        for indice, libre in enumerate(turnos_libres(ocupados.get(mesa.pk, []), turnos)):
+            if libre:
+                libres_por_turno[indice].append(mesa)
+
+    return {
+        'fecha': fecha.isoformat(),
+        'duracion_minutos': int(DURACION.total_seconds() // 60),
+        'mesas': [
+            {'id': m.pk, 'numero_mesa': m.numero_mesa, 'capacidad': m.capacidad}
+            for m in mesas
+        ],
+        'turnos': [
+            {
+                'hora': timezone.localtime(turno).strftime('%H:%M'),
+                'inicio': turno.isoformat(),
+                'mesas_libres': [m.pk for m in libres],
+                'plazas_libres': sum(m.capacidad or 0 for m in libres),
+                # Las mesas van ordenadas por capacidad: la primera es la más ajustada
+                'mesa_sugerida': libres[0].pk if personas and libres else None,
+            }
+            for turno, libres in zip(turnos, libres_por_turno)
+        ],
+    }
@@ -0,0 +1,81 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from reserva_restaurante.asignacion import optimizar_asignacion
+
+# Minutos desde la apertura; cada reserva ocupa la mesa 2 horas
+DURACION = 120
+TURNOS = list(range(0, 241, 30))
+CAPACIDADES = [2, 2, 2, 4, 4, 4, 4, 6, 6, 8]
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide el optimizador de asignación de mesas con un salón y un servicio '
+        'sintéticos (no usa la base de datos) y lo compara con la asignación '
+        '"primera mesa libre que sirva".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mesas', type=int, default=60)
+        parser.add_argument('--reservas', type=int, default=300)
+        parser.add_argument('--repeticiones', type=int, default=50)
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--sin-combinar', action='store_true',
+                            help='No juntar mesas adyacentes.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['semilla'])
+        mesas = {i: rng.choice(CAPACIDADES) for i in range(1, options['mesas'] + 1)}
+        # Salón en filas de 6: cada mesa es adyacente a la siguiente de su fila
+        adyacencias = [(i, i + 1) for i in mesas if i + 1 in mesas and i % 6]
+        reservas = []
+        for i in range(options['reservas']):
+            inicio = rng.choice(TURNOS)
+            personas = min(12, max(1, int(rng.lognormvariate(1.1, 0.55))))
+            reservas.append((i, inicio, inicio + DURACION, personas))
+
+        comensales = sum(r[3] for r in reservas)
+        self.stdout.write(
+            f'{len(mesas)} mesas ({sum(mesas.values())} plazas, {len(adyacencias)} pares adyacentes), '
+            f'{len(reservas)} reservas, {comensales} comensales'
+        )
+
+        tiempos = []
+        for _ in range(options['repeticiones']):
+            inicio = time.perf_counter()
+            asignacion, sin_mesa = optimizar_asignacion(
+                mesas, reservas, adyacencias, combinar=not options['sin_combinar']
+            )
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+
+        sentados = sum(r[3] for r in reservas if r[0] in asignacion)
+        ingenuo = self.primera_libre(mesas, reservas)
+
+        tiempos.sort()
+        p95 = tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.95))]
+        self.stdout.write(
+            f'Optimizador: {sentados}/{comensales} comensales sentados, '
+            f'{len(sin_mesa)} reservas sin mesa'
+        )
+        self.stdout.write(f'Primera mesa libre: {ingenuo}/{comensales} comensales sentados')
+        estilo = self.style.SUCCESS if p95 < 100 else self.style.ERROR
+        self.stdout.write(estilo(
+            f'mediana {statistics.median(tiempos):.2f} ms | p95 {p95:.2f} ms | '
+            f'máx {tiempos[-1]:.2f} ms ({options["repeticiones"]} repeticiones, objetivo < 100 ms)'
+        ))
+
+    def primera_libre(self, mesas, reservas):
+        """Línea base: en orden de llegada, la primera mesa libre con capacidad suficiente."""
+        ocupadas = {mesa_id: [] for mesa_id in mesas}
+        sentados = 0
+        for _, inicio, fin, personas in reservas:
+            for mesa_id, capacidad in mesas.items():
+                if capacidad >= personas and all(fin <= a or inicio >= b for a, b in ocupadas[mesa_id]):
+                    ocupadas[mesa_id].append((inicio, fin))
+                    sentados += personas
+                    break
+        return sentados
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:47
+
+from django.db import migrations, models
+
+
+def marcar_existentes(apps, schema_editor):
+    # Las reservas anteriores ya pasaron por la tarea de confirmación;
+    # no deben reenviarse en el primer envío por lotes.
+    apps.get_model('reserva_restaurante', 'ReservaRestaurante').objects.update(confirmacion_enviada=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reserva_restaurante', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservarestaurante',
+            name='confirmacion_enviada',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(marcar_existentes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reserva_restaurante', '0003_indice_fecha_creacion'),
+        ('restaurante_mesa', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservarestaurante',
+            index=models.Index(fields=['mesa', 'fecha_reserva', 'estado'], name='reserva_rest_solape_idx'),
+        ),
+    ]
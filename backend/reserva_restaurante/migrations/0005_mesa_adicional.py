@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reserva_restaurante', '0004_indices_solapamiento'),
+        ('restaurante_mesa', '0002_mesas_adyacentes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservarestaurante',
+            name='mesa_adicional',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reservas_combinadas', to='restaurante_mesa.restaurantemesa', verbose_name='Mesa adicional (combinada)'),
+        ),
+    ]
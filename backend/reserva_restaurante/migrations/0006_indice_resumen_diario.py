@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reserva_restaurante', '0005_mesa_adicional'),
+        ('restaurante_mesa', '0003_imagen_variantes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservarestaurante',
+            index=models.Index(fields=['fecha_reserva'], name='reserva_rest_fecha_idx'),
+        ),
+    ]
@@ -18,6 +18,15 @@ class ReservaRestaurante(models.Model):
 
     usuario = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reservas_restaurante')
     mesa = models.ForeignKey(RestauranteMesa, on_delete=models.CASCADE, related_name='reservas')
+    # Segunda mesa cuando el grupo ocupa dos mesas adyacentes juntas (asignacion.py)
+    mesa_adicional = models.ForeignKey(
+        RestauranteMesa,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='reservas_combinadas',
+        verbose_name='Mesa adicional (combinada)'
+    )
     fecha_reserva = models.DateTimeField(verbose_name='Data e Hora da Reserva')
     cantidad_personas = models.PositiveIntegerField(verbose_name='Número de Comensais')
     
@@ -32,11 +41,22 @@ class ReservaRestaurante(models.Model):
     
     fecha_creacion = models.DateTimeField(auto_now_add=True)
 
+    # Marca si ya se envió el correo de confirmación (tarea individual o por lotes)
+    confirmacion_enviada = models.BooleanField(default=False)
+
     class Meta:
         db_table = 'reserva_restaurante'
         verbose_name = 'Reserva de Restaurante'
         verbose_name_plural = 'Reservas de Restaurante'
         ordering = ['-fecha_reserva']
+        indexes = [
+            # Paginación por cursor: ORDER BY -fecha_creacion, -id
+            models.Index(fields=['fecha_creacion', 'id'], name='reserva_rest_creacion_idx'),
+            # Recálculo del resumen diario por rango [día, día + 1) (usuarios/resumen.py)
+            models.Index(fields=['fecha_reserva'], name='reserva_rest_fecha_idx'),
+            # Bloqueo de 2 horas por mesa (rango sobre fecha, estado en el índice)
+            models.Index(fields=['mesa', 'fecha_reserva', 'estado'], name='reserva_rest_solape_idx'),
+        ]
 
     def save(self, *args, **kwargs):
         """
@@ -1,6 +1,10 @@
+import functools
+
+from django.db import transaction
 from rest_framework import serializers
+from restaurante_mesa.models import RestauranteMesa
 from .models import ReservaRestaurante
-from datetime import timedelta
+from .disponibilidad import DURACION, mesa_libre
 
 class ReservaRestauranteSerializer(serializers.ModelSerializer):
     # --- AGREGADO: Obtenemos el username Y el email del usuario ---
@@ -13,11 +17,11 @@ class ReservaRestauranteSerializer(serializers.ModelSerializer):
         model = ReservaRestaurante
         fields = [
             'id', 'usuario', 'usuario_username', 'usuario_email', # <--- AGREGAR AQUÍ
-            'mesa', 'numero_mesa', 
+            'mesa', 'numero_mesa', 'mesa_adicional',
             'fecha_reserva', 'cantidad_personas', 'codigo_reserva', 
             'estado', 'notas', 'fecha_creacion'
         ]
-        read_only_fields = ['usuario', 'codigo_reserva', 'fecha_creacion']
+        read_only_fields = ['usuario', 'codigo_reserva', 'fecha_creacion', 'mesa_adicional']
 
     def validate_cantidad_personas(self, value):
         if value <= 0:
@@ -26,36 +30,69 @@ class ReservaRestauranteSerializer(serializers.ModelSerializer):
 
     def validate(self, data):
         """
-        Validación para evitar solapamiento de horarios (Regla de 2 horas).
+        Capacidad de la mesa y solapamiento de horarios (cada reserva ocupa la
+        mesa RESTAURANTE_DURACION_MINUTOS, 2 horas por defecto).
         """
         if self.instance:
             mesa = data.get('mesa', self.instance.mesa)
             fecha_inicio_nueva = data.get('fecha_reserva', self.instance.fecha_reserva)
+            personas = data.get('cantidad_personas', self.instance.cantidad_personas)
         else:
             mesa = data.get('mesa')
             fecha_inicio_nueva = data.get('fecha_reserva')
+            personas = data.get('cantidad_personas')
 
         if not mesa or not fecha_inicio_nueva:
             return data
 
-        duracion = timedelta(hours=2)
-        fecha_fin_nueva = fecha_inicio_nueva + duracion
+        capacidad = mesa.capacidad
+        if capacidad and self._conserva_mesa_adicional(mesa):
+            capacidad += self.instance.mesa_adicional.capacidad or 0
+        if capacidad and personas and personas > capacidad:
+            raise serializers.ValidationError({
+                "cantidad_personas": [f"La mesa {mesa.numero_mesa} admite como máximo {capacidad} personas."]
+            })
 
-        reservas_existentes = ReservaRestaurante.objects.filter(
-            mesa=mesa,
-            estado__in=['pendiente', 'confirmada'] 
-        )
-        
-        if self.instance:
-            reservas_existentes = reservas_existentes.exclude(pk=self.instance.pk)
+        self._comprobar_mesa_libre(mesa, fecha_inicio_nueva)
+        return data
 
-        for reserva in reservas_existentes:
-            inicio_existente = reserva.fecha_reserva
-            fin_existente = inicio_existente + duracion
+    def _conserva_mesa_adicional(self, mesa):
+        # Una reserva con mesas combinadas las conserva mientras no se cambie la mesa principal
+        return bool(self.instance and self.instance.mesa_adicional_id and self.instance.mesa_id == mesa.pk)
 
-            if fecha_inicio_nueva < fin_existente and fecha_fin_nueva > inicio_existente:
+    def _comprobar_mesa_libre(self, mesa, fecha_inicio):
+        mesas = [mesa]
+        if self._conserva_mesa_adicional(mesa):
+            mesas.append(self.instance.mesa_adicional)
+        for ocupada in mesas:
+            if not mesa_libre(ocupada, fecha_inicio, excluir_reserva=self.instance):
+                horas = int(DURACION.total_seconds() // 3600)
                 raise serializers.ValidationError({
-                    "mesa": [f"La mesa {mesa.numero_mesa} ya está reservada en este horario. (Bloqueo de 2 horas)."]
+                    "mesa": [f"La mesa {ocupada.numero_mesa} ya está reservada en este horario. (Bloqueo de {horas} horas)."]
                 })
 
-        return data
\ No newline at end of file
+    def _guardar_con_bloqueo(self, guardar, validated_data):
+        """
+        Dos peticiones simultáneas pueden pasar validate() para la misma mesa:
+        se bloquean las filas de las mesas que ocupará (SELECT ... FOR UPDATE,
+        en orden de pk para no cruzarse con otra petición ni con
+        planificar_servicio) y se vuelve a comprobar antes de guardar.
+        SQLite ya serializa las escrituras.
+        """
+        mesa = validated_data.get('mesa') or self.instance.mesa
+        fecha_inicio = validated_data.get('fecha_reserva') or self.instance.fecha_reserva
+        bloquear = [mesa.pk]
+        if self._conserva_mesa_adicional(mesa):
+            bloquear.append(self.instance.mesa_adicional_id)
+        with transaction.atomic():
+            list(RestauranteMesa.objects.select_for_update().filter(pk__in=bloquear).order_by('pk'))
+            self._comprobar_mesa_libre(mesa, fecha_inicio)
+            return guardar(validated_data)
+
+    def create(self, validated_data):
+        return self._guardar_con_bloqueo(super().create, validated_data)
+
+    def update(self, instance, validated_data):
+        if 'mesa' in validated_data and not self._conserva_mesa_adicional(validated_data['mesa']):
+            validated_data['mesa_adicional'] = None
+        return self._guardar_con_bloqueo(functools.partial(super().update, instance), validated_data)
@@ -1,68 +1,74 @@
 from celery import shared_task
 from celery.utils.log import get_task_logger
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
 from .models import ReservaRestaurante
 from django.conf import settings
-import time
 
 # Configuramos el logger para monitorear la tarea en la terminal de Celery
 logger = get_task_logger(__name__)
 
+def _construir_correo(reserva, connection=None):
+    """
+    Arma el EmailMessage de confirmación de la reserva de mesa.
+    Retorna None si el usuario no tiene email configurado.
+    """
+    email_cliente = reserva.usuario.email if (reserva.usuario and reserva.usuario.email) else None
+    if not email_cliente:
+        return None
+
+    # Usamos el primer nombre si está disponible, de lo contrario el username
+    nombre = reserva.usuario.first_name if reserva.usuario.first_name else reserva.usuario.username
+    
+    asunto = f"Confirmación de Mesa #{reserva.codigo_reserva} - Hotel Indigo"
+    
+    # Formateamos la fecha para que sea legible (Día/Mes/Año Hora:Minutos)
+    fecha_legible = reserva.fecha_reserva.strftime('%d/%m/%Y %H:%M')
+    
+    # Cuerpo del mensaje (Sin el campo total_reserva)
+    mensaje = (
+        f"Hola {nombre},\n\n"
+        f"Tu mesa en el restaurante de Hotel Indigo ha sido reservada con éxito.\n\n"
+        f"Detalles de la Reserva:\n"
+        f"  - Código de Reserva: {reserva.codigo_reserva}\n"
+        f"  - Mesa Número: {reserva.mesa.numero_mesa}\n"
+        f"  - Fecha y Hora: {fecha_legible}\n"
+        f"  - Comensales: {reserva.cantidad_personas}\n"
+        f"  - Notas: {reserva.notas if reserva.notas else 'Ninguna'}\n\n"
+        f"¡Te esperamos para disfrutar de una excelente comida!\n\n"
+        f"Atentamente,\n"
+        f"Equipo de Restaurante Hotel Indigo"
+    )
+
+    return EmailMessage(asunto, mensaje, settings.DEFAULT_FROM_EMAIL, [email_cliente], connection=connection)
+
+
 @shared_task(bind=True)
 def enviar_email_restaurante(self, id_reserva):
     """
     Tarea asíncrona para enviar la confirmación de reserva de mesa al cliente.
     Se ha simplificado para eliminar campos de costo no necesarios en restaurante.
+    Se encola con transaction.on_commit, por lo que la fila ya existe al ejecutarse.
     """
     logger.info(f"--- [CELERY] Iniciando email restaurante para ID: {id_reserva} ---")
     
-    # Pausa de seguridad para asegurar que el registro existe en la DB tras la transacción
-    time.sleep(1)
-    
+    # Reclamamos la reserva: si ya se confirmó (p. ej. por el envío por lotes) no se repite
+    if not ReservaRestaurante.objects.filter(pk=id_reserva, confirmacion_enviada=False).update(confirmacion_enviada=True):
+        return f"Omitido: reserva {id_reserva} inexistente o ya confirmada."
+
     try:
         # Obtenemos la reserva con select_related para optimizar la consulta a DB
         reserva = ReservaRestaurante.objects.select_related('usuario', 'mesa').get(pk=id_reserva)
         
-        # Validamos si el usuario tiene un correo electrónico configurado
-        email_cliente = reserva.usuario.email if (reserva.usuario and reserva.usuario.email) else None
-        
-        if not email_cliente:
+        correo = _construir_correo(reserva)
+        if correo is None:
             logger.warning(f"El usuario {reserva.usuario.username} no tiene email configurado.")
             return f"Fallo: Sin email en reserva {id_reserva}"
 
-        # Usamos el primer nombre si está disponible, de lo contrario el username
-        nombre = reserva.usuario.first_name if reserva.usuario.first_name else reserva.usuario.username
-        
-        asunto = f"Confirmación de Mesa #{reserva.codigo_reserva} - Hotel Indigo"
-        
-        # Formateamos la fecha para que sea legible (Día/Mes/Año Hora:Minutos)
-        fecha_legible = reserva.fecha_reserva.strftime('%d/%m/%Y %H:%M')
-        
-        # Cuerpo del mensaje (Sin el campo total_reserva)
-        mensaje = (
-            f"Hola {nombre},\n\n"
-            f"Tu mesa en el restaurante de Hotel Indigo ha sido reservada con éxito.\n\n"
-            f"Detalles de la Reserva:\n"
-            f"  - Código de Reserva: {reserva.codigo_reserva}\n"
-            f"  - Mesa Número: {reserva.mesa.numero_mesa}\n"
-            f"  - Fecha y Hora: {fecha_legible}\n"
-            f"  - Comensales: {reserva.cantidad_personas}\n"
-            f"  - Notas: {reserva.notas if reserva.notas else 'Ninguna'}\n\n"
-            f"¡Te esperamos para disfrutar de una excelente comida!\n\n"
-            f"Atentamente,\n"
-            f"Equipo de Restaurante Hotel Indigo"
-        )
-
         # Envío del correo
-        send_mail(
-            asunto,
-            mensaje,
-            settings.DEFAULT_FROM_EMAIL,
-            [email_cliente],
-            fail_silently=False,
-        )
+        correo.send(fail_silently=False)
 
-        logger.info(f"--- [CELERY] Email enviado a {email_cliente} para reserva {reserva.codigo_reserva} ---")
+        logger.info(f"--- [CELERY] Email enviado a {correo.to[0]} para reserva {reserva.codigo_reserva} ---")
         return f"Éxito: Email de reserva {reserva.codigo_reserva} enviado."
 
     except ReservaRestaurante.DoesNotExist:
@@ -71,5 +77,65 @@ def enviar_email_restaurante(self, id_reserva):
     
     except Exception as exc:
         logger.error(f"Error en tarea de restaurante: {exc}")
+        # Liberamos la reserva para que el reintento (o el envío por lotes) la tome
+        ReservaRestaurante.objects.filter(pk=id_reserva).update(confirmacion_enviada=False)
         # Reintento automático: espera 60 segundos, máximo 3 intentos
-        raise self.retry(exc=exc, countdown=60, max_retries=3)
\ No newline at end of file
+        raise self.retry(exc=exc, countdown=60, max_retries=3)
+
+
+@shared_task
+def enviar_confirmaciones_restaurante_pendientes(limite=500):
+    """
+    Variante por lotes: envía todas las confirmaciones de mesa pendientes
+    reutilizando una única conexión SMTP (get_connection + send_messages).
+    Recoge las que no se pudieron encolar o agotaron sus reintentos: la
+    programa CELERY_BEAT_SCHEDULE (settings.py) y, sin broker, la ejecuta el
+    comando enviar_confirmaciones_pendientes.
+    """
+    # 1. Reclamar el lote (SKIP LOCKED en PostgreSQL; SQLite lo ignora)
+    with transaction.atomic():
+        ids = list(
+            ReservaRestaurante.objects.select_for_update(skip_locked=True)
+            .filter(confirmacion_enviada=False)
+            .order_by('id')
+            .values_list('id', flat=True)[:limite]
+        )
+        if not ids:
+            return "Sin confirmaciones de restaurante pendientes."
+        ReservaRestaurante.objects.filter(id__in=ids).update(confirmacion_enviada=True)
+
+    # 2. Enviar todo por la misma conexión; los fallos vuelven a quedar pendientes
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        # No se pudo abrir la conexión SMTP: todo el lote vuelve a quedar pendiente
+        logger.error(f"Error de conexión SMTP en lote de restaurante: {exc}")
+        ReservaRestaurante.objects.filter(id__in=ids).update(confirmacion_enviada=False)
+        return f"Error: conexión SMTP no disponible ({exc})."
+
+    fallidos = []
+    enviados = 0
+    try:
+        for reserva in ReservaRestaurante.objects.select_related('usuario', 'mesa').filter(id__in=ids):
+            try:
+                correo = _construir_correo(reserva, connection=connection)
+                if correo is None:
+                    logger.warning(f"Reserva {reserva.codigo_reserva} sin email; se omite.")
+                    continue
+                enviados += connection.send_messages([correo])
+            except Exception as exc:
+                logger.error(f"Error al enviar email de reserva {reserva.codigo_reserva}: {exc}")
+                fallidos.append(reserva.pk)
+    finally:
+        # Lo enviado ya salió: un error al cerrar (QUIT) no devuelve nada a pendientes
+        try:
+            connection.close()
+        except Exception as exc:
+            logger.warning(f"Error al cerrar la conexión SMTP del lote de restaurante: {exc}")
+
+    if fallidos:
+        ReservaRestaurante.objects.filter(id__in=fallidos).update(confirmacion_enviada=False)
+
+    logger.info(f"--- [CELERY] Lote de restaurante: {enviados} enviados, {len(fallidos)} fallidos ---")
+    return f"Lote de restaurante: {enviados} enviados, {len(fallidos)} fallidos."
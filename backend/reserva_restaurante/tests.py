@@ -0,0 +1,248 @@
+from datetime import date, datetime, timedelta
+from smtplib import SMTPException
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from restaurante_mesa.models import RestauranteMesa
+from . import asignacion, task
+from .asignacion import optimizar_asignacion, planificar_servicio
+from .disponibilidad import DURACION, cuadricula_disponibilidad, turnos_libres
+from .models import ReservaRestaurante
+from .serializers import ReservaRestauranteSerializer
+
+
+def hora(h, m=0, dia=date(2030, 5, 10)):
+    return timezone.make_aware(datetime(dia.year, dia.month, dia.day, h, m))
+
+
+class DisponibilidadTurnosTest(TestCase):
+
+    def setUp(self):
+        self.usuario = User.objects.create_user('comensal', 'comensal@test.com', 'x')
+        self.dos = RestauranteMesa.objects.create(numero_mesa='1', capacidad=2)
+        self.cuatro = RestauranteMesa.objects.create(numero_mesa='2', capacidad=4)
+        self.seis = RestauranteMesa.objects.create(numero_mesa='3', capacidad=6)
+
+    def reservar(self, mesa, inicio, estado=ReservaRestaurante.ESTADO_CONFIRMADA, **extra):
+        return ReservaRestaurante.objects.create(
+            usuario=self.usuario, mesa=mesa, fecha_reserva=inicio, cantidad_personas=2, estado=estado, **extra
+        )
+
+    def libres(self, cuadricula):
+        return {turno['hora']: turno['mesas_libres'] for turno in cuadricula['turnos']}
+
+    def test_turnos_libres_dos_punteros(self):
+        turnos = [hora(18), hora(19), hora(20), hora(20, 30), hora(21), hora(22)]
+        ocupados = [(hora(18, 30), hora(20, 30)), (hora(23), hora(23) + DURACION)]
+        # Con 2 horas de duración: hasta las 20:00 chocan con 18:30-20:30; a las
+        # 21:00 se termina justo cuando empieza la siguiente
+        self.assertEqual(turnos_libres(ocupados, turnos), [False, False, False, True, True, False])
+        self.assertEqual(turnos_libres([], turnos), [True] * 6)
+
+    def test_reserva_bloquea_su_duracion(self):
+        self.reservar(self.cuatro, hora(19))
+        libres = self.libres(cuadricula_disponibilidad(date(2030, 5, 10)))
+        ocupados = {h for h, mesas in libres.items() if self.cuatro.pk not in mesas}
+        self.assertEqual(ocupados, {'18:00', '18:30', '19:00', '19:30', '20:00', '20:30'})
+        self.assertIn(self.cuatro.pk, libres['21:00'])
+
+    def test_canceladas_no_ocupan_y_combinadas_ocupan_ambas(self):
+        self.reservar(self.dos, hora(20), estado=ReservaRestaurante.ESTADO_CANCELADA)
+        self.reservar(self.cuatro, hora(20), mesa_adicional=self.seis)
+        libres = self.libres(cuadricula_disponibilidad(date(2030, 5, 10)))['20:00']
+        self.assertEqual(libres, [self.dos.pk])
+
+    def test_personas_sugiere_la_mesa_mas_ajustada(self):
+        self.reservar(self.cuatro, hora(18))
+        turnos = {t['hora']: t for t in cuadricula_disponibilidad(date(2030, 5, 10), personas=3)['turnos']}
+        self.assertEqual(turnos['18:00']['mesas_libres'], [self.seis.pk])
+        self.assertEqual(turnos['18:00']['mesa_sugerida'], self.seis.pk)
+        self.assertEqual(turnos['22:00']['mesa_sugerida'], self.cuatro.pk)
+        self.assertEqual(turnos['22:00']['plazas_libres'], 10)
+
+    def test_endpoint(self):
+        url = reverse('reserva-restaurante-disponibilidad')
+        self.assertEqual(APIClient().get(url).status_code, 400)
+        respuesta = APIClient().get(url, {'fecha': '2030-05-10', 'hora': '21:00'})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([t['hora'] for t in respuesta.data['turnos']], ['21:00'])
+
+    def test_reserva_del_dia_anterior_no_afecta(self):
+        self.reservar(self.dos, hora(23, dia=date(2030, 5, 9)))
+        self.reservar(self.dos, hora(16))
+        libres = self.libres(cuadricula_disponibilidad(date(2030, 5, 10)))
+        # 16:00-18:00 termina justo al abrir el primer turno
+        self.assertTrue(all(self.dos.pk in mesas for mesas in libres.values()))
+
+
+class OptimizadorMesasTest(TestCase):
+
+    def test_mesa_mas_ajustada_y_pares_adyacentes(self):
+        mesas = {1: 6, 2: 2, 3: 2}
+        reservas = [('pareja', 0, 120, 2), ('grupo', 0, 120, 4)]
+        plan, sin_mesa = optimizar_asignacion(mesas, reservas, adyacencias=[(2, 3)], combinar=False)
+        self.assertEqual((plan, sin_mesa), ({'grupo': (1,), 'pareja': (2,)}, []))
+
+        mesas = {1: 2, 2: 2}
+        plan, sin_mesa = optimizar_asignacion(mesas, [('grupo', 0, 120, 4)], adyacencias=[(2, 1)])
+        self.assertEqual((plan, sin_mesa), ({'grupo': (1, 2)}, []))
+        self.assertEqual(optimizar_asignacion(mesas, [('grupo', 0, 120, 4)], adyacencias=[(2, 1)], combinar=False)[1], ['grupo'])
+
+    def test_horarios_y_preferidas(self):
+        mesas = {1: 4, 2: 4}
+        reservas = [('a', 0, 120, 4), ('b', 120, 240, 4), ('c', 60, 180, 3)]
+        plan, sin_mesa = optimizar_asignacion(mesas, reservas, preferidas={'a': (2,), 'b': (2,)})
+        self.assertEqual(sin_mesa, [])
+        # Misma capacidad: se conserva la mesa actual; c solapa con ambas y va a la otra
+        self.assertEqual(plan, {'a': (2,), 'b': (2,), 'c': (1,)})
+
+    def test_fijas_no_se_mueven(self):
+        plan, sin_mesa = optimizar_asignacion({1: 4}, [('sentada', 0, 120, 2), ('nueva', 60, 180, 4)], fijas={'sentada': (1,)})
+        self.assertEqual((plan, sin_mesa), ({'sentada': (1,)}, ['nueva']))
+
+
+class PlanificarServicioTest(TestCase):
+
+    def setUp(self):
+        self.usuario = User.objects.create_user('anfitrion', 'anfitrion@test.com', 'x', is_staff=True)
+        self.a = RestauranteMesa.objects.create(numero_mesa='A', capacidad=2)
+        self.c = RestauranteMesa.objects.create(numero_mesa='C', capacidad=2)
+        self.b = RestauranteMesa.objects.create(numero_mesa='B', capacidad=4)
+        self.d = RestauranteMesa.objects.create(numero_mesa='D', capacidad=4)
+        self.e = RestauranteMesa.objects.create(numero_mesa='E', capacidad=4)
+        self.fecha = date(2030, 5, 10)
+
+    def reservar(self, mesa, inicio, personas):
+        return ReservaRestaurante.objects.create(
+            usuario=self.usuario, mesa=mesa, fecha_reserva=inicio, cantidad_personas=personas,
+            estado=ReservaRestaurante.ESTADO_CONFIRMADA,
+        )
+
+    def mesa(self, reserva):
+        return ReservaRestaurante.objects.get(pk=reserva.pk).mesa_id
+
+    def test_sin_mesa_conserva_la_suya_y_nadie_la_ocupa(self):
+        self.reservar(self.b, hora(20), 4)
+        self.reservar(self.d, hora(20), 4)
+        self.reservar(self.e, hora(20, 30), 4)
+        # Tres personas en una mesa de dos (la sentó el anfitrión): no cabe en otra
+        apretada = self.reservar(self.a, hora(20), 3)
+        # Pareja en una mesa de cuatro que solapa con la anterior: la mesa de
+        # dos más ajustada es A, pero A sigue ocupada por la que no se mueve
+        pareja = self.reservar(self.e, hora(18, 30), 2)
+
+        resultado = planificar_servicio(self.fecha, aplicar=True)
+        self.assertTrue(resultado['aplicado'])
+        self.assertEqual([r['id'] for r in resultado['sin_mesa']], [apretada.pk])
+        self.assertEqual(resultado['mesas_compartidas'], [])
+        self.assertEqual(self.mesa(apretada), self.a.pk)
+        self.assertEqual(self.mesa(pareja), self.c.pk)
+
+    def test_no_aplica_con_mesas_compartidas(self):
+        primera = self.reservar(self.b, hora(20), 2)
+        # Reserva doble antigua en la misma mesa
+        self.reservar(self.b, hora(21), 2)
+        with mock.patch.object(asignacion.timezone, 'now', return_value=hora(23)):
+            resultado = planificar_servicio(self.fecha, aplicar=True)
+        self.assertFalse(resultado['aplicado'])
+        self.assertIn('error', resultado)
+        self.assertEqual(resultado['mesas_compartidas'][0]['mesa'], self.b.pk)
+        self.assertEqual(self.mesa(primera), self.b.pk)
+
+    def test_no_aplica_si_sienta_menos_comensales(self):
+        grupo = self.reservar(self.b, hora(20), 4)
+        peor = ({grupo.pk: (self.a.pk,)}, [])
+        with mock.patch.object(asignacion, 'optimizar_asignacion', return_value=peor):
+            respuesta = self.client_staff().post(
+                reverse('reserva-restaurante-asignacion'), {'fecha': '2030-05-10'}, format='json'
+            )
+        self.assertEqual(respuesta.status_code, 409)
+        self.assertEqual(respuesta.data['comensales_sentados'], 0)
+        self.assertEqual(self.mesa(grupo), self.b.pk)
+
+    def test_aplicar_bloquea_las_mesas_antes_de_leer(self):
+        self.reservar(self.b, hora(20), 2)
+        orden = []
+        bloquear = RestauranteMesa.objects.select_for_update
+        optimizar = asignacion.optimizar_asignacion
+
+        def registrar(paso, funcion):
+            def llamada(*args, **kwargs):
+                orden.append(paso)
+                return funcion(*args, **kwargs)
+            return llamada
+
+        with mock.patch.object(RestauranteMesa.objects, 'select_for_update', side_effect=registrar('bloqueo', bloquear)), \
+                mock.patch.object(asignacion, 'optimizar_asignacion', side_effect=registrar('calculo', optimizar)):
+            planificar_servicio(self.fecha)
+            self.assertEqual(orden, ['calculo'])
+            orden.clear()
+            planificar_servicio(self.fecha, aplicar=True)
+        self.assertEqual(orden, ['bloqueo', 'calculo'])
+
+    def test_editar_bloquea_tambien_la_mesa_adicional(self):
+        grupo = self.reservar(self.b, hora(20), 6)
+        grupo.mesa_adicional = self.d
+        grupo.save()
+        serializer = ReservaRestauranteSerializer(grupo, data={'notas': 'Cumpleaños'}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        with CaptureQueriesContext(connection) as consultas:
+            serializer.save()
+        tabla = RestauranteMesa._meta.db_table
+        bloqueo = next(q['sql'] for q in consultas.captured_queries if f'FROM "{tabla}"' in q['sql'] and ' IN (' in q['sql'])
+        self.assertIn(f'IN ({self.b.pk}, {self.d.pk})', bloqueo)
+
+    def client_staff(self):
+        client = APIClient()
+        client.force_authenticate(self.usuario)
+        return client
+
+
+class ConfirmacionesPorLotesTest(TestCase):
+
+    def setUp(self):
+        usuario = User.objects.create_user('comensal', 'comensal@test.com', 'x')
+        mesa = RestauranteMesa.objects.create(numero_mesa='1', capacidad=4)
+        self.reservas = [
+            ReservaRestaurante.objects.create(usuario=usuario, mesa=mesa, fecha_reserva=hora(12 + 3 * i), cantidad_personas=2)
+            for i in range(3)
+        ]
+
+    def pendientes(self):
+        return set(ReservaRestaurante.objects.filter(confirmacion_enviada=False).values_list('pk', flat=True))
+
+    def test_un_lote_una_conexion_y_fallos_pendientes(self):
+        ReservaRestaurante.objects.filter(pk=self.reservas[0].pk).update(confirmacion_enviada=True)
+        enviar = EmailBackend.send_messages
+
+        def falla_la_ultima(backend, mensajes):
+            if self.reservas[2].codigo_reserva in mensajes[0].subject:
+                raise SMTPException('550')
+            return enviar(backend, mensajes)
+
+        with mock.patch.object(task, 'get_connection', wraps=task.get_connection) as get_connection, \
+                mock.patch.object(EmailBackend, 'send_messages', falla_la_ultima):
+            task.enviar_confirmaciones_restaurante_pendientes()
+        get_connection.assert_called_once()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(self.pendientes(), {self.reservas[2].pk})
+
+    def test_conexion_y_cierre(self):
+        with mock.patch.object(EmailBackend, 'open', side_effect=SMTPException('sin servidor')):
+            task.enviar_confirmaciones_restaurante_pendientes()
+        self.assertEqual(self.pendientes(), {r.pk for r in self.reservas})
+
+        # El error al cerrar llega después de enviar: nada vuelve a pendientes
+        with mock.patch.object(EmailBackend, 'close', side_effect=SMTPException('QUIT')):
+            task.enviar_confirmaciones_restaurante_pendientes()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(self.pendientes(), set())
@@ -1,9 +1,17 @@
 import logging
+from django.db import transaction
+from django.utils.dateparse import parse_date
 from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import APIException
 from rest_framework.response import Response
+from .asignacion import planificar_servicio
+from .disponibilidad import cuadricula_disponibilidad
 from .models import ReservaRestaurante
 from .serializers import ReservaRestauranteSerializer
 from .task import enviar_email_restaurante
+from usuarios.paginacion import CursorPaginacion
+from usuarios.permissions import get_user_role
 
 # Configurar logger para ver errores en la consola de Railway
 logger = logging.getLogger(__name__)
@@ -15,6 +23,7 @@ class ReservaRestauranteViewSet(viewsets.ModelViewSet):
     """
     serializer_class = ReservaRestauranteSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CursorPaginacion
 
     def get_queryset(self):
         """
@@ -24,16 +33,73 @@ class ReservaRestauranteViewSet(viewsets.ModelViewSet):
         user = self.request.user
         
         # 1. Si es staff (is_staff) o tiene rol administrativo en su perfil, ve todo
-        if user.is_staff or (hasattr(user, 'perfil') and user.perfil.rol in ['ADMINISTRADOR', 'RECEPCIONISTA']):
+        if user.is_staff or get_user_role(user) in ['ADMINISTRADOR', 'RECEPCIONISTA']:
             return ReservaRestaurante.objects.all().select_related('usuario', 'mesa')
         
         # 2. Si es un cliente normal, filtramos por su usuario
         return ReservaRestaurante.objects.filter(usuario=user).select_related('usuario', 'mesa')
 
+    @action(detail=False, methods=['get'], permission_classes=[permissions.AllowAny], pagination_class=None)
+    def disponibilidad(self, request):
+        """
+        Cuadrícula de mesas libres por turno para una fecha.
+        ?fecha=YYYY-MM-DD (obligatorio) &personas=4 (opcional) &hora=20:00 (opcional)
+        """
+        try:
+            fecha = parse_date(request.query_params.get('fecha') or '')
+        except ValueError:
+            fecha = None
+        if not fecha:
+            return Response({'error': 'Debe indicar la fecha con formato YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        personas = request.query_params.get('personas')
+        if personas:
+            try:
+                personas = int(personas)
+            except ValueError:
+                return Response({'error': 'El número de personas debe ser un entero.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        cuadricula = cuadricula_disponibilidad(fecha, personas)
+
+        hora = request.query_params.get('hora')
+        if hora:
+            cuadricula['turnos'] = [t for t in cuadricula['turnos'] if t['hora'] == hora]
+        return Response(cuadricula)
+
+    @action(detail=False, methods=['get', 'post'])
+    def asignacion(self, request):
+        """
+        Asignación automática de mesas para un día (solo personal).
+        GET ?fecha=YYYY-MM-DD  -> propuesta sin guardar.
+        POST {"fecha": "YYYY-MM-DD", "combinar": true} -> aplica la propuesta
+        (409 si sentaría menos comensales o dejaría mesas compartidas).
+        """
+        user = request.user
+        if not (user.is_staff or get_user_role(user) in ['ADMINISTRADOR', 'RECEPCIONISTA']):
+            return Response({'error': 'No autorizado.'}, status=status.HTTP_403_FORBIDDEN)
+
+        datos = request.query_params if request.method == 'GET' else request.data
+        try:
+            fecha = parse_date(str(datos.get('fecha') or ''))
+        except ValueError:
+            fecha = None
+        if not fecha:
+            return Response({'error': 'Debe indicar la fecha con formato YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+        combinar = str(datos.get('combinar', 'true')).lower() not in ('false', '0')
+
+        resultado = planificar_servicio(fecha, aplicar=request.method == 'POST', combinar=combinar)
+        if request.method == 'POST' and not resultado['aplicado']:
+            # Propuesta peor que la actual o con mesas compartidas: no se guardó
+            return Response(resultado, status=status.HTTP_409_CONFLICT)
+        return Response(resultado)
+
     def create(self, request, *args, **kwargs):
         # Sobrescribimos create para asegurar el manejo de errores global
         try:
             return super().create(request, *args, **kwargs)
+        except APIException:
+            # Errores de validación (mesa ocupada, capacidad...) se devuelven tal cual
+            raise
         except Exception as e:
             logger.error(f"Error general en creación de reserva: {e}")
             return Response(
@@ -45,11 +111,17 @@ class ReservaRestauranteViewSet(viewsets.ModelViewSet):
         # 1. Guardamos la instancia asignando el usuario autenticado
         instance = serializer.save(usuario=self.request.user)
         
-        # 2. Intentamos enviar el correo de forma segura con Celery
-        try:
-            print(f"DEBUG: Reserva {instance.codigo_reserva} creada. Intentando enviar a Celery...")
-            enviar_email_restaurante.delay(instance.pk)
-        except Exception as e:
-            # Si falla Celery, la reserva ya está guardada, solo logueamos el error
-            logger.error(f"⚠️ ERROR AL ENVIAR TAREA A CELERY: {str(e)}")
-            print(f"⚠️ FALLÓ EL EMAIL: {e}")
\ No newline at end of file
+        # 2. Encolamos el correo en Celery al confirmar la transacción
+        #    (la tarea nunca corre antes de que la fila sea visible)
+        print(f"DEBUG: Reserva {instance.codigo_reserva} creada. Intentando enviar a Celery...")
+        transaction.on_commit(lambda: _encolar_confirmacion(instance.pk), robust=True)
+
+
+def _encolar_confirmacion(id_reserva):
+    try:
+        enviar_email_restaurante.delay(id_reserva)
+    except Exception as e:
+        # Si falla Celery, la reserva ya está guardada, solo logueamos el error
+        # (el envío por lotes la recogerá más tarde)
+        logger.error(f"⚠️ ERROR AL ENVIAR TAREA A CELERY: {str(e)}")
+        print(f"⚠️ FALLÓ EL EMAIL: {e}")
\ No newline at end of file
@@ -0,0 +1,107 @@
+# reserva_salon/disponibilidad.py
+
+"""
+Disponibilidad de los salones de eventos.
+
+Cada reserva guarda su intervalo de bloqueo [bloqueo_inicio, bloqueo_fin):
+el evento (fecha_evento -> fecha_fin) ampliado con el montaje y desmontaje
+del salón. Dos eventos chocan si sus bloqueos se solapan; la comprobación es
+UNA consulta por rango sobre reserva_salon_solape_idx.
+
+El calendario de todos los salones para una ventana de fechas también es una
+sola consulta (mismo índice, un recorrido por salón + JOIN con salón y usuario).
+"""
+
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import DURACION_EVENTO, ReservaSalon
+
+# Duración máxima de un evento
+DURACION_MAXIMA = timedelta(minutes=getattr(settings, 'SALON_DURACION_MAXIMA_MINUTOS', 1440))
+# Ventana máxima del calendario
+CALENDARIO_MAXIMO_DIAS = getattr(settings, 'SALON_CALENDARIO_MAXIMO_DIAS', 92)
+
+
+def fin_del_evento(inicio, fecha_fin=None, duracion_minutos=None):
+    """
+    Hora de fin de un evento: la indicada, inicio + duracion_minutos o la
+    duración por defecto. ValueError con el mensaje para el cliente si no es válida.
+    """
+    if fecha_fin is None:
+        fecha_fin = inicio + (timedelta(minutes=duracion_minutos) if duracion_minutos else DURACION_EVENTO)
+    if fecha_fin <= inicio:
+        raise ValueError("La hora de fin debe ser posterior al inicio del evento.")
+    if fecha_fin - inicio > DURACION_MAXIMA:
+        horas = int(DURACION_MAXIMA.total_seconds() // 3600)
+        raise ValueError(f"Un evento no puede durar más de {horas} horas.")
+    return fecha_fin
+
+
+def conflicto_salon(salon, inicio, fin, excluir_reserva=None):
+    """
+    Mensaje de error si `salon` no está libre para un evento en [inicio, fin)
+    (con montaje y desmontaje), None si está libre.
+    """
+    reservas = ReservaSalon.reservas_superpuestas(salon, inicio, fin)
+    if excluir_reserva is not None and excluir_reserva.pk:
+        reservas = reservas.exclude(pk=excluir_reserva.pk)
+    choque = reservas.order_by('bloqueo_inicio').values_list('bloqueo_inicio', 'bloqueo_fin').first()
+    if choque is None:
+        return None
+
+    desde, hasta = (timezone.localtime(valor).strftime('%d/%m/%Y %H:%M') for valor in choque)
+    return f"El salón ya está reservado entre {desde} y {hasta} (incluye montaje y desmontaje)."
+
+
+def calendario_salones(desde, hasta, salon_id=None):
+    """
+    Reservas activas de todos los salones (o de `salon_id`) que ocupan algún
+    momento entre las fechas `desde` y `hasta` (ambas incluidas), agrupadas
+    por salón y ordenadas por hora de inicio.
+    """
+    inicio = timezone.make_aware(datetime.combine(desde, datetime.min.time()))
+    fin = timezone.make_aware(datetime.combine(hasta + timedelta(days=1), datetime.min.time()))
+
+    reservas = ReservaSalon.objects.filter(
+        estado__in=ReservaSalon.ESTADOS_ACTIVOS,
+        bloqueo_fin__gt=inicio,
+        bloqueo_inicio__lt=fin,
+    )
+    if salon_id is not None:
+        reservas = reservas.filter(salon_id=salon_id)
+
+    filas = reservas.order_by('salon_id', 'fecha_evento').values(
+        'id', 'codigo_evento', 'estado', 'cantidad_invitados',
+        'fecha_evento', 'fecha_fin', 'bloqueo_inicio', 'bloqueo_fin',
+        'salon_id', 'salon__nombre', 'usuario__username', 'usuario__email',
+    )
+
+    salones = {}
+    for fila in filas:
+        salon = salones.setdefault(fila['salon_id'], {
+            'id': fila['salon_id'],
+            'nombre': fila['salon__nombre'],
+            'reservas': [],
+        })
+        salon['reservas'].append({
+            'id': fila['id'],
+            'codigo_evento': fila['codigo_evento'],
+            'estado': fila['estado'],
+            'cantidad_invitados': fila['cantidad_invitados'],
+            'inicio': fila['fecha_evento'],
+            'fin': fila['fecha_fin'],
+            'bloqueo_inicio': fila['bloqueo_inicio'],
+            'bloqueo_fin': fila['bloqueo_fin'],
+            'usuario_username': fila['usuario__username'],
+            'usuario_email': fila['usuario__email'],
+        })
+
+    return {
+        'desde': desde.isoformat(),
+        'hasta': hasta.isoformat(),
+        'total_reservas': sum(len(s['reservas']) for s in salones.values()),
+        'salones': list(salones.values()),
+    }
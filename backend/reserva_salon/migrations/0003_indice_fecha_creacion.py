@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:51
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reserva_salon', '0002_confirmacion_enviada'),
+        ('salon_eventos', '0002_salonevento_estado'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservasalon',
+            index=models.Index(fields=['fecha_creacion', 'id'], name='reserva_salon_creacion_idx'),
+        ),
+    ]
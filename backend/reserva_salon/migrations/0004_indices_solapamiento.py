@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:53
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reserva_salon', '0003_indice_fecha_creacion'),
+        ('salon_eventos', '0002_salonevento_estado'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservasalon',
+            index=models.Index(fields=['salon', 'fecha_evento', 'estado'], name='reserva_salon_solape_idx'),
+        ),
+    ]
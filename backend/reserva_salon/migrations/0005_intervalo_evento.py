@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:21
+
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import F
+
+# Duración asumida para los eventos existentes (valor por defecto de SALON_DURACION_MINUTOS)
+DURACION_EXISTENTES = timedelta(minutes=360)
+
+
+def calcular_intervalos(apps, schema_editor):
+    # Los márgenes de montaje recién creados valen 0: bloqueo = evento
+    ReservaSalon = apps.get_model('reserva_salon', 'ReservaSalon')
+    ReservaSalon.objects.update(
+        fecha_fin=F('fecha_evento') + DURACION_EXISTENTES,
+        bloqueo_inicio=F('fecha_evento'),
+        bloqueo_fin=F('fecha_evento') + DURACION_EXISTENTES,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reserva_salon', '0004_indices_solapamiento'),
+        ('salon_eventos', '0003_margenes_montaje'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reservasalon',
+            name='fecha_fin',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Fin del Evento'),
+        ),
+        migrations.AddField(
+            model_name='reservasalon',
+            name='bloqueo_inicio',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='reservasalon',
+            name='bloqueo_fin',
+            field=models.DateTimeField(editable=False, null=True),
+        ),
+        migrations.RunPython(calcular_intervalos, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='reservasalon',
+            name='fecha_fin',
+            field=models.DateTimeField(blank=True, verbose_name='Fin del Evento'),
+        ),
+        migrations.AlterField(
+            model_name='reservasalon',
+            name='bloqueo_inicio',
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.AlterField(
+            model_name='reservasalon',
+            name='bloqueo_fin',
+            field=models.DateTimeField(editable=False),
+        ),
+        migrations.RemoveIndex(
+            model_name='reservasalon',
+            name='reserva_salon_solape_idx',
+        ),
+        migrations.AddIndex(
+            model_name='reservasalon',
+            index=models.Index(fields=['salon', 'bloqueo_fin', 'bloqueo_inicio', 'estado'], name='reserva_salon_solape_idx'),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:32
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reserva_salon', '0005_intervalo_evento'),
+        ('salon_eventos', '0004_imagen_variantes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reservasalon',
+            index=models.Index(fields=['fecha_evento'], name='reserva_salon_fecha_idx'),
+        ),
+    ]
@@ -1,3 +1,6 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import User
 # Se corrige la importación para que coincida exactamente con salon_eventos/models.py
@@ -5,6 +8,9 @@ from salon_eventos.models import SalonEvento
 from decimal import Decimal
 import uuid
 
+# Duración de un evento cuando no se indica la hora de fin
+DURACION_EVENTO = timedelta(minutes=getattr(settings, 'SALON_DURACION_MINUTOS', 360))
+
 class ReservaSalon(models.Model):
     # ESTADOS DE LA RESERVA
     ESTADO_PENDIENTE = 'pendiente'
@@ -17,6 +23,9 @@ class ReservaSalon(models.Model):
         (ESTADO_CANCELADA, 'Cancelada'),
     ]
 
+    # Estados que ocupan el salón
+    ESTADOS_ACTIVOS = [ESTADO_PENDIENTE, ESTADO_CONFIRMADA]
+
     usuario = models.ForeignKey(
         User, 
         on_delete=models.CASCADE, 
@@ -33,6 +42,12 @@ class ReservaSalon(models.Model):
     )
     
     fecha_evento = models.DateTimeField(verbose_name='Fecha y Hora del Evento')
+    fecha_fin = models.DateTimeField(blank=True, verbose_name='Fin del Evento')
+
+    # Intervalo en que el salón está ocupado: evento + montaje y desmontaje del
+    # salón. Se calcula al guardar y es lo que usan solapamiento y calendario.
+    bloqueo_inicio = models.DateTimeField(editable=False)
+    bloqueo_fin = models.DateTimeField(editable=False)
     cantidad_invitados = models.PositiveIntegerField(verbose_name='Número de Invitados')
     
     # Código único generado automáticamente para el email transaccional
@@ -59,11 +74,42 @@ class ReservaSalon(models.Model):
     
     fecha_creacion = models.DateTimeField(auto_now_add=True)
 
+    # Marca si ya se envió el correo de confirmación (tarea individual o por lotes)
+    confirmacion_enviada = models.BooleanField(default=False)
+
     class Meta:
         db_table = 'reserva_salon'
         verbose_name = 'Reserva de Salón'
         verbose_name_plural = 'Reservas de Salones'
         ordering = ['-fecha_evento']
+        indexes = [
+            # Paginación por cursor: ORDER BY -fecha_creacion, -id
+            models.Index(fields=['fecha_creacion', 'id'], name='reserva_salon_creacion_idx'),
+            # Recálculo del resumen diario por rango [día, día + 1) (usuarios/resumen.py)
+            models.Index(fields=['fecha_evento'], name='reserva_salon_fecha_idx'),
+            # Consulta de solapamiento (reservas_superpuestas). bloqueo_fin va
+            # primero: "fin > inicio pedido" descarta todo el historial pasado.
+            # El calendario también lo usa (un recorrido por salón).
+            models.Index(
+                fields=['salon', 'bloqueo_fin', 'bloqueo_inicio', 'estado'],
+                name='reserva_salon_solape_idx',
+            ),
+        ]
+
+    @classmethod
+    def reservas_superpuestas(cls, salon, inicio, fin):
+        """
+        Reservas activas de `salon` que chocan con un evento en [inicio, fin).
+        Se comparan los intervalos de bloqueo (con montaje y desmontaje) de
+        ambos lados: (StartA < EndB) y (EndA > StartB).
+        """
+        bloqueo_inicio, bloqueo_fin = salon.intervalo_bloqueo(inicio, fin)
+        return cls.objects.filter(
+            salon=salon,
+            estado__in=cls.ESTADOS_ACTIVOS,
+            bloqueo_fin__gt=bloqueo_inicio,
+            bloqueo_inicio__lt=bloqueo_fin,
+        )
 
     def save(self, *args, **kwargs):
         """
@@ -73,7 +119,12 @@ class ReservaSalon(models.Model):
         if not self.codigo_evento:
             self.codigo_evento = f"EVT-{str(uuid.uuid4()).split('-')[0][:6].upper()}"
 
-        # 2. Lógica de cálculo (Opcional: se puede extender si el salón tiene precio base)
+        # 2. Hora de fin e intervalo de bloqueo del salón
+        if not self.fecha_fin:
+            self.fecha_fin = self.fecha_evento + DURACION_EVENTO
+        self.bloqueo_inicio, self.bloqueo_fin = self.salon.intervalo_bloqueo(self.fecha_evento, self.fecha_fin)
+
+        # 3. Lógica de cálculo (Opcional: se puede extender si el salón tiene precio base)
         # if not self.total_reserva and self.salon:
         #     self.total_reserva = getattr(self.salon, 'precio_base', 0.00)
 
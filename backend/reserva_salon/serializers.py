@@ -1,5 +1,10 @@
+import functools
+
+from django.db import transaction
 from rest_framework import serializers
+from salon_eventos.models import SalonEvento
 from .models import ReservaSalon
+from .disponibilidad import conflicto_salon, fin_del_evento
 from django.utils import timezone
 
 class ReservaSalonSerializer(serializers.ModelSerializer):
@@ -13,15 +18,20 @@ class ReservaSalonSerializer(serializers.ModelSerializer):
     
     nombre_salon = serializers.CharField(source='salon.nombre', read_only=True)
 
+    # Alternativa a fecha_fin: duración del evento en minutos
+    duracion_minutos = serializers.IntegerField(write_only=True, required=False, min_value=1)
+
     class Meta:
         model = ReservaSalon
         fields = [
             'id', 'usuario', 'usuario_username', 'usuario_email', # <--- AGREGAR AQUÍ
             'salon', 'nombre_salon', 
-            'fecha_evento', 'cantidad_invitados', 'codigo_evento', 
+            'fecha_evento', 'fecha_fin', 'duracion_minutos', 'bloqueo_inicio', 'bloqueo_fin',
+            'cantidad_invitados', 'codigo_evento', 
             'estado', 'total_reserva', 'fecha_creacion'
         ]
-        read_only_fields = ['usuario', 'codigo_evento', 'fecha_creacion']
+        read_only_fields = ['usuario', 'codigo_evento', 'fecha_creacion', 'bloqueo_inicio', 'bloqueo_fin']
+        extra_kwargs = {'fecha_fin': {'required': False}}
 
     def validate_fecha_evento(self, value):
         if value < timezone.now():
@@ -31,4 +41,65 @@ class ReservaSalonSerializer(serializers.ModelSerializer):
     def validate_cantidad_invitados(self, value):
         if value <= 0:
             raise serializers.ValidationError("El número de invitados debe ser al menos 1.")
-        return value
\ No newline at end of file
+        return value
+
+    def validate(self, data):
+        """
+        Hora de fin (fecha_fin, duracion_minutos o la duración por defecto) y
+        solapamiento con otros eventos del salón, montaje y desmontaje incluidos.
+        """
+        duracion = data.pop('duracion_minutos', None)
+        if self.instance:
+            salon = data.get('salon', self.instance.salon)
+            inicio = data.get('fecha_evento', self.instance.fecha_evento)
+            estado = data.get('estado', self.instance.estado)
+            if 'fecha_fin' not in data and not duracion and 'fecha_evento' in data:
+                # Se mueve el evento conservando su duración
+                data['fecha_fin'] = inicio + (self.instance.fecha_fin - self.instance.fecha_evento)
+            fecha_fin = data.get('fecha_fin', None if duracion else self.instance.fecha_fin)
+        else:
+            salon = data.get('salon')
+            inicio = data.get('fecha_evento')
+            estado = data.get('estado', ReservaSalon.ESTADO_PENDIENTE)
+            fecha_fin = data.get('fecha_fin')
+
+        if not salon or not inicio:
+            return data
+
+        try:
+            data['fecha_fin'] = fin_del_evento(inicio, fecha_fin, duracion)
+        except ValueError as e:
+            raise serializers.ValidationError({"fecha_fin": [str(e)]})
+
+        if estado in ReservaSalon.ESTADOS_ACTIVOS:
+            self._comprobar_salon_libre(salon, inicio, data['fecha_fin'])
+        return data
+
+    def _comprobar_salon_libre(self, salon, inicio, fin):
+        error = conflicto_salon(salon, inicio, fin, excluir_reserva=self.instance)
+        if error:
+            raise serializers.ValidationError({"fecha_evento": [error]})
+
+    def _guardar_con_bloqueo(self, guardar, validated_data):
+        """
+        Dos peticiones simultáneas pueden pasar validate() para el mismo salón:
+        se bloquea la fila del salón (SELECT ... FOR UPDATE) y se vuelve a
+        comprobar antes de guardar. SQLite ya serializa las escrituras.
+        """
+        salon = validated_data.get('salon') or self.instance.salon
+        inicio = validated_data.get('fecha_evento') or self.instance.fecha_evento
+        fin = validated_data.get('fecha_fin') or self.instance.fecha_fin
+        estado = validated_data.get('estado') or (self.instance.estado if self.instance else ReservaSalon.ESTADO_PENDIENTE)
+        with transaction.atomic():
+            salon = SalonEvento.objects.select_for_update().get(pk=salon.pk)
+            if estado in ReservaSalon.ESTADOS_ACTIVOS:
+                self._comprobar_salon_libre(salon, inicio, fin)
+            # El bloqueo se calcula con los márgenes leídos bajo el candado
+            validated_data['salon'] = salon
+            return guardar(validated_data)
+
+    def create(self, validated_data):
+        return self._guardar_con_bloqueo(super().create, validated_data)
+
+    def update(self, instance, validated_data):
+        return self._guardar_con_bloqueo(functools.partial(super().update, instance), validated_data)
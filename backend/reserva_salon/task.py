@@ -1,65 +1,71 @@
 from celery import shared_task
 from celery.utils.log import get_task_logger
-from django.core.mail import send_mail
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
 from .models import ReservaSalon
 from django.conf import settings
-import time
 
 # Configuramos el logger para monitorear la tarea en la terminal de Celery
 logger = get_task_logger(__name__)
 
+def _construir_correo(reserva, connection=None):
+    """
+    Arma el EmailMessage de confirmación de la reserva.
+    Retorna None si el usuario no tiene email configurado.
+    """
+    email_cliente = reserva.usuario.email if (reserva.usuario and reserva.usuario.email) else None
+    if not email_cliente:
+        return None
+
+    # Preparamos los datos del mensaje
+    nombre = reserva.usuario.first_name if reserva.usuario.first_name else reserva.usuario.username
+    asunto = f"Confirmación de Reserva de Salón #{reserva.codigo_evento} - Hotel Indigo"
+    
+    # Formateamos la fecha para que sea legible
+    fecha_legible = reserva.fecha_evento.strftime('%d/%m/%Y %H:%M')
+    
+    mensaje = (
+        f"Hola {nombre},\n\n"
+        f"Tu reserva de salón en Hotel Indigo ha sido confirmada con éxito.\n\n"
+        f"Detalles del Evento:\n"
+        f"  - Código de Evento: {reserva.codigo_evento}\n"
+        f"  - Salón: {reserva.salon.nombre}\n"
+        f"  - Fecha y Hora: {fecha_legible}\n"
+        f"  - Cantidad de Invitados: {reserva.cantidad_invitados}\n"
+        f"  - Total de la Reserva: ${reserva.total_reserva}\n\n"
+        f"Nuestro equipo de eventos se pondrá en contacto contigo a la brevedad para los detalles logísticos.\n\n"
+        f"Gracias por elegir Hotel Indigo."
+    )
+
+    return EmailMessage(asunto, mensaje, settings.DEFAULT_FROM_EMAIL, [email_cliente], connection=connection)
+
+
 @shared_task(bind=True)
 def enviar_email_salon(self, id_reserva):
     """
     Tarea asíncrona para confirmar la reserva del salón de eventos.
     Envía un correo detallado al cliente tras la creación de la reserva.
+    Se encola con transaction.on_commit, por lo que la fila ya existe al ejecutarse.
     """
     logger.info(f"--- [CELERY] Iniciando envío de email para reserva de salón ID: {id_reserva} ---")
     
-    # Pausa de seguridad para garantizar que el registro ya existe en la base de datos
-    time.sleep(1)
-    
+    # Reclamamos la reserva: si ya se confirmó (p. ej. por el envío por lotes) no se repite
+    if not ReservaSalon.objects.filter(pk=id_reserva, confirmacion_enviada=False).update(confirmacion_enviada=True):
+        return f"Omitido: reserva de salón {id_reserva} inexistente o ya confirmada."
+
     try:
         # Obtenemos la reserva cargando el usuario y el salón en una sola consulta
         reserva = ReservaSalon.objects.select_related('usuario', 'salon').get(pk=id_reserva)
         
-        # Validamos si el usuario tiene un correo electrónico configurado
-        email_cliente = reserva.usuario.email if (reserva.usuario and reserva.usuario.email) else None
-        
-        if not email_cliente:
+        correo = _construir_correo(reserva)
+        if correo is None:
             logger.warning(f"El usuario {reserva.usuario.username} no tiene un email configurado.")
             return f"Fallo: Sin email en reserva de salón {id_reserva}"
 
-        # Preparamos los datos del mensaje
-        nombre = reserva.usuario.first_name if reserva.usuario.first_name else reserva.usuario.username
-        asunto = f"Confirmación de Reserva de Salón #{reserva.codigo_evento} - Hotel Indigo"
-        
-        # Formateamos la fecha para que sea legible
-        fecha_legible = reserva.fecha_evento.strftime('%d/%m/%Y %H:%M')
-        
-        mensaje = (
-            f"Hola {nombre},\n\n"
-            f"Tu reserva de salón en Hotel Indigo ha sido confirmada con éxito.\n\n"
-            f"Detalles del Evento:\n"
-            f"  - Código de Evento: {reserva.codigo_evento}\n"
-            f"  - Salón: {reserva.salon.nombre}\n"
-            f"  - Fecha y Hora: {fecha_legible}\n"
-            f"  - Cantidad de Invitados: {reserva.cantidad_invitados}\n"
-            f"  - Total de la Reserva: ${reserva.total_reserva}\n\n"
-            f"Nuestro equipo de eventos se pondrá en contacto contigo a la brevedad para los detalles logísticos.\n\n"
-            f"Gracias por elegir Hotel Indigo."
-        )
-
         # Enviamos el correo electrónico usando la configuración de settings.py
-        send_mail(
-            asunto, 
-            mensaje, 
-            settings.DEFAULT_FROM_EMAIL, 
-            [email_cliente],
-            fail_silently=False
-        )
+        correo.send(fail_silently=False)
         
-        logger.info(f"--- [CELERY] Email enviado exitosamente a {email_cliente} para reserva {reserva.codigo_evento} ---")
+        logger.info(f"--- [CELERY] Email enviado exitosamente a {correo.to[0]} para reserva {reserva.codigo_evento} ---")
         return f"Éxito: Email de salón {reserva.codigo_evento} enviado."
 
     except ReservaSalon.DoesNotExist:
@@ -68,5 +74,65 @@ def enviar_email_salon(self, id_reserva):
     
     except Exception as exc:
         logger.error(f"Error al enviar email de salón: {exc}")
+        # Liberamos la reserva para que el reintento (o el envío por lotes) la tome
+        ReservaSalon.objects.filter(pk=id_reserva).update(confirmacion_enviada=False)
         # Reintento automático: espera 60 segundos antes de intentar de nuevo (máximo 3 veces)
-        raise self.retry(exc=exc, countdown=60, max_retries=3)
\ No newline at end of file
+        raise self.retry(exc=exc, countdown=60, max_retries=3)
+
+
+@shared_task
+def enviar_confirmaciones_salon_pendientes(limite=500):
+    """
+    Variante por lotes: envía todas las confirmaciones pendientes
+    reutilizando una única conexión SMTP (get_connection + send_messages).
+    Recoge las que no se pudieron encolar o agotaron sus reintentos: la
+    programa CELERY_BEAT_SCHEDULE (settings.py) y, sin broker, la ejecuta el
+    comando enviar_confirmaciones_pendientes.
+    """
+    # 1. Reclamar el lote (SKIP LOCKED en PostgreSQL; SQLite lo ignora)
+    with transaction.atomic():
+        ids = list(
+            ReservaSalon.objects.select_for_update(skip_locked=True)
+            .filter(confirmacion_enviada=False)
+            .order_by('id')
+            .values_list('id', flat=True)[:limite]
+        )
+        if not ids:
+            return "Sin confirmaciones de salón pendientes."
+        ReservaSalon.objects.filter(id__in=ids).update(confirmacion_enviada=True)
+
+    # 2. Enviar todo por la misma conexión; los fallos vuelven a quedar pendientes
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        # No se pudo abrir la conexión SMTP: todo el lote vuelve a quedar pendiente
+        logger.error(f"Error de conexión SMTP en lote de salones: {exc}")
+        ReservaSalon.objects.filter(id__in=ids).update(confirmacion_enviada=False)
+        return f"Error: conexión SMTP no disponible ({exc})."
+
+    fallidos = []
+    enviados = 0
+    try:
+        for reserva in ReservaSalon.objects.select_related('usuario', 'salon').filter(id__in=ids):
+            try:
+                correo = _construir_correo(reserva, connection=connection)
+                if correo is None:
+                    logger.warning(f"Reserva de salón {reserva.codigo_evento} sin email; se omite.")
+                    continue
+                enviados += connection.send_messages([correo])
+            except Exception as exc:
+                logger.error(f"Error al enviar email de salón {reserva.codigo_evento}: {exc}")
+                fallidos.append(reserva.pk)
+    finally:
+        # Lo enviado ya salió: un error al cerrar (QUIT) no devuelve nada a pendientes
+        try:
+            connection.close()
+        except Exception as exc:
+            logger.warning(f"Error al cerrar la conexión SMTP del lote de salones: {exc}")
+
+    if fallidos:
+        ReservaSalon.objects.filter(id__in=fallidos).update(confirmacion_enviada=False)
+
+    logger.info(f"--- [CELERY] Lote de salones: {enviados} enviados, {len(fallidos)} fallidos ---")
+    return f"Lote de salones: {enviados} enviados, {len(fallidos)} fallidos."
@@ -0,0 +1,149 @@
+from datetime import date, datetime, timedelta
+from smtplib import SMTPException
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from salon_eventos.models import SalonEvento
+from . import task
+from .disponibilidad import calendario_salones, conflicto_salon, fin_del_evento
+from .models import ReservaSalon
+from .serializers import ReservaSalonSerializer
+
+
+def hora(h, m=0, dia=date(2030, 6, 15)):
+    return timezone.make_aware(datetime(dia.year, dia.month, dia.day, h, m))
+
+
+class ConflictosSalonTest(TestCase):
+
+    def setUp(self):
+        self.usuario = User.objects.create_user('organizador', 'organizador@test.com', 'x')
+        # Una hora de montaje antes y media de desmontaje después
+        self.salon = SalonEvento.objects.create(nombre='Imperial', montaje_minutos=60, desmontaje_minutos=30)
+        self.otro = SalonEvento.objects.create(nombre='Jardín')
+        self.evento = self.reservar(self.salon, hora(14), hora(18))
+
+    def reservar(self, salon, inicio, fin, estado=ReservaSalon.ESTADO_CONFIRMADA):
+        return ReservaSalon.objects.create(
+            usuario=self.usuario, salon=salon, fecha_evento=inicio, fecha_fin=fin,
+            cantidad_invitados=50, estado=estado,
+        )
+
+    def test_bloqueo_incluye_montaje_y_desmontaje(self):
+        self.assertEqual((self.evento.bloqueo_inicio, self.evento.bloqueo_fin), (hora(13), hora(18, 30)))
+        # 19:00 con una hora de montaje empieza a bloquear a las 18:00
+        self.assertIsNotNone(conflicto_salon(self.salon, hora(19), hora(21)))
+        self.assertIsNone(conflicto_salon(self.salon, hora(19, 30), hora(21)))
+        # Por delante: el evento acaba a las 12:00, desmonta hasta las 12:30 y el de las 14:00 monta desde las 13:00
+        self.assertIsNone(conflicto_salon(self.salon, hora(9), hora(12)))
+        self.assertIsNotNone(conflicto_salon(self.salon, hora(9), hora(12, 31)))
+
+    def test_canceladas_y_otros_salones_no_chocan(self):
+        self.assertIsNone(conflicto_salon(self.otro, hora(14), hora(18)))
+        self.evento.estado = ReservaSalon.ESTADO_CANCELADA
+        self.evento.save()
+        self.assertIsNone(conflicto_salon(self.salon, hora(14), hora(18)))
+
+    def test_mover_un_evento_no_choca_consigo_mismo(self):
+        serializer = ReservaSalonSerializer(self.evento, data={'fecha_evento': hora(15).isoformat()}, partial=True)
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        evento = serializer.save()
+        # Conserva su duración
+        self.assertEqual(evento.fecha_fin, hora(19))
+
+        choque = self.reservar(self.salon, hora(21), hora(23))
+        serializer = ReservaSalonSerializer(choque, data={'fecha_evento': hora(19, 30).isoformat()}, partial=True)
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('fecha_evento', serializer.errors)
+
+    def test_hora_de_fin(self):
+        self.assertEqual(fin_del_evento(hora(10), duracion_minutos=90), hora(11, 30))
+        with self.assertRaises(ValueError):
+            fin_del_evento(hora(10), hora(10))
+        with self.assertRaises(ValueError):
+            fin_del_evento(hora(10), hora(10) + timedelta(days=2))
+
+    def test_calendario(self):
+        self.reservar(self.otro, hora(10, dia=date(2030, 6, 16)), hora(12, dia=date(2030, 6, 16)))
+        self.reservar(self.otro, hora(10, dia=date(2030, 6, 20)), hora(12, dia=date(2030, 6, 20)))
+        calendario = calendario_salones(date(2030, 6, 15), date(2030, 6, 16))
+        self.assertEqual(calendario['total_reservas'], 2)
+        self.assertEqual([s['nombre'] for s in calendario['salones']], ['Imperial', 'Jardín'])
+
+        client = APIClient()
+        client.force_authenticate(self.usuario)
+        url = reverse('reserva-salon-calendario')
+        self.assertEqual(client.get(url, {'desde': '2030-06-15'}).status_code, 403)
+        self.usuario.is_staff = True
+        self.usuario.save()
+        self.assertEqual(client.get(url, {'desde': '2030-06-15', 'hasta': '2030-06-14'}).status_code, 400)
+        self.assertEqual(client.get(url, {'desde': '2030-06-15'}).data['total_reservas'], 3)
+
+
+class ConfirmacionesPorLotesTest(TestCase):
+
+    def setUp(self):
+        self.usuario = User.objects.create_user('organizador', 'organizador@test.com', 'x')
+        self.salon = SalonEvento.objects.create(nombre='Imperial')
+        self.reservas = [
+            ReservaSalon.objects.create(
+                usuario=self.usuario, salon=self.salon, fecha_evento=hora(10 + 4 * i), fecha_fin=hora(12 + 4 * i),
+                cantidad_invitados=20,
+            )
+            for i in range(3)
+        ]
+
+    def pendientes(self):
+        return set(ReservaSalon.objects.filter(confirmacion_enviada=False).values_list('pk', flat=True))
+
+    def test_un_lote_una_conexion(self):
+        # Ya confirmada (p. ej. por la tarea individual): no se repite
+        ReservaSalon.objects.filter(pk=self.reservas[0].pk).update(confirmacion_enviada=True)
+        with mock.patch.object(task, 'get_connection', wraps=task.get_connection) as get_connection:
+            task.enviar_confirmaciones_salon_pendientes()
+        get_connection.assert_called_once()
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(self.pendientes(), set())
+
+        # Nada pendiente: ni siquiera abre conexión
+        with mock.patch.object(task, 'get_connection') as get_connection:
+            task.enviar_confirmaciones_salon_pendientes()
+        get_connection.assert_not_called()
+
+    def test_fallos_vuelven_a_pendientes(self):
+        enviar = EmailBackend.send_messages
+
+        def falla_la_segunda(backend, mensajes):
+            if str(self.reservas[1].codigo_evento) in mensajes[0].subject:
+                raise SMTPException('550')
+            return enviar(backend, mensajes)
+
+        with mock.patch.object(EmailBackend, 'send_messages', falla_la_segunda):
+            task.enviar_confirmaciones_salon_pendientes()
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(self.pendientes(), {self.reservas[1].pk})
+
+    def test_sin_conexion_todo_el_lote_queda_pendiente(self):
+        with mock.patch.object(EmailBackend, 'open', side_effect=SMTPException('sin servidor')):
+            task.enviar_confirmaciones_salon_pendientes()
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(self.pendientes(), {r.pk for r in self.reservas})
+
+    def test_error_al_cerrar_no_reenvia(self):
+        with mock.patch.object(EmailBackend, 'close', side_effect=SMTPException('QUIT')):
+            task.enviar_confirmaciones_salon_pendientes()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(self.pendientes(), set())
+
+    def test_comando_sin_broker(self):
+        call_command('enviar_confirmaciones_pendientes', '--una-vez', stdout=mock.Mock())
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(self.pendientes(), set())
@@ -1,14 +1,21 @@
-import random
-import os
-import requests
 import logging
-from rest_framework import viewsets, permissions, status
-from rest_framework.decorators import api_view, permission_classes
+from datetime import timedelta
+from django.db import transaction
+from django.utils.dateparse import parse_date
+from rest_framework import viewsets, permissions, serializers, status
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
-from django.contrib.sessions.backends.db import SessionStore
+from salon_eventos.models import SalonEvento
+from .disponibilidad import CALENDARIO_MAXIMO_DIAS, calendario_salones, conflicto_salon, fin_del_evento
 from .models import ReservaSalon
 from .serializers import ReservaSalonSerializer
 from .task import enviar_email_salon
+from usuarios.correo import encolar_correo
+from usuarios.paginacion import CursorPaginacion
+from usuarios.permissions import get_user_role
+from usuarios.otp import (
+    OTP_RESERVA_SALON, OTP_VALIDO, emitir_codigo, verificar_codigo, invalidar_codigo, sujeto_usuario
+)
 
 logger = logging.getLogger(__name__)
 
@@ -19,69 +26,54 @@ def solicitar_codigo_salon(request):
     user = request.user
     data = request.data
     
-    # 1. Validar Disponibilidad
+    # 1. Validar Disponibilidad (intervalo del evento + montaje y desmontaje)
     salon_id = data.get('salon_id')
     fecha_evento = data.get('fecha_evento') # Formato "YYYY-MM-DDTHH:MM"
 
     if salon_id and fecha_evento:
-        # Verifica si ya existe una reserva en esa fecha exacta
-        ocupado = ReservaSalon.objects.filter(
-            salon_id=salon_id,
-            fecha_evento=fecha_evento,
-            estado__in=['pendiente', 'confirmada']
-        ).exists()
-
-        if ocupado:
-            return Response(
-                {"error": "El salón ya está reservado para esa fecha y hora."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        campo_fecha = serializers.DateTimeField()
+        try:
+            inicio = campo_fecha.to_internal_value(fecha_evento)
+            fecha_fin = data.get('fecha_fin')
+            fecha_fin = campo_fecha.to_internal_value(fecha_fin) if fecha_fin else None
+            duracion = int(data.get('duracion_minutos') or 0)
+            fin = fin_del_evento(inicio, fecha_fin, duracion)
+        except serializers.ValidationError:
+            return Response({"error": "Formato de fecha inválido."}, status=status.HTTP_400_BAD_REQUEST)
+        except ValueError as e:
+            return Response({"error": str(e) or "Duración inválida."}, status=status.HTTP_400_BAD_REQUEST)
 
-    # 2. Generar Código OTP
-    codigo = str(random.randint(100000, 999999))
-    
-    # Guardar en sesión
-    request.session['reserva_salon_otp'] = codigo
-    request.session.save()
+        salon = SalonEvento.objects.filter(pk=salon_id).first()
+        if salon is None:
+            return Response({"error": "El salón no existe."}, status=status.HTTP_400_BAD_REQUEST)
+
+        error = conflicto_salon(salon, inicio, fin)
+        if error:
+            return Response({"error": error}, status=status.HTTP_400_BAD_REQUEST)
+
+    # 2. Generar Código OTP (en caché con TTL, ligado al usuario)
+    sujeto, codigo = emitir_codigo(OTP_RESERVA_SALON, sujeto_usuario(user))
     
     print(f"DEBUG: Código Salón para {user.username}: {codigo}")
 
-    # 3. Enviar Email (Lógica EmailJS)
+    # 3. Enviar Email (bandeja de salida; lo envía el despachador)
     try:
-        service_id = os.environ.get("EMAILJS_SERVICE_ID")
-        template_id = os.environ.get("EMAILJS_TEMPLATE_ID")
-        user_id = os.environ.get("EMAILJS_USER_ID")
-        private_key = os.environ.get("EMAILJS_PRIVATE_KEY")
-
-        if all([service_id, template_id, user_id, private_key]):
-            url = "https://api.emailjs.com/api/v1.0/email/send"
-            payload = {
-                "service_id": service_id,
-                "template_id": template_id,
-                "user_id": user_id,
-                "accessToken": private_key,
-                "template_params": {
-                    "to_name": user.first_name,
-                    "to_email": user.email,
-                    "message": codigo,
-                    "reply_to": "eventos@hotel.com"
-                }
-            }
-            requests.post(url, json=payload, headers={"Content-Type": "application/json"})
+        encolar_correo(user.email, codigo, nombre=user.first_name, responder_a="eventos@hotel.com")
 
         return Response({
             'message': 'Código enviado.',
-            'session_key_manual': request.session.session_key 
+            'session_key_manual': sujeto 
         })
     except Exception as e:
         logger.error(f"Error enviando OTP: {e}")
-        return Response({'message': 'Código generado.', 'session_key_manual': request.session.session_key})
+        return Response({'message': 'Código generado.', 'session_key_manual': sujeto})
 
 
 # --- PARTE 2: CREAR RESERVA (Validación OTP + FILTRO DE SEGURIDAD) ---
 class ReservaSalonViewSet(viewsets.ModelViewSet):
     serializer_class = ReservaSalonSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CursorPaginacion
 
     def get_queryset(self):
         """
@@ -92,49 +84,85 @@ class ReservaSalonViewSet(viewsets.ModelViewSet):
         user = self.request.user
         
         # Verificación por Staff o por Rol en Perfil
-        if user.is_staff or (hasattr(user, 'perfil') and user.perfil.rol in ['ADMINISTRADOR', 'RECEPCIONISTA']):
+        if user.is_staff or get_user_role(user) in ['ADMINISTRADOR', 'RECEPCIONISTA']:
             return ReservaSalon.objects.all().select_related('usuario', 'salon')
             
         return ReservaSalon.objects.filter(usuario=user).select_related('usuario', 'salon')
 
+    @action(detail=False, methods=['get'], pagination_class=None)
+    def calendario(self, request):
+        """
+        Tablero de eventos (solo personal): reservas activas de todos los
+        salones entre dos fechas, en una sola consulta.
+        ?desde=YYYY-MM-DD (obligatorio) &hasta=YYYY-MM-DD (por defecto desde + 6 días) &salon=<id>
+        """
+        user = request.user
+        if not (user.is_staff or get_user_role(user) in ['ADMINISTRADOR', 'RECEPCIONISTA']):
+            return Response({'error': 'No autorizado.'}, status=status.HTTP_403_FORBIDDEN)
+
+        try:
+            desde = parse_date(request.query_params.get('desde') or '')
+            hasta = parse_date(request.query_params.get('hasta') or desde.isoformat()) if desde else None
+        except ValueError:
+            desde = hasta = None
+        if not desde or not hasta:
+            return Response({'error': 'Debe indicar las fechas con formato YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+        if 'hasta' not in request.query_params:
+            hasta = desde + timedelta(days=6)
+        if hasta < desde or (hasta - desde).days >= CALENDARIO_MAXIMO_DIAS:
+            return Response(
+                {'error': f'El rango debe ser de 1 a {CALENDARIO_MAXIMO_DIAS} días.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        salon_id = request.query_params.get('salon')
+        if salon_id:
+            try:
+                salon_id = int(salon_id)
+            except ValueError:
+                return Response({'error': 'El salón debe ser un entero.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(calendario_salones(desde, hasta, salon_id or None))
+
     def create(self, request, *args, **kwargs):
-        # 1. Validar que el código enviado coincida con la sesión
         codigo_ingresado = request.data.get('codigo_verificacion')
-        manual_key = request.data.get('session_key_manual')
-        
-        # Recuperar código real de la sesión
-        codigo_real = request.session.get('reserva_salon_otp')
-        
-        # Intento de recuperación manual si la cookie falló
-        if not codigo_real and manual_key:
-            try:
-                s = SessionStore(session_key=manual_key)
-                codigo_real = s.get('reserva_salon_otp')
-            except: pass
 
-        # Si se envió código, debe coincidir
+        # Primero los datos (incluye el choque de horarios): una solicitud
+        # inválida no debe gastar el código del usuario
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        # Si se envió código, debe coincidir con el emitido para este usuario
         if codigo_ingresado:
-            if not codigo_real or str(codigo_ingresado) != str(codigo_real):
+            resultado, _ = verificar_codigo(
+                OTP_RESERVA_SALON, sujeto_usuario(request.user), codigo_ingresado, consumir=False
+            )
+            if resultado != OTP_VALIDO:
                 return Response(
                     {"detail": "Código de verificación incorrecto o expirado."}, 
                     status=status.HTTP_400_BAD_REQUEST
                 )
-        
-        return super().create(request, *args, **kwargs)
+
+        self.perform_create(serializer)
+
+        # El código se gasta solo con la reserva ya guardada
+        if codigo_ingresado:
+            invalidar_codigo(OTP_RESERVA_SALON, sujeto_usuario(request.user))
+
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
     def perform_create(self, serializer):
         # Guardar la reserva asignando el usuario actual
         instance = serializer.save(usuario=self.request.user)
         
-        # Limpiar OTP de sesión
-        try:
-            if 'reserva_salon_otp' in self.request.session:
-                del self.request.session['reserva_salon_otp']
-        except: pass
+        # Enviar correo de confirmación (Celery) solo cuando la fila ya está confirmada en BD
+        transaction.on_commit(lambda: _encolar_confirmacion(instance.pk), robust=True)
 
-        # Enviar correo de confirmación (Celery)
-        try:
-            print(f"DEBUG: Reserva Salón creada. Enviando a Celery...")
-            enviar_email_salon.delay(instance.pk)
-        except Exception as e:
-            logger.error(f"Error Celery: {e}")
\ No newline at end of file
+
+def _encolar_confirmacion(id_reserva):
+    try:
+        print(f"DEBUG: Reserva Salón creada. Enviando a Celery...")
+        enviar_email_salon.delay(id_reserva)
+    except Exception as e:
+        logger.error(f"Error Celery: {e}")
\ No newline at end of file
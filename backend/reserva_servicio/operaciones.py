@@ -0,0 +1,33 @@
+# reserva_servicio/operaciones.py
+
+from django.db import transaction
+from .models import ServicioReserva
+from .signals import programar_recalculo
+
+
+def agregar_servicios(reserva, items):
+    """
+    Añade varios servicios a una reserva con un solo INSERT y un solo
+    recálculo del total.
+
+    `items` es una lista de dicts con las claves 'servicio' (ServicioAdicional),
+    'cantidad' (opcional, 1 por defecto) y 'notas_cliente' (opcional).
+    """
+    nuevos = [
+        ServicioReserva(
+            reserva_habitacion=reserva,
+            servicio=item['servicio'],
+            cantidad=item.get('cantidad') or 1,
+            notas_cliente=item.get('notas_cliente'),
+            # Precio capturado al momento de la reserva (igual que en save())
+            precio_unitario=item['servicio'].precio,
+        )
+        for item in items
+    ]
+
+    with transaction.atomic():
+        # bulk_create no dispara post_save: programamos el recálculo a mano
+        creados = ServicioReserva.objects.bulk_create(nuevos)
+        programar_recalculo(reserva.pk)
+
+    return creados
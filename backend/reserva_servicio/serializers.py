@@ -2,6 +2,8 @@
 
 from rest_framework import serializers
 from .models import ServicioReserva
+from reserva_habitacion.models import ReservaHabitacion
+from servicio_adicional.models import ServicioAdicional
 
 class ServicioReservaSerializer(serializers.ModelSerializer):
     
@@ -10,4 +12,48 @@ class ServicioReservaSerializer(serializers.ModelSerializer):
     class Meta:
         model = ServicioReserva
         fields = ['id', 'reserva_habitacion', 'servicio', 'nombre_servicio', 'cantidad', 'precio_unitario', 'notas_cliente'] # <-- ¡CAMPO AÑADIDO!
-        read_only_fields = ['precio_unitario']
\ No newline at end of file
+        read_only_fields = ['precio_unitario']
+
+class ServicioReservaLoteSerializer(serializers.Serializer):
+    """
+    Entrada para añadir varios servicios a una reserva en una sola petición:
+    {"reserva_habitacion": 1, "servicios": [{"servicio": 2, "cantidad": 1, "notas_cliente": ""}]}
+    """
+    reserva_habitacion = serializers.PrimaryKeyRelatedField(queryset=ReservaHabitacion.objects.all())
+    servicios = serializers.ListField(child=serializers.DictField(), allow_empty=False)
+
+    def validate_servicios(self, value):
+        try:
+            ids = [int(item['servicio']) for item in value]
+            cantidades = [int(item.get('cantidad') or 1) for item in value]
+        except (KeyError, TypeError, ValueError):
+            raise serializers.ValidationError("Cada elemento debe indicar un 'servicio' y una 'cantidad' numéricos.")
+
+        if len(set(ids)) != len(ids):
+            raise serializers.ValidationError("Un servicio no puede repetirse en la misma reserva.")
+        if any(cantidad <= 0 for cantidad in cantidades):
+            raise serializers.ValidationError("La cantidad debe ser al menos 1.")
+
+        # Una sola consulta para todos los servicios del lote
+        catalogo = ServicioAdicional.objects.filter(activo=True).in_bulk(ids)
+        faltantes = [i for i in ids if i not in catalogo]
+        if faltantes:
+            raise serializers.ValidationError(f"Servicios no válidos o inactivos: {faltantes}")
+
+        return [
+            {
+                'servicio': catalogo[servicio_id],
+                'cantidad': cantidad,
+                'notas_cliente': item.get('notas_cliente'),
+            }
+            for servicio_id, cantidad, item in zip(ids, cantidades, value)
+        ]
+
+    def validate(self, data):
+        reserva = data['reserva_habitacion']
+        ids = [item['servicio'].pk for item in data['servicios']]
+        if reserva.servicios_solicitados.filter(servicio_id__in=ids).exists():
+            raise serializers.ValidationError({
+                'servicios': 'Alguno de los servicios ya está añadido a esta reserva.'
+            })
+        return data
@@ -4,10 +4,13 @@ from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from .models import ServicioReserva
 from reserva_habitacion.models import ReservaHabitacion
-from tarifa_dinamica.models import TarifaDinamica
+from tarifa_dinamica.precios import precios_por_noche, calcular_total_estancia
+from usuarios.models import ResumenDiario
+from usuarios.resumen import actualizar_resumen_fechas
 from decimal import Decimal
 import datetime 
-from django.db import models
+import functools
+from django.db import models, transaction
 
 # =========================================================
 # LÓGICA DE CÁLCULO DE TOTAL (Necesaria para recalcular total de la reserva padre)
@@ -15,16 +18,8 @@ from django.db import models
 
 def calcular_precio_diario(habitacion, fecha):
     """ Busca la tarifa dinámica aplicable para una habitación en una fecha dada. """
-    try:
-        tarifa = TarifaDinamica.objects.get(
-            habitacion=habitacion,
-            fecha_inicio__lte=fecha,
-            fecha_fin__gte=fecha
-        )
-        precio_final = tarifa.precio * (Decimal(1) - tarifa.descuento / Decimal(100))
-        return precio_final
-    except TarifaDinamica.DoesNotExist:
-        return habitacion.precio_base
+    noches = precios_por_noche(habitacion, fecha, fecha + datetime.timedelta(days=1))
+    return noches[0][1] if noches else habitacion.precio_base
 
 def recalcular_total_reserva(reserva_habitacion_pk):
     """
@@ -35,14 +30,10 @@ def recalcular_total_reserva(reserva_habitacion_pk):
     except ReservaHabitacion.DoesNotExist:
         return # Si la reserva ya fue eliminada, no hace nada
 
-    # 1. Calcular Total Habitación
-    total_habitacion = Decimal(0)
-    delta = reserva.fecha_checkout - reserva.fecha_checkin
-    
-    for i in range(delta.days):
-        fecha_noche = reserva.fecha_checkin + datetime.timedelta(days=i)
-        precio_noche = calcular_precio_diario(reserva.habitacion, fecha_noche)
-        total_habitacion += precio_noche
+    # 1. Calcular Total Habitación (una sola consulta de tarifas para toda la estancia)
+    total_habitacion = calcular_total_estancia(
+        reserva.habitacion, reserva.fecha_checkin, reserva.fecha_checkout
+    )
 
     # 2. Calcular Total Servicios
     total_servicios = reserva.servicios_solicitados.aggregate(
@@ -55,6 +46,35 @@ def recalcular_total_reserva(reserva_habitacion_pk):
     # Usamos update para evitar la llamada recursiva a save()
     ReservaHabitacion.objects.filter(pk=reserva.pk).update(total=nuevo_total)
 
+    # update() no dispara señales: refrescamos el día en el resumen del Dashboard
+    actualizar_resumen_fechas(ResumenDiario.LINEA_HABITACION, [reserva.fecha_checkin])
+
+
+# =========================================================
+# RECÁLCULO DIFERIDO Y DEDUPLICADO
+# =========================================================
+# Cada cambio en ServicioReserva solo agenda el recálculo para cuando se
+# confirme la transacción, una sola vez por reserva aunque se hayan añadido
+# o eliminado varios servicios dentro de ella. Para saber si ya está agendado
+# se mira la propia cola on_commit de la conexión: Django la vacía (o quita
+# lo del savepoint) al hacer rollback, así no queda ningún estado colgado.
+
+def _recalculo_agendado(conexion, reserva_habitacion_pk):
+    return any(
+        getattr(funcion, 'func', None) is recalcular_total_reserva and funcion.args == (reserva_habitacion_pk,)
+        for _, funcion, _ in conexion.run_on_commit
+    )
+
+def programar_recalculo(reserva_habitacion_pk):
+    """
+    Agenda el recálculo del total para cuando se confirme la transacción actual.
+    Fuera de una transacción (autocommit) se ejecuta de inmediato.
+    """
+    conexion = transaction.get_connection()
+    if conexion.in_atomic_block and _recalculo_agendado(conexion, reserva_habitacion_pk):
+        return
+    transaction.on_commit(functools.partial(recalcular_total_reserva, reserva_habitacion_pk))
+
 
 @receiver(post_save, sender=ServicioReserva)
 @receiver(post_delete, sender=ServicioReserva)
@@ -62,5 +82,5 @@ def actualizar_total_reserva_signal(sender, instance, **kwargs):
     """
     Se dispara al guardar o eliminar un ServicioReserva.
     """
-    # Llama a la función de recálculo con el PK de la reserva padre
-    recalcular_total_reserva(instance.reserva_habitacion.pk)
\ No newline at end of file
+    # Agenda el recálculo con el PK de la reserva padre (sin cargarla)
+    programar_recalculo(instance.reserva_habitacion_id)
@@ -0,0 +1,43 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.test import TestCase
+
+from habitacion.models import Habitacion
+from reserva_habitacion.models import ReservaHabitacion
+from servicio_adicional.models import ServicioAdicional
+from .models import ServicioReserva
+
+
+class RecalculoTotalTest(TestCase):
+
+    def setUp(self):
+        habitacion = Habitacion.objects.create(numero_habitacion='S1', precio_base=Decimal('100'))
+        self.reserva = ReservaHabitacion.objects.create(
+            habitacion=habitacion, fecha_checkin=date(2030, 3, 1), fecha_checkout=date(2030, 3, 3),
+        )
+        self.spa = ServicioAdicional.objects.create(nombre='Spa', tipo=ServicioAdicional.TIPO_SPA, precio=Decimal('30'))
+        self.cena = ServicioAdicional.objects.create(nombre='Cena', tipo=ServicioAdicional.TIPO_OTRO, precio=Decimal('20'))
+
+    def total(self):
+        return ReservaHabitacion.objects.get(pk=self.reserva.pk).total
+
+    def test_un_recalculo_por_transaccion(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            ServicioReserva.objects.create(reserva_habitacion=self.reserva, servicio=self.spa, cantidad=2)
+            ServicioReserva.objects.create(reserva_habitacion=self.reserva, servicio=self.cena)
+        recalculos = [c for c in callbacks if getattr(c, 'args', None) == (self.reserva.pk,)]
+        self.assertEqual(len(recalculos), 1)
+        self.assertEqual(self.total(), Decimal('280'))
+
+    def test_rollback_no_impide_recalculos_posteriores(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    ServicioReserva.objects.create(reserva_habitacion=self.reserva, servicio=self.spa)
+                    raise ValueError
+            except ValueError:
+                pass
+            ServicioReserva.objects.create(reserva_habitacion=self.reserva, servicio=self.cena)
+        self.assertEqual(self.total(), Decimal('220'))
@@ -1,8 +1,11 @@
 # reserva_servicio/views.py (CORREGIDO)
 
-from rest_framework import viewsets
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from .models import ServicioReserva
-from .serializers import ServicioReservaSerializer
+from .serializers import ServicioReservaSerializer, ServicioReservaLoteSerializer
+from .operaciones import agregar_servicios
 # Importamos todos los permisos relevantes
 from usuarios.permissions import IsAdministrador, IsRecepcionista, IsOwnerOrAdmin
 from rest_framework import permissions
@@ -43,4 +46,25 @@ class ServicioReservaViewSet(viewsets.ModelViewSet):
         else:
             self.permission_classes = [permissions.IsAuthenticated]
             
-        return super().get_permissions()
\ No newline at end of file
+        return super().get_permissions()
+
+    # 3. Alta masiva: varios servicios, un INSERT y un único recálculo del total
+    @action(detail=False, methods=['post'])
+    def agregar_lote(self, request):
+        serializer = ServicioReservaLoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        reserva = serializer.validated_data['reserva_habitacion']
+
+        # El cliente solo puede añadir servicios a SUS PROPIAS reservas
+        es_staff = IsRecepcionista().has_permission(request, self)
+        if not es_staff and reserva.usuario_id != request.user.id:
+            return Response(
+                {'detail': 'No tiene permiso para modificar esta reserva.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        creados = agregar_servicios(reserva, serializer.validated_data['servicios'])
+        return Response(
+            ServicioReservaSerializer(creados, many=True).data,
+            status=status.HTTP_201_CREATED
+        )
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class RestauranteMesaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'restaurante_mesa'
+
+    def ready(self):
+        # Variantes de imágenes
+        import restaurante_mesa.signals
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurante_mesa', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='restaurantemesa',
+            name='adyacentes',
+            field=models.ManyToManyField(blank=True, to='restaurante_mesa.restaurantemesa', verbose_name='Mesas adyacentes (combinables)'),
+        ),
+    ]
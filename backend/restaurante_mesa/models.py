@@ -6,6 +6,10 @@ class RestauranteMesa(models.Model):
     numero_mesa = models.TextField(null=True)
     capacidad = models.IntegerField(null=True)
     imagen = models.ImageField(upload_to='mesas/', null=True, blank=True, verbose_name='Imagen de la mesa')
+    # Rutas y tamaños de las variantes thumb/card/hero (usuarios/imagenes.py)
+    imagen_variantes = models.JSONField(default=dict, blank=True, editable=False)
+    # Mesas contiguas que se pueden juntar para un grupo grande (relación simétrica)
+    adyacentes = models.ManyToManyField('self', blank=True, verbose_name='Mesas adyacentes (combinables)')
 
     class Meta:
         db_table = 'restaurante_mesa'
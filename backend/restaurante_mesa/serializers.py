@@ -1,13 +1,15 @@
 from rest_framework import serializers
+from usuarios.imagenes import VariantesImagenField
 from .models import RestauranteMesa  # <--- Fíjate que importamos el modelo de la MESA
 
 class RestauranteMesaSerializer(serializers.ModelSerializer):
     # Campo extra para devolver la URL completa de la imagen al frontend
     imagen_url = serializers.SerializerMethodField()
+    imagen_variantes = VariantesImagenField()
 
     class Meta:
         model = RestauranteMesa
-        fields = ['id', 'numero_mesa', 'capacidad', 'imagen', 'imagen_url']
+        fields = ['id', 'numero_mesa', 'capacidad', 'imagen', 'imagen_url', 'imagen_variantes', 'adyacentes']
 
     def get_imagen_url(self, obj):
         request = self.context.get('request')
@@ -0,0 +1,6 @@
+# restaurante_mesa/signals.py
+
+from usuarios.imagenes import conectar_variantes
+from .models import RestauranteMesa
+
+conectar_variantes(RestauranteMesa)
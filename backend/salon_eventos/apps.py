@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class SalonEventosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'salon_eventos'
+
+    def ready(self):
+        # Invalidación de la caché de catálogo y variantes de imágenes
+        import salon_eventos.signals
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salon_eventos', '0002_salonevento_estado'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salonevento',
+            name='montaje_minutos',
+            field=models.PositiveIntegerField(default=0, verbose_name='Montaje (minutos)'),
+        ),
+        migrations.AddField(
+            model_name='salonevento',
+            name='desmontaje_minutos',
+            field=models.PositiveIntegerField(default=0, verbose_name='Desmontaje (minutos)'),
+        ),
+    ]
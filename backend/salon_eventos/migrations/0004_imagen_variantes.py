@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('salon_eventos', '0003_margenes_montaje'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salonevento',
+            name='imagen_variantes',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
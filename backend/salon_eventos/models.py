@@ -1,4 +1,7 @@
+from datetime import timedelta
+
 from django.db import models
+from django.utils import timezone
 
 class SalonEvento(models.Model):
     # Opciones de Estado (Coinciden con el Frontend)
@@ -30,10 +33,32 @@ class SalonEvento(models.Model):
         blank=True, 
         verbose_name='Imagen del salón'
     )
+    # Rutas y tamaños de las variantes thumb/card/hero (usuarios/imagenes.py)
+    imagen_variantes = models.JSONField(default=dict, blank=True, editable=False)
+
+    # Tiempo que el salón queda bloqueado antes y después de cada evento
+    montaje_minutos = models.PositiveIntegerField(default=0, verbose_name='Montaje (minutos)')
+    desmontaje_minutos = models.PositiveIntegerField(default=0, verbose_name='Desmontaje (minutos)')
 
     class Meta:
         db_table = 'salon_eventos'
         managed = True
 
     def __str__(self):
-        return f"{self.nombre} ({self.get_estado_display()})"
\ No newline at end of file
+        return f"{self.nombre} ({self.get_estado_display()})"
+
+    def intervalo_bloqueo(self, inicio, fin):
+        """Intervalo [inicio, fin) de un evento ampliado con montaje y desmontaje."""
+        return (
+            inicio - timedelta(minutes=self.montaje_minutos),
+            fin + timedelta(minutes=self.desmontaje_minutos),
+        )
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Los márgenes pueden haber cambiado: se recalcula el bloqueo de los
+        # eventos que aún no terminan (una sola UPDATE)
+        self.reservas.filter(fecha_fin__gte=timezone.now()).update(
+            bloqueo_inicio=models.F('fecha_evento') - timedelta(minutes=self.montaje_minutos),
+            bloqueo_fin=models.F('fecha_fin') + timedelta(minutes=self.desmontaje_minutos),
+        )
\ No newline at end of file
@@ -1,8 +1,10 @@
 from rest_framework import serializers
+from usuarios.imagenes import VariantesImagenField
 from .models import SalonEvento
 
 class SalonEventoSerializer(serializers.ModelSerializer):
     imagen_url = serializers.SerializerMethodField()
+    imagen_variantes = VariantesImagenField()
     
     class Meta:
         model = SalonEvento
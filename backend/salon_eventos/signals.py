@@ -0,0 +1,8 @@
+# salon_eventos/signals.py
+
+from backend.cache_respuestas import conectar_invalidacion
+from usuarios.imagenes import conectar_variantes
+from .models import SalonEvento
+
+conectar_invalidacion(SalonEvento)
+conectar_variantes(SalonEvento)
@@ -1,10 +1,15 @@
 from rest_framework import viewsets
 from .models import SalonEvento
 from .serializers import SalonEventoSerializer
+from backend.cache_respuestas import cache_respuesta
 
 class SalonEventoViewSet(viewsets.ModelViewSet):
     """
     ViewSet simple para gestionar salones - como habitaciones
     """
     queryset = SalonEvento.objects.all()
-    serializer_class = SalonEventoSerializer
\ No newline at end of file
+    serializer_class = SalonEventoSerializer
+
+    @cache_respuesta(SalonEvento)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
\ No newline at end of file
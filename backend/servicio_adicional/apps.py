@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ServicioAdicionalConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'servicio_adicional'
+
+    def ready(self):
+        # Invalidación de la caché de catálogo
+        import servicio_adicional.signals
@@ -0,0 +1,6 @@
+# servicio_adicional/signals.py
+
+from backend.cache_respuestas import conectar_invalidacion
+from .models import ServicioAdicional
+
+conectar_invalidacion(ServicioAdicional)
@@ -4,6 +4,7 @@ from rest_framework import viewsets, permissions
 from .models import ServicioAdicional
 from .serializers import ServicioAdicionalSerializer
 from usuarios.permissions import IsAdministrador # Permiso para Staff
+from backend.cache_respuestas import cache_respuesta
 
 
 class ServicioAdicionalViewSet(viewsets.ModelViewSet):
@@ -29,4 +30,9 @@ class ServicioAdicionalViewSet(viewsets.ModelViewSet):
         if self.action in ['list', 'retrieve']:
             return self.queryset.filter(activo=True).order_by('tipo', 'nombre')
         # Para el Administrador, devuelve todos (incluidos inactivos)
-        return self.queryset.order_by('tipo', 'nombre')
\ No newline at end of file
+        return self.queryset.order_by('tipo', 'nombre')
+
+    # La lista pública es igual para todos: se sirve desde la caché de catálogo
+    @cache_respuesta(ServicioAdicional)
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
\ No newline at end of file
@@ -1,6 +1,7 @@
 # tarifa_dinamica/models.py
 
 from django.db import models
+from decimal import Decimal
 from habitacion.models import Habitacion # ¡Importamos el modelo Habitacion existente!
 
 class TarifaDinamica(models.Model):
@@ -21,6 +22,14 @@ class TarifaDinamica(models.Model):
         (TEMPORADA_BAJA, 'Temporada Baja'),
         (TEMPORADA_EVENTO, 'Evento Especial'),
     ]
+
+    # Precedencia cuando varias tarifas cubren la misma noche (mayor gana)
+    PRIORIDAD_TEMPORADA = {
+        TEMPORADA_EVENTO: 4,
+        TEMPORADA_ALTA: 3,
+        TEMPORADA_MEDIA: 2,
+        TEMPORADA_BAJA: 1,
+    }
     
     # Relación uno a muchos con el modelo Habitacion
     habitacion = models.ForeignKey(
@@ -68,4 +77,8 @@ class TarifaDinamica(models.Model):
         ordering = ['habitacion__numero_habitacion', 'fecha_inicio']
 
     def __str__(self):
-        return f'{self.habitacion.numero_habitacion} - {self.get_tipo_temporada_display()} ({self.fecha_inicio} a {self.fecha_fin})'
\ No newline at end of file
+        return f'{self.habitacion.numero_habitacion} - {self.get_tipo_temporada_display()} ({self.fecha_inicio} a {self.fecha_fin})'
+
+    def get_precio_final(self):
+        """Precio por noche de la tarifa con el descuento aplicado."""
+        return self.precio * (Decimal(1) - self.descuento / Decimal(100))
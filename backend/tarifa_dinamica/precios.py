@@ -0,0 +1,116 @@
+# tarifa_dinamica/precios.py
+
+"""
+Motor de precios por noche basado en tarifas dinámicas.
+
+Carga todas las tarifas que tocan la estancia con una sola consulta y
+resuelve el precio de cada noche con un barrido sobre los intervalos
+ordenados, de modo que el coste no depende del número de noches.
+
+Cada noche se redondea a céntimos antes de sumar: el total de una reserva y
+el de una cotización son siempre la suma del desglose que se muestra.
+"""
+
+import heapq
+from datetime import timedelta
+from decimal import Decimal
+
+from .models import TarifaDinamica
+
+CENTIMO = Decimal('0.01')
+
+
+def tarifas_para_rango(habitaciones, fecha_checkin, fecha_checkout):
+    """
+    Tarifas de las habitaciones (IDs) indicadas que se solapan con [checkin, checkout).
+    Una sola consulta por rango; fecha_fin es inclusiva.
+    """
+    return TarifaDinamica.objects.filter(
+        habitacion_id__in=habitaciones,
+        fecha_inicio__lt=fecha_checkout,
+        fecha_fin__gte=fecha_checkin
+    ).order_by('fecha_inicio', 'id')
+
+
+def _clave_prioridad(tarifa):
+    """
+    Orden determinista para tarifas solapadas: primero la temporada
+    (evento > alta > media > baja), luego la que empieza más tarde (más
+    específica) y, por último, la creada más recientemente.
+    """
+    prioridad = TarifaDinamica.PRIORIDAD_TEMPORADA.get(tarifa.tipo_temporada, 0)
+    return (-prioridad, -tarifa.fecha_inicio.toordinal(), -(tarifa.pk or 0))
+
+
+def resolver_noches(tarifas, precio_base, fecha_checkin, fecha_checkout):
+    """
+    Devuelve una lista de (fecha, precio, tarifa) para cada noche de la
+    estancia, con el precio redondeado a céntimos.
+
+    `tarifas` deben pertenecer a una misma habitación. Las noches sin tarifa
+    aplicable usan `precio_base` y devuelven tarifa=None.
+    """
+    precio_base = Decimal(str(precio_base or 0)).quantize(CENTIMO)
+    pendientes = sorted(tarifas, key=lambda t: (t.fecha_inicio, t.pk or 0))
+    activas = []  # heap de (clave_prioridad, fecha_fin, desempate, tarifa, precio_final)
+    siguiente = 0
+    noches = []
+
+    fecha = fecha_checkin
+    while fecha < fecha_checkout:
+        # Entran las tarifas que ya han empezado
+        while siguiente < len(pendientes) and pendientes[siguiente].fecha_inicio <= fecha:
+            tarifa = pendientes[siguiente]
+            heapq.heappush(activas, (
+                _clave_prioridad(tarifa), tarifa.fecha_fin, siguiente, tarifa, tarifa.get_precio_final().quantize(CENTIMO)
+            ))
+            siguiente += 1
+
+        # Salen (de forma perezosa) las tarifas ya vencidas
+        while activas and activas[0][1] < fecha:
+            heapq.heappop(activas)
+
+        if activas:
+            noches.append((fecha, activas[0][4], activas[0][3]))
+        else:
+            noches.append((fecha, precio_base, None))
+
+        fecha += timedelta(days=1)
+
+    return noches
+
+
+def precios_por_noche(habitacion, fecha_checkin, fecha_checkout):
+    """Desglose por noche de una habitación (una consulta a tarifa_dinamica)."""
+    if not habitacion or not fecha_checkin or not fecha_checkout:
+        return []
+    tarifas = list(tarifas_para_rango([habitacion.pk], fecha_checkin, fecha_checkout))
+    return resolver_noches(tarifas, habitacion.precio_base, fecha_checkin, fecha_checkout)
+
+
+def calcular_total_estancia(habitacion, fecha_checkin, fecha_checkout):
+    """Suma de los precios por noche de la estancia."""
+    return sum(
+        (precio for _, precio, _ in precios_por_noche(habitacion, fecha_checkin, fecha_checkout)),
+        Decimal('0.00')
+    )
+
+
+def cotizar_habitaciones(habitaciones, fecha_checkin, fecha_checkout):
+    """
+    Desglose por noche para muchas habitaciones a la vez.
+
+    Recibe una lista de habitaciones ya cargadas y hace una única consulta
+    de tarifas para todas; devuelve {habitacion_id: [(fecha, precio, tarifa), ...]}.
+    """
+    habitaciones = list(habitaciones)
+    tarifas_por_habitacion = {h.pk: [] for h in habitaciones}
+    for tarifa in tarifas_para_rango([h.pk for h in habitaciones], fecha_checkin, fecha_checkout):
+        tarifas_por_habitacion[tarifa.habitacion_id].append(tarifa)
+
+    return {
+        h.pk: resolver_noches(
+            tarifas_por_habitacion[h.pk], h.precio_base, fecha_checkin, fecha_checkout
+        )
+        for h in habitaciones
+    }
@@ -0,0 +1,126 @@
+from datetime import date
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from habitacion.models import Habitacion
+from reserva_habitacion.models import ReservaHabitacion
+from reserva_servicio.signals import recalcular_total_reserva
+from .models import TarifaDinamica
+from .precios import calcular_total_estancia, precios_por_noche
+
+
+def dia(d, mes=3):
+    return date(2030, mes, d)
+
+
+class PreciosPorNocheTest(TestCase):
+
+    def setUp(self):
+        self.habitacion = Habitacion.objects.create(numero_habitacion='T1', precio_base=Decimal('100'))
+
+    def tarifa(self, temporada, precio, inicio, fin, descuento=0):
+        return TarifaDinamica.objects.create(
+            habitacion=self.habitacion, tipo_temporada=temporada, precio=Decimal(precio),
+            fecha_inicio=inicio, fecha_fin=fin, descuento=Decimal(descuento),
+        )
+
+    def noches(self, checkin, checkout):
+        return [(fecha, precio, tarifa.pk if tarifa else None)
+                for fecha, precio, tarifa in precios_por_noche(self.habitacion, checkin, checkout)]
+
+    def test_precedencia_por_temporada(self):
+        tarifas = {
+            temporada: self.tarifa(temporada, precio, dia(1), dia(10))
+            for temporada, precio in (('baja', '50'), ('alta', '300'), ('evento', '400'), ('media', '200'))
+        }
+        for ganadora in ('evento', 'alta', 'media', 'baja'):
+            self.assertEqual(self.noches(dia(5), dia(6))[0][2], tarifas[ganadora].pk, ganadora)
+            tarifas[ganadora].delete()
+
+    def test_desempate_por_inicio_y_por_antiguedad(self):
+        self.tarifa('alta', '300', dia(1), dia(10))
+        especifica = self.tarifa('alta', '320', dia(4), dia(6))
+        self.assertEqual([n[2] for n in self.noches(dia(3), dia(5))][1], especifica.pk)
+        # Mismo inicio y temporada: gana la creada más tarde
+        reciente = self.tarifa('alta', '340', dia(4), dia(6))
+        self.assertEqual(self.noches(dia(4), dia(5)), [(dia(4), Decimal('340'), reciente.pk)])
+
+    def test_precio_base_entre_temporadas_y_fin_inclusivo(self):
+        primera = self.tarifa('media', '200', dia(1), dia(2))
+        segunda = self.tarifa('baja', '80', dia(5), dia(6), descuento=25)
+        self.assertEqual(self.noches(dia(1), dia(7)), [
+            (dia(1), Decimal('200'), primera.pk),
+            # fecha_fin inclusiva: la noche del día 2 aún es de la tarifa
+            (dia(2), Decimal('200'), primera.pk),
+            (dia(3), Decimal('100'), None),
+            (dia(4), Decimal('100'), None),
+            (dia(5), Decimal('60'), segunda.pk),
+            (dia(6), Decimal('60'), segunda.pk),
+        ])
+        self.assertEqual(calcular_total_estancia(self.habitacion, dia(1), dia(7)), Decimal('720'))
+
+    def test_reserva_y_recalculo_coinciden(self):
+        self.tarifa('alta', '150', dia(2), dia(3))
+        self.tarifa('evento', '250', dia(3), dia(3))
+        with self.captureOnCommitCallbacks(execute=True):
+            reserva = ReservaHabitacion.objects.create(
+                habitacion=self.habitacion, fecha_checkin=dia(1), fecha_checkout=dia(5),
+            )
+        # 100 + 150 + 250 + 100
+        self.assertEqual(reserva.total, Decimal('600'))
+        recalcular_total_reserva(reserva.pk)
+        reserva.refresh_from_db()
+        self.assertEqual(reserva.total, Decimal('600'))
+
+
+class CotizarTarifasTest(TestCase):
+
+    def setUp(self):
+        self.url = reverse('cotizar-tarifas')
+        self.simple = Habitacion.objects.create(numero_habitacion='C1', precio_base=Decimal('100'))
+        self.doble = Habitacion.objects.create(numero_habitacion='C2', precio_base=Decimal('150'))
+        Habitacion.objects.create(numero_habitacion='C3', precio_base=Decimal('90'), activa=False)
+
+    def cotizar(self, metodo='get', **datos):
+        datos = {'checkin': '2030-03-01', 'checkout': '2030-03-03', **datos}
+        return getattr(APIClient(), metodo)(self.url, datos, format='json' if metodo == 'post' else None)
+
+    def test_ids_repetidos_o_separados_por_comas(self):
+        for consulta in (f'habitaciones={self.simple.pk}&habitaciones={self.doble.pk}',
+                         f'habitaciones={self.simple.pk},{self.doble.pk}'):
+            respuesta = APIClient().get(f'{self.url}?checkin=2030-03-01&checkout=2030-03-03&{consulta}')
+            self.assertEqual(
+                sorted(c['habitacion_id'] for c in respuesta.data['cotizaciones']), [self.simple.pk, self.doble.pk]
+            )
+        respuesta = self.cotizar('post', habitaciones=[self.doble.pk])
+        self.assertEqual([c['total'] for c in respuesta.data['cotizaciones']], ['300.00'])
+
+    def test_una_consulta_de_habitaciones_y_otra_de_tarifas(self):
+        with self.assertNumQueries(2):
+            respuesta = self.cotizar(habitaciones=f'{self.simple.pk},{self.doble.pk}')
+        self.assertEqual(respuesta.data['total_habitaciones'], 2)
+
+    def test_total_es_la_suma_del_desglose(self):
+        TarifaDinamica.objects.create(
+            habitacion=self.simple, tipo_temporada='baja', precio=Decimal('10.01'),
+            fecha_inicio=dia(1), fecha_fin=dia(2), descuento=Decimal('50'),
+        )
+        cotizacion = self.cotizar(habitaciones=str(self.simple.pk)).data['cotizaciones'][0]
+        self.assertEqual([n['precio'] for n in cotizacion['noches']], ['5.00', '5.00'])
+        self.assertEqual(cotizacion['total'], '10.00')
+        self.assertEqual(calcular_total_estancia(self.simple, dia(1), dia(3)), Decimal('10.00'))
+
+    def test_errores(self):
+        for datos in (
+            {'checkin': 'mañana'},
+            {'checkout': '2030-03-01'},
+            {'checkout': '2030-06-01'},
+            {'habitaciones': 'uno,dos'},
+            {},
+        ):
+            self.assertEqual(self.cotizar(**datos).status_code, 400, datos)
+        # Solo habitaciones activas
+        self.assertEqual(self.cotizar(categoria=self.simple.categoria).data['total_habitaciones'], 2)
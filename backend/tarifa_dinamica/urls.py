@@ -2,13 +2,16 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TarifaDinamicaViewSet
+from .views import TarifaDinamicaViewSet, cotizar_tarifas
 
 # Creamos un router para generar las URLs automáticamente
 router = DefaultRouter()
 router.register(r'tarifas_dinamicas', TarifaDinamicaViewSet, basename='tarifa-dinamica')
 
 urlpatterns = [
+    # Cotización masiva: /api/tarifas-dinamicas/cotizar/
+    path('cotizar/', cotizar_tarifas, name='cotizar-tarifas'),
+
     # Incluye las rutas generadas por el router (ej: /api/tarifas_dinamicas/)
     path('', include(router.urls)),
 ]
\ No newline at end of file
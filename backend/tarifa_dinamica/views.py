@@ -1,11 +1,20 @@
 # tarifa_dinamica/views.py
 
-from rest_framework import viewsets
+from decimal import Decimal
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from django.utils.dateparse import parse_date
+from habitacion.models import Habitacion
 from .models import TarifaDinamica
 from .serializers import TarifaDinamicaSerializer
+from .precios import cotizar_habitaciones
 # Asumo que ya tienes implementados los permisos en tu app 'usuarios'
 from usuarios.permissions import IsAdministrador # Ejemplo de permiso para CRUD
 
+# Límite de noches por cotización para acotar el tamaño de la respuesta
+MAX_NOCHES_COTIZACION = 60
+
 class TarifaDinamicaViewSet(viewsets.ModelViewSet):
     """
     ViewSet para la gestión de Tarifas Dinámicas.
@@ -22,4 +31,104 @@ class TarifaDinamicaViewSet(viewsets.ModelViewSet):
     #     if self.action in ['list', 'retrieve']:
     #         # Permitir a recepcionistas ver las tarifas
     #         return [IsRecepcionista()]
-    #     return [IsAdministrador()]
\ No newline at end of file
+    #     return [IsAdministrador()]
+
+
+# --- COTIZACIÓN MASIVA (Público) ---
+@api_view(['GET', 'POST'])
+@permission_classes([permissions.AllowAny])
+def cotizar_tarifas(request):
+    """
+    Cotiza el precio por noche y el total de muchas habitaciones a la vez.
+
+    Parámetros (query string en GET o JSON en POST):
+      - habitaciones: lista de IDs (en GET, repetido o "1,2,3")
+      - categoria: alternativa a habitaciones
+      - checkin / checkout: YYYY-MM-DD
+
+    Usa una consulta para las habitaciones y otra para todas sus tarifas.
+    """
+    datos = request.data if request.method == 'POST' else request.query_params
+
+    try:
+        fecha_checkin = parse_date(str(datos.get('checkin') or ''))
+        fecha_checkout = parse_date(str(datos.get('checkout') or ''))
+    except ValueError:
+        fecha_checkin = fecha_checkout = None
+    if not fecha_checkin or not fecha_checkout:
+        return Response(
+            {'error': 'Debe indicar checkin y checkout con formato YYYY-MM-DD.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    noches = (fecha_checkout - fecha_checkin).days
+    if noches <= 0:
+        return Response(
+            {'error': 'El check-out debe ser posterior al check-in.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if noches > MAX_NOCHES_COTIZACION:
+        return Response(
+            {'error': f'La estancia no puede superar {MAX_NOCHES_COTIZACION} noches.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    habitaciones = Habitacion.objects.filter(activa=True).only(
+        'id', 'numero_habitacion', 'categoria', 'precio_base'
+    )
+
+    if hasattr(datos, 'getlist'):
+        # Query string o formulario: ?habitaciones=1&habitaciones=2 y/o ?habitaciones=1,2
+        ids = [i for valor in datos.getlist('habitaciones') for i in str(valor).split(',') if i.strip()]
+    else:
+        ids = datos.get('habitaciones')
+        if isinstance(ids, str):
+            ids = [i for i in ids.split(',') if i.strip()]
+    categoria = datos.get('categoria')
+
+    if ids:
+        try:
+            ids = [int(i) for i in ids]
+        except (TypeError, ValueError):
+            return Response(
+                {'error': 'habitaciones debe ser una lista de IDs numéricos.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        habitaciones = habitaciones.filter(id__in=ids)
+    elif categoria:
+        habitaciones = habitaciones.filter(categoria=categoria)
+    else:
+        return Response(
+            {'error': 'Debe indicar habitaciones o categoria.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    habitaciones = list(habitaciones)
+    desglose = cotizar_habitaciones(habitaciones, fecha_checkin, fecha_checkout)
+
+    cotizaciones = []
+    for habitacion in habitaciones:
+        precios = desglose[habitacion.pk]
+        cotizaciones.append({
+            'habitacion_id': habitacion.pk,
+            'numero_habitacion': habitacion.numero_habitacion,
+            'categoria': habitacion.categoria,
+            'precio_base': str(habitacion.precio_base),
+            'noches': [
+                {
+                    'fecha': fecha,
+                    'precio': str(precio),
+                    'tipo_temporada': tarifa.tipo_temporada if tarifa else None,
+                }
+                for fecha, precio, tarifa in precios
+            ],
+            # Precios ya redondeados por noche: el total es la suma del desglose
+            'total': str(sum((precio for _, precio, _ in precios), Decimal('0.00'))),
+        })
+
+    return Response({
+        'checkin': fecha_checkin,
+        'checkout': fecha_checkout,
+        'noches': noches,
+        'total_habitaciones': len(cotizaciones),
+        'cotizaciones': cotizaciones,
+    })
@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.models import User
 from django.contrib.auth.admin import UserAdmin
-from .models import Perfil
+from .models import Perfil, CorreoSaliente
 
 # =========================================================
 # LIMPIEZA DE REGISTROS PREVIOS
@@ -63,4 +63,15 @@ class UsuarioAdmin(UserAdmin):
         ('Información Personal', {'fields': ('first_name', 'last_name', 'email')}),
         ('Permisos', {'fields': ('is_active', 'is_staff', 'is_superuser', 'groups', 'user_permissions')}),
         ('Fechas Importantes', {'fields': ('last_login', 'date_joined')}),
-    )
\ No newline at end of file
+    )
+
+# =========================================================
+# BANDEJA DE SALIDA DE CORREOS
+# =========================================================
+
+@admin.register(CorreoSaliente)
+class CorreoSalienteAdmin(admin.ModelAdmin):
+    list_display = ('id', 'destinatario', 'estado', 'intentos', 'fecha_creacion', 'fecha_envio')
+    list_filter = ('estado',)
+    search_fields = ('destinatario',)
+    readonly_fields = ('fecha_creacion', 'fecha_envio', 'ultimo_error')
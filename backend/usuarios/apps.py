@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class UsuariosConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'usuarios'
+
+    def ready(self):
+        # Conecta las señales del resumen diario del Dashboard
+        import usuarios.signals
+        # Chequeo de caché compartida entre workers (backend.E001)
+        import backend.cache
@@ -0,0 +1,82 @@
+# usuarios/authentication.py
+
+"""
+Autenticación JWT con el rol del usuario resuelto junto con el usuario.
+
+JWTRolAuthentication carga el usuario del token con su perfil en la misma
+consulta (JOIN) y deja el rol en request.user.rol, así los permisos no
+consultan perfil_usuario aparte. El rol sale siempre de la BD: un cambio de
+rol o una desactivación se aplica en la siguiente petición, en todos los workers.
+
+Los tokens también llevan el claim 'rol' solo para el cliente (p. ej. para
+mostrar el menú del panel); el servidor no lo usa para autorizar.
+Al refrescar, el claim se vuelve a leer de la BD.
+"""
+
+from django.contrib.auth.models import User
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .permissions import CLAIM_ROL, rol_desde_bd
+
+
+def aplicar_claims_rol(token, user):
+    token[CLAIM_ROL] = rol_desde_bd(user)
+
+
+class RefreshTokenConRol(RefreshToken):
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        aplicar_claims_rol(token, user)
+        # Recién leído de la BD: el access token del login no necesita releerlo
+        token._rol_vigente = True
+        return token
+
+    @property
+    def access_token(self):
+        # Al refrescar se reemplaza el rol copiado del refresh por el actual,
+        # así un cambio de rol nunca sobrevive a la rotación de tokens.
+        if not getattr(self, '_rol_vigente', False):
+            user_id = self.payload.get(api_settings.USER_ID_CLAIM)
+            user = User.objects.select_related('perfil').filter(pk=user_id).first()
+            if user is not None:
+                aplicar_claims_rol(self, user)
+            self._rol_vigente = True
+        return super().access_token
+
+
+class MyTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = RefreshTokenConRol
+
+
+class JWTRolAuthentication(JWTAuthentication):
+    """JWTAuthentication que resuelve request.user.rol desde la BD, sin consultas extra."""
+
+    def get_user(self, validated_token):
+        # Las mismas comprobaciones que JWTAuthentication.get_user, con el perfil en el JOIN
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        user = self.user_model.objects.select_related('perfil').filter(
+            **{api_settings.USER_ID_FIELD: user_id}
+        ).first()
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        user.rol = rol_desde_bd(user)
+        return user
@@ -0,0 +1,280 @@
+# usuarios/correo.py
+
+"""
+Envío de correos transaccionales mediante una bandeja de salida (outbox).
+
+Las vistas llaman a encolar_correo(), que solo inserta una fila en
+correo_saliente dentro de la transacción de la petición. Tras el commit se
+avisa al despachador, que envía los pendientes por lotes fuera del worker
+web usando una única requests.Session (conexiones reutilizadas, timeouts y
+reintentos). Los fallos se reintentan con espera exponencial.
+
+Modos de despacho (settings.CORREO_DESPACHO):
+    'hilo'     -> hilo en segundo plano dentro del proceso (por defecto).
+    'sincrono' -> se envía al confirmar la transacción (pruebas/depuración).
+    'externo'  -> solo encola; drena el comando `despachar_correos`.
+
+Enviadores (settings.CORREO_ENVIADOR):
+    'emailjs'  -> API REST de EmailJS (si faltan credenciales se usa 'local').
+    'local'    -> no sale a la red; guarda los correos en memoria y en el log.
+"""
+
+import logging
+import os
+import threading
+from collections import deque
+from datetime import timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import CorreoSaliente
+
+logger = logging.getLogger(__name__)
+
+URL_EMAILJS = "https://api.emailjs.com/api/v1.0/email/send"
+
+CORREO_ENVIADOR = getattr(settings, 'CORREO_ENVIADOR', 'emailjs')
+CORREO_DESPACHO = getattr(settings, 'CORREO_DESPACHO', 'hilo')
+CORREO_LOTE = getattr(settings, 'CORREO_LOTE', 50)
+CORREO_MAX_INTENTOS = getattr(settings, 'CORREO_MAX_INTENTOS', 5)
+# (conexión, lectura) en segundos
+CORREO_TIMEOUT = getattr(settings, 'CORREO_TIMEOUT', (3.05, 10))
+
+# Tiempo que un lote queda reservado para un despachador. Si el proceso muere
+# a mitad del envío, al vencer el plazo otro despachador lo retoma.
+RESERVA_LOTE = timedelta(minutes=5)
+# Espera entre reintentos: 30s, 1m, 2m, 4m... con tope de 1 hora
+ESPERA_BASE_SEGUNDOS = 30
+ESPERA_MAXIMA_SEGUNDOS = 3600
+# El hilo revisa la bandeja periódicamente aunque nadie lo despierte
+INTERVALO_REVISION_SEGUNDOS = 60
+
+
+class ErrorEnvio(Exception):
+    """El proveedor rechazó el correo o no respondió."""
+
+
+# =========================================================
+# ENVIADORES
+# =========================================================
+
+def _credenciales_emailjs():
+    return {
+        'service_id': os.environ.get("EMAILJS_SERVICE_ID"),
+        'template_id': os.environ.get("EMAILJS_TEMPLATE_ID"),
+        'user_id': os.environ.get("EMAILJS_USER_ID"),          # Public Key
+        'accessToken': os.environ.get("EMAILJS_PRIVATE_KEY"),  # Private Key
+    }
+
+
+def emailjs_configurado():
+    """True si el envío real por EmailJS está disponible."""
+    return CORREO_ENVIADOR == 'emailjs' and all(_credenciales_emailjs().values())
+
+
+_sesion = None
+_sesion_lock = threading.Lock()
+
+
+def _sesion_http():
+    """
+    requests.Session compartida por el proceso: mantiene viva la conexión TLS
+    con EmailJS entre correos del mismo lote y reintenta errores transitorios.
+    """
+    global _sesion
+    if _sesion is None:
+        with _sesion_lock:
+            if _sesion is None:
+                reintentos = Retry(
+                    total=3,
+                    connect=3,
+                    # No se reintenta tras un timeout de lectura: EmailJS pudo
+                    # haber aceptado el correo; lo decide el reintento del outbox.
+                    read=0,
+                    backoff_factor=0.5,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=frozenset(['POST']),
+                    raise_on_status=False,
+                )
+                sesion = requests.Session()
+                sesion.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=reintentos))
+                sesion.headers.update({"Content-Type": "application/json"})
+                _sesion = sesion
+    return _sesion
+
+
+class EnviadorEmailJS:
+    def enviar(self, correo):
+        payload = dict(_credenciales_emailjs())
+        payload['template_params'] = {
+            "to_name": correo.nombre_destinatario,
+            "to_email": correo.destinatario,
+            "message": correo.mensaje,
+            "reply_to": correo.responder_a,
+        }
+        try:
+            response = _sesion_http().post(URL_EMAILJS, json=payload, timeout=CORREO_TIMEOUT)
+        except requests.RequestException as e:
+            raise ErrorEnvio(str(e)) from e
+
+        if response.status_code != 200:
+            raise ErrorEnvio(f"API Error: {response.status_code} - {response.text[:200]}")
+
+
+class EnviadorLocal:
+    """Enviador de pruebas: no sale a la red, guarda los correos en memoria."""
+
+    enviados = deque(maxlen=100)
+
+    def enviar(self, correo):
+        self.enviados.append({
+            'destinatario': correo.destinatario,
+            'nombre': correo.nombre_destinatario,
+            'mensaje': correo.mensaje,
+            'responder_a': correo.responder_a,
+        })
+        logger.info(f"[CORREO LOCAL] Para {correo.destinatario}: {correo.mensaje}")
+
+
+def obtener_enviador():
+    if emailjs_configurado():
+        return EnviadorEmailJS()
+    return EnviadorLocal()
+
+
+# =========================================================
+# BANDEJA DE SALIDA
+# =========================================================
+
+def encolar_correo(destinatario, mensaje, nombre='', responder_a='no-reply@hotelindigo.com'):
+    """
+    Registra un correo pendiente y avisa al despachador tras el commit.
+    No hace ninguna llamada de red.
+    """
+    correo = CorreoSaliente.objects.create(
+        destinatario=destinatario,
+        nombre_destinatario=nombre or '',
+        mensaje=mensaje,
+        responder_a=responder_a,
+    )
+    transaction.on_commit(notificar_despachador)
+    return correo
+
+
+def _espera_reintento(intentos):
+    return timedelta(seconds=min(ESPERA_BASE_SEGUNDOS * 2 ** (intentos - 1), ESPERA_MAXIMA_SEGUNDOS))
+
+
+def despachar_pendientes(lote=None):
+    """
+    Envía un lote de correos pendientes cuyo turno ya llegó.
+    Retorna cuántos correos se procesaron (enviados o fallidos).
+    """
+    lote = lote or CORREO_LOTE
+    ahora = timezone.now()
+
+    # 1. Reservar el lote (en PostgreSQL, SKIP LOCKED evita que dos
+    #    despachadores tomen las mismas filas; SQLite lo ignora).
+    with transaction.atomic():
+        ids = list(
+            CorreoSaliente.objects.select_for_update(skip_locked=True)
+            .filter(estado=CorreoSaliente.ESTADO_PENDIENTE, proximo_intento__lte=ahora)
+            .order_by('proximo_intento', 'id')
+            .values_list('id', flat=True)[:lote]
+        )
+        if not ids:
+            return 0
+        CorreoSaliente.objects.filter(id__in=ids).update(proximo_intento=ahora + RESERVA_LOTE)
+
+    # 2. Enviar fuera de la transacción, reutilizando la misma conexión
+    enviador = obtener_enviador()
+    enviados = []
+    fallidos = []
+    for correo in CorreoSaliente.objects.filter(id__in=ids).order_by('id'):
+        try:
+            enviador.enviar(correo)
+            enviados.append(correo.id)
+        except Exception as e:
+            correo.intentos += 1
+            correo.ultimo_error = str(e)[:1000]
+            if correo.intentos >= CORREO_MAX_INTENTOS:
+                correo.estado = CorreoSaliente.ESTADO_FALLIDO
+            else:
+                correo.proximo_intento = timezone.now() + _espera_reintento(correo.intentos)
+            fallidos.append(correo)
+            logger.warning(f"Error enviando correo {correo.id} (intento {correo.intentos}): {e}")
+
+    # 3. Registrar resultados. El mensaje puede contener un OTP: se vacía al enviarlo.
+    if enviados:
+        CorreoSaliente.objects.filter(id__in=enviados).update(
+            estado=CorreoSaliente.ESTADO_ENVIADO,
+            fecha_envio=timezone.now(),
+            mensaje='',
+            ultimo_error='',
+        )
+    if fallidos:
+        CorreoSaliente.objects.bulk_update(
+            fallidos, ['intentos', 'ultimo_error', 'estado', 'proximo_intento']
+        )
+
+    return len(ids)
+
+
+def drenar_bandeja():
+    """Despacha lotes hasta que no queden pendientes vencidos."""
+    total = 0
+    while True:
+        procesados = despachar_pendientes()
+        total += procesados
+        if procesados < CORREO_LOTE:
+            return total
+
+
+# =========================================================
+# DESPACHADOR EN SEGUNDO PLANO
+# =========================================================
+
+_despertar = threading.Event()
+_hilo = None
+_hilo_lock = threading.Lock()
+
+
+def _bucle_despachador():
+    while True:
+        _despertar.wait(timeout=INTERVALO_REVISION_SEGUNDOS)
+        _despertar.clear()
+        try:
+            close_old_connections()
+            drenar_bandeja()
+        except Exception:
+            logger.exception("Error en el despachador de correos")
+        finally:
+            close_old_connections()
+
+
+def _asegurar_hilo():
+    global _hilo
+    if _hilo is not None and _hilo.is_alive():
+        return
+    with _hilo_lock:
+        if _hilo is None or not _hilo.is_alive():
+            _hilo = threading.Thread(target=_bucle_despachador, name='despachador-correos', daemon=True)
+            _hilo.start()
+
+
+def notificar_despachador():
+    if CORREO_DESPACHO == 'sincrono':
+        try:
+            drenar_bandeja()
+        except Exception:
+            logger.exception("Error despachando correos")
+    elif CORREO_DESPACHO == 'hilo':
+        _asegurar_hilo()
+        _despertar.set()
+    # 'externo': el comando `despachar_correos` se encarga
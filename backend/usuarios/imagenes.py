@@ -0,0 +1,246 @@
+# usuarios/imagenes.py
+
+"""
+Variantes redimensionadas de las imágenes subidas (campo `imagen`).
+
+Al guardar un modelo con imagen nueva (cada app conecta sus modelos con
+conectar_variantes en su signals.py) se encola su id tras el commit; un hilo en segundo plano abre el original una
+sola vez y genera, de mayor a menor, las variantes de VARIANTES en WebP y
+JPEG junto al original. El nombre lleva el hash del contenido, así su URL
+nunca cambia de contenido y se sirve con caché inmutable (backend/media.py):
+
+    habitaciones/suite.png -> habitaciones/suite__thumb.3f9a1c0b7d2e.webp, ...
+
+El resultado (rutas y dimensiones) se guarda en `imagen_variantes` con un
+UPDATE directo y se invalida la caché de catálogo del modelo. Mientras no
+existan, los serializadores devuelven {} y el cliente usa el original.
+
+Modos (settings.IMAGENES_PROCESAMIENTO):
+    'hilo'     -> hilo en segundo plano dentro del proceso (por defecto).
+    'sincrono' -> se generan al confirmar la transacción (pruebas).
+    'externo'  -> no se generan al guardar; las crea el comando
+                  `generar_variantes_imagenes`.
+"""
+
+import hashlib
+import logging
+import os
+import queue
+import threading
+from io import BytesIO
+
+from PIL import Image, ImageOps
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.db.models.signals import pre_save, post_save
+from rest_framework import serializers
+
+from backend.cache_respuestas import invalidar_modelo
+
+logger = logging.getLogger(__name__)
+
+IMAGENES_PROCESAMIENTO = getattr(settings, 'IMAGENES_PROCESAMIENTO', 'hilo')
+
+# Ancho máximo de cada variante, de mayor a menor (nunca se amplía el original)
+VARIANTES = (
+    ('hero', 1600),
+    ('card', 800),
+    ('thumb', 320),
+)
+# formato -> (extensión, formato de Pillow, opciones de guardado)
+FORMATOS = {
+    'webp': ('webp', 'WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('jpg', 'JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def necesita_variantes(instancia):
+    """True si las variantes guardadas no corresponden a la imagen actual."""
+    origen = (instancia.imagen_variantes or {}).get('origen', '')
+    return (instancia.imagen.name or '') != origen
+
+
+def ruta_variante(nombre, variante, formato, contenido):
+    base, _ = os.path.splitext(nombre)
+    huella = hashlib.sha256(contenido).hexdigest()[:12]
+    return f'{base}__{variante}.{huella}.{FORMATOS[formato][0]}'
+
+
+def _rutas(variantes):
+    return {
+        datos[formato]
+        for datos in (variantes or {}).get('variantes', {}).values()
+        for formato in FORMATOS
+    }
+
+
+def generar_variantes(nombre):
+    """
+    Genera y guarda las variantes de la imagen `nombre` del almacenamiento.
+    Retorna {'origen': nombre, 'variantes': {variante: {ancho, alto, webp, jpeg}}}.
+    """
+    with default_storage.open(nombre, 'rb') as archivo:
+        imagen = Image.open(archivo)
+        # JPEG: se decodifica directamente a una escala reducida (mucho más rápido)
+        imagen.draft('RGB', (VARIANTES[0][1], VARIANTES[0][1]))
+        imagen = ImageOps.exif_transpose(imagen)
+        imagen.load()
+
+    con_alfa = imagen.mode in ('RGBA', 'LA') or (imagen.mode == 'P' and 'transparency' in imagen.info)
+    imagen = imagen.convert('RGBA' if con_alfa else 'RGB')
+
+    variantes = {}
+    for variante, ancho in VARIANTES:
+        # Cada variante se reduce desde la anterior, no desde el original
+        if imagen.width > ancho:
+            imagen = imagen.resize((ancho, max(1, round(imagen.height * ancho / imagen.width))), Image.LANCZOS)
+
+        datos = {'ancho': imagen.width, 'alto': imagen.height}
+        for formato, (_, formato_pil, opciones) in FORMATOS.items():
+            salida = imagen
+            if formato_pil == 'JPEG' and con_alfa:
+                # JPEG no admite transparencia: se aplana sobre blanco
+                salida = Image.new('RGB', imagen.size, (255, 255, 255))
+                salida.paste(imagen, mask=imagen.getchannel('A'))
+            buffer = BytesIO()
+            salida.save(buffer, formato_pil, **opciones)
+
+            contenido = buffer.getvalue()
+            ruta = ruta_variante(nombre, variante, formato, contenido)
+            # Mismo nombre = mismo contenido: si ya existe no hay que reescribirlo
+            if not default_storage.exists(ruta):
+                ruta = default_storage.save(ruta, ContentFile(contenido))
+            datos[formato] = ruta
+        variantes[variante] = datos
+
+    return {'origen': nombre, 'variantes': variantes}
+
+
+def _borrar(rutas):
+    for ruta in rutas:
+        try:
+            default_storage.delete(ruta)
+        except Exception:
+            logger.warning("No se pudo borrar la variante %s", ruta)
+
+
+def procesar_imagen(modelo, pk):
+    """Genera (o elimina) las variantes de una fila si su imagen cambió."""
+    instancia = modelo.objects.filter(pk=pk).only('pk', 'imagen', 'imagen_variantes').first()
+    if instancia is None or not necesita_variantes(instancia):
+        return False
+
+    nombre = instancia.imagen.name or ''
+    anteriores = _rutas(instancia.imagen_variantes)
+    nuevas = generar_variantes(nombre) if nombre else {}
+
+    # Solo si la imagen sigue siendo la misma (pudo reemplazarse mientras tanto)
+    misma_imagen = Q(imagen=nombre) if nombre else Q(imagen='') | Q(imagen__isnull=True)
+    if modelo.objects.filter(misma_imagen, pk=pk).update(imagen_variantes=nuevas):
+        _borrar(anteriores - _rutas(nuevas))
+        invalidar_modelo(modelo)
+        return True
+    _borrar(_rutas(nuevas) - anteriores)
+    return False
+
+
+# =========================================================
+# PROCESAMIENTO EN SEGUNDO PLANO
+# =========================================================
+
+_cola = queue.Queue()
+_hilo = None
+_hilo_lock = threading.Lock()
+
+
+def _bucle_imagenes():
+    while True:
+        etiqueta, pk = _cola.get()
+        try:
+            close_old_connections()
+            procesar_imagen(apps.get_model(etiqueta), pk)
+        except Exception:
+            logger.exception("Error generando variantes de %s #%s", etiqueta, pk)
+        finally:
+            close_old_connections()
+
+
+def _asegurar_hilo():
+    global _hilo
+    if _hilo is not None and _hilo.is_alive():
+        return
+    with _hilo_lock:
+        if _hilo is None or not _hilo.is_alive():
+            _hilo = threading.Thread(target=_bucle_imagenes, name='variantes-imagenes', daemon=True)
+            _hilo.start()
+
+
+def encolar_variantes(modelo, pk):
+    if IMAGENES_PROCESAMIENTO == 'sincrono':
+        try:
+            procesar_imagen(modelo, pk)
+        except Exception:
+            logger.exception("Error generando variantes de %s #%s", modelo._meta.label, pk)
+    elif IMAGENES_PROCESAMIENTO == 'hilo':
+        _asegurar_hilo()
+        _cola.put((modelo._meta.label, pk))
+    # 'externo': el comando `generar_variantes_imagenes` se encarga
+
+
+# =========================================================
+# SEÑALES
+# =========================================================
+
+def conservar_variantes_imagen(sender, instance, update_fields=None, **kwargs):
+    """
+    imagen_variantes solo la escribe el generador (UPDATE directo): una
+    instancia cargada antes de que terminara no debe pisarla al guardarse.
+    """
+    if instance.pk and (update_fields is None or 'imagen_variantes' in update_fields):
+        actuales = sender.objects.filter(pk=instance.pk).values_list('imagen_variantes', flat=True).first()
+        if actuales is not None:
+            instance.imagen_variantes = actuales
+
+
+def variantes_imagen_signal(sender, instance, **kwargs):
+    # Solo si la imagen cambió; tras el commit para que el archivo y la fila ya existan
+    if necesita_variantes(instance):
+        transaction.on_commit(lambda: encolar_variantes(sender, instance.pk), robust=True)
+
+
+def conectar_variantes(*modelos):
+    """Genera variantes para `modelos` (se llama desde el signals.py de cada app)."""
+    for modelo in modelos:
+        uid = f'variantes:{modelo._meta.label_lower}'
+        pre_save.connect(conservar_variantes_imagen, sender=modelo, dispatch_uid=uid)
+        post_save.connect(variantes_imagen_signal, sender=modelo, dispatch_uid=uid)
+
+
+# =========================================================
+# SERIALIZADORES
+# =========================================================
+
+class VariantesImagenField(serializers.Field):
+    """
+    Solo lectura: {'thumb': {'ancho', 'alto', 'webp', 'jpeg'}, 'card': ..., 'hero': ...}
+    con URLs absolutas si hay request en el contexto. {} mientras no se hayan generado.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, valor):
+        request = self.context.get('request')
+        resultado = {}
+        for variante, datos in (valor or {}).get('variantes', {}).items():
+            resultado[variante] = {'ancho': datos['ancho'], 'alto': datos['alto']}
+            for formato in FORMATOS:
+                url = default_storage.url(datos[formato])
+                resultado[variante][formato] = request.build_absolute_uri(url) if request else url
+        return resultado
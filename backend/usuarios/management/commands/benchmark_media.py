@@ -0,0 +1,100 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+import types
+from wsgiref.util import FileWrapper, setup_testing_defaults
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from django.urls import re_path
+from django.views.static import serve
+
+from backend.media import ServidorMedia
+
+# (nombre, tamaño en KB): una miniatura, una tarjeta y una imagen grande
+ARCHIVOS = [('thumb.jpg', 15), ('card.jpg', 90), ('hero.jpg', 600)]
+URLCONF_BASE = '_benchmark_media_urls'
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara en proceso (WSGI, sin red) django.views.static.serve con ServidorMedia '
+        'sobre archivos sintéticos en un MEDIA_ROOT temporal.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--peticiones', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        media = tempfile.mkdtemp()
+        try:
+            for nombre, kb in ARCHIVOS:
+                with open(os.path.join(media, nombre), 'wb') as archivo:
+                    archivo.write(os.urandom(kb * 1024))
+            with override_settings(MEDIA_ROOT=media, ROOT_URLCONF=self.urlconf_base(media), DEBUG=False):
+                self.comparar(options['peticiones'])
+        finally:
+            sys.modules.pop(URLCONF_BASE, None)
+            shutil.rmtree(media, ignore_errors=True)
+
+    def urlconf_base(self, media):
+        # La ruta que había antes en backend/urls.py
+        modulo = types.ModuleType(URLCONF_BASE)
+        modulo.urlpatterns = [re_path(r'^media/(?P<path>.*)$', serve, {'document_root': media})]
+        sys.modules[URLCONF_BASE] = modulo
+        return URLCONF_BASE
+
+    def comparar(self, peticiones):
+        django_app = WSGIHandler()
+        aplicaciones = [
+            ('static.serve (Django completo)', django_app),
+            ('ServidorMedia', ServidorMedia(django_app, proxy='')),
+            ('ServidorMedia + X-Accel-Redirect', ServidorMedia(django_app, proxy='nginx')),
+        ]
+
+        for nombre_archivo, kb in ARCHIVOS:
+            ruta = f'/media/{nombre_archivo}'
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n{nombre_archivo} ({kb} KB)'))
+            base = None
+            for nombre, app in aplicaciones:
+                por_segundo = self.medir(app, ruta, peticiones)
+                base = base or por_segundo
+                self.stdout.write(f'  {nombre:<36} {por_segundo:>9.0f} pet/s  x{por_segundo / base:.1f}')
+
+            # Revalidación de una copia ya cacheada por el cliente
+            _, cabeceras, _ = self.pedir(aplicaciones[1][1], ruta)
+            base = self.medir(django_app, ruta, peticiones, HTTP_IF_MODIFIED_SINCE=cabeceras['Last-Modified'])
+            revalidar = self.medir(aplicaciones[1][1], ruta, peticiones, HTTP_IF_NONE_MATCH=cabeceras['ETag'])
+            self.stdout.write(
+                f'  304 static.serve {base:.0f} pet/s | 304 ServidorMedia {revalidar:.0f} pet/s  x{revalidar / base:.1f}'
+            )
+
+    def pedir(self, app, ruta, **extra):
+        environ = {'PATH_INFO': ruta, 'REQUEST_METHOD': 'GET', 'HTTP_HOST': 'localhost', **extra}
+        setup_testing_defaults(environ)
+        environ['wsgi.file_wrapper'] = FileWrapper
+        respuesta = {}
+
+        def start_response(estado, cabeceras, exc_info=None):
+            respuesta['estado'] = estado
+            respuesta['cabeceras'] = dict(cabeceras)
+
+        cuerpo = app(environ, start_response)
+        try:
+            leidos = sum(len(bloque) for bloque in cuerpo)
+        finally:
+            if hasattr(cuerpo, 'close'):
+                cuerpo.close()
+        return respuesta['estado'], respuesta['cabeceras'], leidos
+
+    def medir(self, app, ruta, peticiones, **extra):
+        estado, _, _ = self.pedir(app, ruta, **extra)
+        if estado[:3] not in ('200', '304'):
+            self.stderr.write(f'{ruta}: respuesta inesperada {estado}')
+        inicio = time.perf_counter()
+        for _ in range(peticiones):
+            self.pedir(app, ruta, **extra)
+        return peticiones / (time.perf_counter() - inicio)
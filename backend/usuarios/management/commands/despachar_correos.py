@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from usuarios.correo import drenar_bandeja
+
+
+class Command(BaseCommand):
+    help = 'Envía los correos pendientes de la bandeja de salida (correo_saliente).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--una-vez', action='store_true', help='Drena la bandeja una vez y termina.')
+        parser.add_argument('--intervalo', type=float, default=5, help='Segundos entre revisiones.')
+
+    def handle(self, *args, **options):
+        if options['una_vez']:
+            total = drenar_bandeja()
+            self.stdout.write(self.style.SUCCESS(f'Correos procesados: {total}'))
+            return
+
+        self.stdout.write(f"Despachador de correos activo (cada {options['intervalo']}s).")
+        while True:
+            close_old_connections()
+            total = drenar_bandeja()
+            if total:
+                self.stdout.write(f'Correos procesados: {total}')
+            time.sleep(options['intervalo'])
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from reserva_restaurante.task import enviar_confirmaciones_restaurante_pendientes
+from reserva_salon.task import enviar_confirmaciones_salon_pendientes
+
+
+class Command(BaseCommand):
+    help = (
+        'Envía por lotes las confirmaciones de reservas de salón y restaurante pendientes '
+        '(las que no se pudieron encolar en Celery o agotaron sus reintentos).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--una-vez', action='store_true', help='Envía un lote de cada tipo y termina.')
+        parser.add_argument('--intervalo', type=float, default=300, help='Segundos entre revisiones.')
+        parser.add_argument('--limite', type=int, default=500, help='Reservas por lote.')
+
+    def enviar(self, limite):
+        # Se ejecutan en este proceso, sin pasar por el broker
+        for lote in (enviar_confirmaciones_salon_pendientes, enviar_confirmaciones_restaurante_pendientes):
+            self.stdout.write(lote(limite))
+
+    def handle(self, *args, **options):
+        if options['una_vez']:
+            self.enviar(options['limite'])
+            return
+
+        self.stdout.write(f"Envío de confirmaciones activo (cada {options['intervalo']}s).")
+        while True:
+            close_old_connections()
+            self.enviar(options['limite'])
+            time.sleep(options['intervalo'])
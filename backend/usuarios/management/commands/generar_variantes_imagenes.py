@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from habitacion.models import Habitacion, ImagenHabitacion
+from plato.models import Plato
+from restaurante_mesa.models import RestauranteMesa
+from salon_eventos.models import SalonEvento
+from usuarios.imagenes import necesita_variantes, procesar_imagen
+
+MODELOS = (Habitacion, ImagenHabitacion, Plato, RestauranteMesa, SalonEvento)
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera las variantes thumb/card/hero (WebP y JPEG) de las imágenes que aún no las '
+        'tienen o cuya imagen cambió. Necesario con IMAGENES_PROCESAMIENTO=externo y tras cargas masivas.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--forzar', action='store_true', help='Regenera también las que ya están al día.')
+
+    def handle(self, *args, **options):
+        total = errores = 0
+        for modelo in MODELOS:
+            filas = modelo.objects.only('pk', 'imagen', 'imagen_variantes').iterator()
+            for instancia in filas:
+                if not (options['forzar'] and instancia.imagen) and not necesita_variantes(instancia):
+                    continue
+                if options['forzar']:
+                    # Se descarta el origen guardado para que procesar_imagen regenere
+                    modelo.objects.filter(pk=instancia.pk).update(imagen_variantes={})
+                try:
+                    total += procesar_imagen(modelo, instancia.pk)
+                except Exception as e:
+                    errores += 1
+                    self.stderr.write(f'{modelo._meta.label} #{instancia.pk}: {e}')
+
+        self.stdout.write(self.style.SUCCESS(f'Variantes generadas: {total} imágenes ({errores} con error).'))
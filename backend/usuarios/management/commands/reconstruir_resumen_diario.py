@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from usuarios.models import ResumenDiario
+from usuarios.resumen import reconstruir_resumen
+
+
+class Command(BaseCommand):
+    help = 'Regenera la tabla resumen_diario del Dashboard a partir de las reservas existentes.'
+
+    def handle(self, *args, **options):
+        reconstruir_resumen()
+        self.stdout.write(self.style.SUCCESS(
+            f'Resumen diario regenerado: {ResumenDiario.objects.count()} filas.'
+        ))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('linea', models.CharField(choices=[('habitacion', 'Habitaciones'), ('restaurante', 'Restaurante'), ('salon', 'Salones de Eventos')], max_length=20)),
+                ('reservas', models.PositiveIntegerField(default=0)),
+                ('noches_habitacion', models.PositiveIntegerField(default=0)),
+                ('ingresos', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+            ],
+            options={
+                'db_table': 'resumen_diario',
+                'ordering': ['-fecha', 'linea'],
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'linea'), name='unique_resumen_fecha_linea')],
+            },
+        ),
+    ]
@@ -0,0 +1,69 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import migrations
+from django.db.models import Count, Sum, Q, F, DurationField, ExpressionWrapper
+from django.db.models.functions import TruncDate
+
+# (modelo, campo de fecha, campo de total, estados que cuentan como ingreso),
+# igual que LINEAS en usuarios/resumen.py
+LINEAS = {
+    'habitacion': ('reserva_habitacion.ReservaHabitacion', 'fecha_checkin', 'total', ['confirmada', 'completada']),
+    'restaurante': ('reserva_restaurante.ReservaRestaurante', 'fecha_reserva', 'total_reserva', ['confirmada']),
+    'salon': ('reserva_salon.ReservaSalon', 'fecha_evento', 'total_reserva', ['confirmada']),
+}
+
+
+def poblar_resumen(apps, schema_editor):
+    """
+    Llena resumen_diario con las reservas existentes (lo mismo que el comando
+    reconstruir_resumen_diario); sin esto el Dashboard mostraría 0 hasta la
+    primera reserva de cada día.
+    """
+    ResumenDiario = apps.get_model('usuarios', 'ResumenDiario')
+    ResumenDiario.objects.all().delete()
+
+    filas = []
+    for linea, (etiqueta, campo, campo_total, estados_ingreso) in LINEAS.items():
+        modelo = apps.get_model(etiqueta)
+        es_datetime = modelo._meta.get_field(campo).get_internal_type() == 'DateTimeField'
+        agregados = {
+            'reservas': Count('id'),
+            'ingresos': Sum(campo_total, filter=Q(estado__in=estados_ingreso)),
+        }
+        if linea == 'habitacion':
+            agregados['noches'] = Sum(
+                ExpressionWrapper(F('fecha_checkout') - F('fecha_checkin'), output_field=DurationField()),
+                filter=~Q(estado='cancelada')
+            )
+
+        por_dia = (
+            modelo.objects.filter(**{f'{campo}__isnull': False})
+            .annotate(dia=TruncDate(campo) if es_datetime else F(campo))
+            .order_by().values('dia').annotate(**agregados)
+        )
+        for fila in por_dia:
+            noches = fila.get('noches') or timedelta(0)
+            filas.append(ResumenDiario(
+                fecha=fila['dia'],
+                linea=linea,
+                reservas=fila['reservas'],
+                noches_habitacion=max(noches.days, 0),
+                ingresos=fila['ingresos'] or Decimal('0.00'),
+            ))
+
+    ResumenDiario.objects.bulk_create(filas, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('usuarios', '0003_correo_saliente'),
+        ('reserva_habitacion', '0001_initial'),
+        ('reserva_restaurante', '0001_initial'),
+        ('reserva_salon', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(poblar_resumen, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,7 @@
 # proyectohotel-backend/usuarios/models.py
 from django.db import models
 from django.contrib.auth.models import User # <-- ¡IMPORTANTE! Usamos el User de Django
+from django.utils import timezone
 
 # Definición de los roles para el campo 'choices' (US-003)
 ROLES_USUARIO = [
@@ -37,3 +38,80 @@ class Perfil(models.Model):
     class Meta:
         # Usa snake_case para el nombre de la tabla en la BD
         db_table = 'perfil_usuario'
+
+
+class ResumenDiario(models.Model):
+    """
+    Resumen diario pre-agregado para el Dashboard (una fila por día y línea de negocio).
+
+    Se actualiza de forma incremental desde usuarios/signals.py cuando cambia
+    una reserva, de modo que el Dashboard no recorre las tablas de reservas.
+    La fecha es la de inicio de la reserva (check-in, reserva de mesa o evento).
+    """
+    LINEA_HABITACION = 'habitacion'
+    LINEA_RESTAURANTE = 'restaurante'
+    LINEA_SALON = 'salon'
+
+    LINEA_CHOICES = [
+        (LINEA_HABITACION, 'Habitaciones'),
+        (LINEA_RESTAURANTE, 'Restaurante'),
+        (LINEA_SALON, 'Salones de Eventos'),
+    ]
+
+    fecha = models.DateField()
+    linea = models.CharField(max_length=20, choices=LINEA_CHOICES)
+    reservas = models.PositiveIntegerField(default=0)
+    # Noches reservadas (solo habitaciones, excluye canceladas)
+    noches_habitacion = models.PositiveIntegerField(default=0)
+    ingresos = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    def __str__(self):
+        return f"{self.fecha} - {self.get_linea_display()}: {self.reservas} reservas"
+
+    class Meta:
+        db_table = 'resumen_diario'
+        ordering = ['-fecha', 'linea']
+        constraints = [
+            models.UniqueConstraint(fields=['fecha', 'linea'], name='unique_resumen_fecha_linea')
+        ]
+
+
+class CorreoSaliente(models.Model):
+    """
+    Bandeja de salida (outbox) de correos transaccionales.
+
+    Las vistas solo insertan la fila dentro de su transacción; el envío real
+    lo hace el despachador de usuarios/correo.py fuera del ciclo de la petición.
+    """
+    ESTADO_PENDIENTE = 'pendiente'
+    ESTADO_ENVIADO = 'enviado'
+    ESTADO_FALLIDO = 'fallido'
+
+    ESTADO_CHOICES = [
+        (ESTADO_PENDIENTE, 'Pendiente'),
+        (ESTADO_ENVIADO, 'Enviado'),
+        (ESTADO_FALLIDO, 'Fallido'),
+    ]
+
+    destinatario = models.EmailField()
+    nombre_destinatario = models.CharField(max_length=150, blank=True)
+    mensaje = models.TextField(blank=True)
+    responder_a = models.EmailField(blank=True)
+
+    estado = models.CharField(max_length=20, choices=ESTADO_CHOICES, default=ESTADO_PENDIENTE)
+    intentos = models.PositiveIntegerField(default=0)
+    ultimo_error = models.TextField(blank=True)
+    # Momento a partir del cual el despachador puede (re)intentar el envío
+    proximo_intento = models.DateTimeField(default=timezone.now)
+    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_envio = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Correo {self.id} a {self.destinatario} ({self.get_estado_display()})"
+
+    class Meta:
+        db_table = 'correo_saliente'
+        ordering = ['-fecha_creacion']
+        indexes = [
+            models.Index(fields=['estado', 'proximo_intento'], name='correo_pendiente_idx'),
+        ]
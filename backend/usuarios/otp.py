@@ -0,0 +1,102 @@
+# usuarios/otp.py
+
+"""
+Servicio de códigos OTP respaldado por el framework de caché de Django.
+
+Los códigos caducan solos gracias al TTL nativo de la caché, sin lecturas
+ni escrituras en django_session. También limita el número de intentos por
+código. La caché tiene que ser compartida por todos los workers (Redis o la
+tabla de caché de la base de datos, ver backend/cache.py): un código emitido
+por un worker se verifica en otro.
+"""
+
+import hmac
+import re
+import secrets
+
+from django.conf import settings
+from django.core.cache import cache
+
+OTP_TTL_SEGUNDOS = getattr(settings, 'OTP_TTL_SEGUNDOS', 600)
+OTP_MAX_INTENTOS = getattr(settings, 'OTP_MAX_INTENTOS', 5)
+
+# Propósitos de los flujos existentes
+OTP_RESERVA_HABITACION = 'reserva_habitacion'
+OTP_RESERVA_SALON = 'reserva_salon'
+OTP_RECUPERAR_PASSWORD = 'recuperar_password'
+
+# Resultados de verificar_codigo()
+OTP_VALIDO = 'valido'
+OTP_EXPIRADO = 'expirado'
+OTP_INCORRECTO = 'incorrecto'
+OTP_BLOQUEADO = 'bloqueado'
+
+FORMATO_CODIGO = re.compile(r'[0-9]{6}')
+
+
+def _clave(proposito, sujeto):
+    return f'otp:{proposito}:{sujeto}'
+
+
+def _clave_intentos(proposito, sujeto):
+    return f'otp:{proposito}:{sujeto}:intentos'
+
+
+def sujeto_usuario(user):
+    """Identificador del OTP para flujos de usuarios autenticados."""
+    return f'usuario-{user.pk}'
+
+
+def emitir_codigo(proposito, sujeto=None, datos=None):
+    """
+    Genera un código de 6 dígitos y lo guarda en caché con TTL.
+
+    Si no se indica `sujeto` se crea un token aleatorio que el cliente debe
+    devolver al verificar. Retorna (sujeto, codigo).
+    """
+    if sujeto is None:
+        sujeto = secrets.token_urlsafe(16)
+
+    codigo = str(secrets.randbelow(900000) + 100000)
+    cache.set(_clave(proposito, sujeto), {'codigo': codigo, 'datos': datos or {}}, OTP_TTL_SEGUNDOS)
+    cache.delete(_clave_intentos(proposito, sujeto))
+    return sujeto, codigo
+
+
+def verificar_codigo(proposito, sujeto, codigo_ingresado, consumir=True):
+    """
+    Verifica un código. Retorna (resultado, datos) donde resultado es
+    OTP_VALIDO, OTP_EXPIRADO, OTP_INCORRECTO u OTP_BLOQUEADO.
+
+    Tras OTP_MAX_INTENTOS fallidos el código se invalida. Si `consumir` es
+    True, un código válido se elimina para que no pueda reutilizarse.
+    """
+    if not sujeto:
+        return OTP_EXPIRADO, None
+
+    registro = cache.get(_clave(proposito, sujeto))
+    if not registro:
+        return OTP_EXPIRADO, None
+
+    # compare_digest solo admite ASCII: se valida el formato antes de comparar
+    codigo_ingresado = str(codigo_ingresado or '').strip()
+    if not FORMATO_CODIGO.fullmatch(codigo_ingresado) or not hmac.compare_digest(codigo_ingresado, registro['codigo']):
+        clave_intentos = _clave_intentos(proposito, sujeto)
+        cache.add(clave_intentos, 0, OTP_TTL_SEGUNDOS)
+        try:
+            intentos = cache.incr(clave_intentos)
+        except ValueError:
+            # La clave expiró entre add() e incr()
+            intentos = 1
+        if intentos >= OTP_MAX_INTENTOS:
+            invalidar_codigo(proposito, sujeto)
+            return OTP_BLOQUEADO, None
+        return OTP_INCORRECTO, None
+
+    if consumir:
+        invalidar_codigo(proposito, sujeto)
+    return OTP_VALIDO, registro['datos']
+
+
+def invalidar_codigo(proposito, sujeto):
+    cache.delete_many([_clave(proposito, sujeto), _clave_intentos(proposito, sujeto)])
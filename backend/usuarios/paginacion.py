@@ -0,0 +1,49 @@
+# usuarios/paginacion.py
+
+"""
+Paginación por cursor (keyset) compartida por los ViewSets de reservas y catálogos.
+
+A diferencia de PageNumberPagination no ejecuta COUNT(*) ni OFFSET sobre
+toda la tabla: cada página es un WHERE sobre la columna de orden indexada,
+así el tiempo de respuesta no crece con el historial.
+
+Para no romper a los clientes que esperan una lista, solo se pagina cuando
+la petición trae ?cursor= o ?page_size=, salvo que
+settings.PAGINACION_OBLIGATORIA sea True.
+"""
+
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+PAGINACION_TAMANO = getattr(settings, 'PAGINACION_TAMANO', 50)
+PAGINACION_MAXIMA = getattr(settings, 'PAGINACION_MAXIMA', 200)
+PAGINACION_OBLIGATORIA = getattr(settings, 'PAGINACION_OBLIGATORIA', False)
+
+
+class CursorPaginacion(CursorPagination):
+    """
+    Respuesta: {"next": url, "previous": url, "results": [...]}.
+
+    El orden por defecto es ('-fecha_creacion', '-id'); cada ViewSet puede
+    definir `orden_paginacion` con otra columna indexada e inmutable. El cursor
+    sustituye el orden del queryset: no sirve para vistas que ordenan de otra
+    forma (relevancia, orden del menú).
+    """
+    page_size = PAGINACION_TAMANO
+    page_size_query_param = 'page_size'
+    max_page_size = PAGINACION_MAXIMA
+    ordering = ('-fecha_creacion', '-id')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not PAGINACION_OBLIGATORIA and not (
+            self.cursor_query_param in request.query_params
+            or self.page_size_query_param in request.query_params
+        ):
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'orden_paginacion', self.ordering)
+        if isinstance(ordering, str):
+            return (ordering,)
+        return tuple(ordering)
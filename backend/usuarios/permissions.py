@@ -7,16 +7,37 @@ from rest_framework.permissions import BasePermission # BasePermission es redund
 from django.contrib.auth.models import User # Necesario para la clase IsOwnerOrAdmin
 from .models import Perfil 
 
+# =========================================================
+# ROL DEL USUARIO
+# =========================================================
+# JWTRolAuthentication (usuarios/authentication.py) carga el perfil junto con
+# el usuario y deja el rol en request.user.rol. Los tokens también llevan el
+# rol como claim, pero solo para el cliente: los permisos usan el de la BD.
+
+CLAIM_ROL = 'rol'
+
+
+def rol_desde_bd(user):
+    """Rol guardado en el perfil, o None si el usuario no tiene perfil."""
+    try:
+        return user.perfil.rol
+    except Perfil.DoesNotExist:
+        return None
+
+
 # Función auxiliar para obtener el rol de forma segura
 def get_user_role(user):
     """Devuelve el rol del usuario o None si no está autenticado o no tiene perfil."""
     if not user.is_authenticated:
         return None
     
-    # Accede al perfil directamente usando la relación OneToOne (request.user.perfil)
-    if hasattr(user, 'perfil'):
-        return user.perfil.rol
-    return None
+    # Autenticación JWT: el rol ya viene resuelto (perfil cargado con el usuario)
+    if hasattr(user, 'rol'):
+        return user.rol
+
+    # Otras autenticaciones (sesión del admin, etc.): se consulta el perfil una vez
+    user.rol = rol_desde_bd(user)
+    return user.rol
 
 class IsAdministrador(BasePermission):
     """Permite acceso solo a usuarios con rol 'ADMINISTRADOR'."""
@@ -0,0 +1,127 @@
+# usuarios/resumen.py
+
+"""
+Cálculo del resumen diario (ResumenDiario) usado por el Dashboard.
+
+Cada línea de negocio se agrega con un GROUP BY por día (TruncDate en los
+campos DateTime). El rango se filtra sobre el campo tal cual ([día, día + 1)
+en hora local), así la actualización de un día usa el índice de la fecha.
+El resultado se escribe con un upsert sobre (fecha, linea): dos recálculos
+concurrentes del mismo día no chocan con la restricción única.
+"""
+
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Sum, Q, F, DurationField, ExpressionWrapper
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import ResumenDiario
+from reserva_habitacion.models import ReservaHabitacion
+from reserva_restaurante.models import ReservaRestaurante
+from reserva_salon.models import ReservaSalon
+
+
+LINEAS = {
+    ResumenDiario.LINEA_HABITACION: {
+        'modelo': ReservaHabitacion,
+        'campo_fecha': 'fecha_checkin',
+        'campo_total': 'total',
+        'estados_ingreso': ['confirmada', 'completada'],
+    },
+    ResumenDiario.LINEA_RESTAURANTE: {
+        'modelo': ReservaRestaurante,
+        'campo_fecha': 'fecha_reserva',
+        'campo_total': 'total_reserva',
+        'estados_ingreso': ['confirmada'],
+    },
+    ResumenDiario.LINEA_SALON: {
+        'modelo': ReservaSalon,
+        'campo_fecha': 'fecha_evento',
+        'campo_total': 'total_reserva',
+        'estados_ingreso': ['confirmada'],
+    },
+}
+
+
+def _limite(fecha, es_datetime):
+    """Inicio del día `fecha` en hora local si el campo es DateTime."""
+    if es_datetime:
+        return timezone.make_aware(datetime.combine(fecha, datetime.min.time()))
+    return fecha
+
+
+def _agregar_por_dia(linea, desde=None, hasta=None):
+    """Filas {dia, reservas, ingresos, noches} de una línea, agrupadas por día."""
+    config = LINEAS[linea]
+    modelo = config['modelo']
+    campo = config['campo_fecha']
+
+    es_datetime = modelo._meta.get_field(campo).get_internal_type() == 'DateTimeField'
+    dia = TruncDate(campo) if es_datetime else F(campo)
+
+    queryset = modelo.objects.filter(**{f'{campo}__isnull': False})
+    if desde:
+        queryset = queryset.filter(**{f'{campo}__gte': _limite(desde, es_datetime)})
+    if hasta:
+        queryset = queryset.filter(**{f'{campo}__lt': _limite(hasta + timedelta(days=1), es_datetime)})
+    queryset = queryset.annotate(dia=dia)
+
+    agregados = {
+        'reservas': Count('id'),
+        'ingresos': Sum(config['campo_total'], filter=Q(estado__in=config['estados_ingreso'])),
+    }
+    if linea == ResumenDiario.LINEA_HABITACION:
+        agregados['noches'] = Sum(
+            ExpressionWrapper(F('fecha_checkout') - F('fecha_checkin'), output_field=DurationField()),
+            filter=~Q(estado='cancelada')
+        )
+
+    return queryset.order_by().values('dia').annotate(**agregados)
+
+
+def actualizar_resumen(linea, desde=None, hasta=None):
+    """
+    Recalcula el resumen de una línea para el rango [desde, hasta] (todo si no se indica).
+    Para una actualización incremental basta con pasar el mismo día en ambos extremos.
+    """
+    filas = []
+    for fila in _agregar_por_dia(linea, desde, hasta):
+        noches = fila.get('noches') or timedelta(0)
+        filas.append(ResumenDiario(
+            fecha=fila['dia'],
+            linea=linea,
+            reservas=fila['reservas'],
+            noches_habitacion=max(noches.days, 0),
+            ingresos=fila['ingresos'] or Decimal('0.00'),
+        ))
+
+    existentes = ResumenDiario.objects.filter(linea=linea)
+    if desde:
+        existentes = existentes.filter(fecha__gte=desde)
+    if hasta:
+        existentes = existentes.filter(fecha__lte=hasta)
+
+    with transaction.atomic():
+        ResumenDiario.objects.bulk_create(
+            filas,
+            update_conflicts=True,
+            unique_fields=['fecha', 'linea'],
+            update_fields=['reservas', 'noches_habitacion', 'ingresos'],
+        )
+        # Días del rango que se quedaron sin reservas
+        existentes.exclude(fecha__in=[fila.fecha for fila in filas]).delete()
+
+
+def reconstruir_resumen():
+    """Regenera el resumen completo de todas las líneas."""
+    for linea in LINEAS:
+        actualizar_resumen(linea)
+
+
+def actualizar_resumen_fechas(linea, fechas):
+    """Actualización incremental: recalcula solo los días indicados."""
+    for fecha in sorted({f for f in fechas if f}):
+        actualizar_resumen(linea, fecha, fecha)
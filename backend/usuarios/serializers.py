@@ -3,9 +3,13 @@ from django.contrib.auth.models import User
 from rest_framework.validators import UniqueValidator
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from .models import Perfil  # <-- Importamos el modelo Perfil
+from .authentication import RefreshTokenConRol
 
 # --- Serializador para Login (CORREGIDO PARA ADMIN) ---
 class MyTokenObtainPairSerializer(TokenObtainPairSerializer):
+    # Incluye el claim 'rol' para el cliente (ver usuarios/authentication.py)
+    token_class = RefreshTokenConRol
+
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
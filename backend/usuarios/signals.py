@@ -0,0 +1,61 @@
+# usuarios/signals.py
+
+from datetime import date, datetime
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .resumen import LINEAS, actualizar_resumen_fechas
+from reserva_habitacion.models import ReservaHabitacion
+from reserva_restaurante.models import ReservaRestaurante
+from reserva_salon.models import ReservaSalon
+
+# =========================================================
+# MANTENIMIENTO INCREMENTAL DEL RESUMEN DIARIO (Dashboard)
+# =========================================================
+
+LINEA_POR_MODELO = {config['modelo']: linea for linea, config in LINEAS.items()}
+
+
+def _a_fecha(valor):
+    """Convierte el valor del campo de fecha (date, datetime o texto) en date local."""
+    if isinstance(valor, str):
+        valor = parse_datetime(valor) or parse_date(valor)
+    if isinstance(valor, datetime):
+        return timezone.localdate(valor) if timezone.is_aware(valor) else valor.date()
+    if isinstance(valor, date):
+        return valor
+    return None
+
+
+@receiver(pre_save, sender=ReservaHabitacion)
+@receiver(pre_save, sender=ReservaRestaurante)
+@receiver(pre_save, sender=ReservaSalon)
+def guardar_fecha_anterior(sender, instance, **kwargs):
+    """Si la reserva cambia de día, también hay que recalcular el día anterior."""
+    instance._fecha_resumen_anterior = None
+    if instance.pk:
+        campo = LINEAS[LINEA_POR_MODELO[sender]]['campo_fecha']
+        instance._fecha_resumen_anterior = sender.objects.filter(
+            pk=instance.pk
+        ).values_list(campo, flat=True).first()
+
+
+@receiver(post_save, sender=ReservaHabitacion)
+@receiver(post_save, sender=ReservaRestaurante)
+@receiver(post_save, sender=ReservaSalon)
+@receiver(post_delete, sender=ReservaHabitacion)
+@receiver(post_delete, sender=ReservaRestaurante)
+@receiver(post_delete, sender=ReservaSalon)
+def actualizar_resumen_signal(sender, instance, **kwargs):
+    linea = LINEA_POR_MODELO[sender]
+    campo = LINEAS[linea]['campo_fecha']
+    fechas = [
+        _a_fecha(getattr(instance, campo)),
+        _a_fecha(getattr(instance, '_fecha_resumen_anterior', None)),
+    ]
+    # Se ejecuta tras el commit para leer el estado definitivo de la reserva
+    # robust: la reserva ya está guardada; un fallo del resumen no debe dar 500
+    transaction.on_commit(lambda: actualizar_resumen_fechas(linea, fechas), robust=True)
@@ -0,0 +1,279 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from backend.cache_respuestas import ultima_modificacion, versiones_modelos
+from habitacion.models import Habitacion
+from plato.models import Plato
+from reserva_habitacion.models import ReservaHabitacion
+from reserva_restaurante.models import ReservaRestaurante
+from restaurante_mesa.models import RestauranteMesa
+from servicio_adicional.models import ServicioAdicional
+from . import correo, otp
+from .authentication import RefreshTokenConRol
+from .models import CorreoSaliente, Perfil, ResumenDiario
+from .resumen import actualizar_resumen, reconstruir_resumen
+
+
+class ResumenDiarioTest(TestCase):
+
+    def setUp(self):
+        self.habitacion = Habitacion.objects.create(numero_habitacion='R1', precio_base=Decimal('100'))
+        self.usuario = User.objects.create_user('cliente', 'cliente@test.com', 'x')
+        self.mesa = RestauranteMesa.objects.create(numero_mesa='1', capacidad=4)
+
+    def reservar(self, checkin, checkout, estado='confirmada', habitacion=None):
+        with self.captureOnCommitCallbacks(execute=True):
+            return ReservaHabitacion.objects.create(
+                habitacion=habitacion or self.habitacion, fecha_checkin=checkin, fecha_checkout=checkout, estado=estado,
+            )
+
+    def resumen(self, linea, fecha):
+        return ResumenDiario.objects.filter(linea=linea, fecha=fecha).values_list(
+            'reservas', 'noches_habitacion', 'ingresos'
+        ).first()
+
+    def test_incremental_al_crear_y_mover(self):
+        reserva = self.reservar(date(2030, 5, 1), date(2030, 5, 3))
+        otra = Habitacion.objects.create(numero_habitacion='R2', precio_base=Decimal('100'))
+        self.reservar(date(2030, 5, 1), date(2030, 5, 2), estado='pendiente', habitacion=otra)
+        # Solo la confirmada cuenta como ingreso; las noches excluyen canceladas
+        self.assertEqual(self.resumen('habitacion', date(2030, 5, 1)), (2, 3, Decimal('200.00')))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            reserva.fecha_checkin, reserva.fecha_checkout = date(2030, 5, 4), date(2030, 5, 5)
+            reserva.save()
+        self.assertEqual(self.resumen('habitacion', date(2030, 5, 1)), (1, 1, Decimal('0.00')))
+        self.assertEqual(self.resumen('habitacion', date(2030, 5, 4)), (1, 1, Decimal('100.00')))
+
+    def test_dia_sin_reservas_se_elimina(self):
+        reserva = self.reservar(date(2030, 6, 1), date(2030, 6, 2))
+        with self.captureOnCommitCallbacks(execute=True):
+            reserva.delete()
+        self.assertIsNone(self.resumen('habitacion', date(2030, 6, 1)))
+
+    def test_recalculo_repetido_no_choca(self):
+        self.reservar(date(2030, 7, 1), date(2030, 7, 2))
+        # El upsert sobre (fecha, linea) no depende del borrado previo
+        actualizar_resumen('habitacion', date(2030, 7, 1), date(2030, 7, 1))
+        actualizar_resumen('habitacion', date(2030, 7, 1), date(2030, 7, 1))
+        self.assertEqual(ResumenDiario.objects.filter(linea='habitacion').count(), 1)
+
+    def test_dia_local_de_campos_datetime(self):
+        # 23:30 en Caracas ya es el día siguiente en UTC
+        noche = timezone.make_aware(datetime(2030, 8, 1, 23, 30))
+        with self.captureOnCommitCallbacks(execute=True):
+            ReservaRestaurante.objects.create(
+                usuario=self.usuario, mesa=self.mesa, fecha_reserva=noche, cantidad_personas=2,
+                estado='confirmada', total_reserva=Decimal('40'),
+            )
+        self.assertEqual(self.resumen('restaurante', date(2030, 8, 1)), (1, 0, Decimal('40.00')))
+        self.assertIsNone(self.resumen('restaurante', date(2030, 8, 2)))
+
+    def test_reconstruir(self):
+        self.reservar(date(2030, 9, 1), date(2030, 9, 4))
+        ResumenDiario.objects.all().delete()
+        reconstruir_resumen()
+        self.assertEqual(self.resumen('habitacion', date(2030, 9, 1)), (1, 3, Decimal('300.00')))
+
+
+class CodigoOTPTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_valido_y_de_un_solo_uso(self):
+        sujeto, codigo = otp.emitir_codigo(otp.OTP_RECUPERAR_PASSWORD, datos={'user_id': 7})
+        self.assertRegex(codigo, r'^[0-9]{6}$')
+        self.assertEqual(otp.verificar_codigo(otp.OTP_RECUPERAR_PASSWORD, sujeto, codigo), (otp.OTP_VALIDO, {'user_id': 7}))
+        self.assertEqual(otp.verificar_codigo(otp.OTP_RECUPERAR_PASSWORD, sujeto, codigo)[0], otp.OTP_EXPIRADO)
+
+    def test_bloqueo_tras_intentos_fallidos(self):
+        sujeto, codigo = otp.emitir_codigo(otp.OTP_RESERVA_SALON, 'usuario-1')
+        incorrecto = '000000' if codigo != '000000' else '111111'
+        for _ in range(otp.OTP_MAX_INTENTOS - 1):
+            self.assertEqual(otp.verificar_codigo(otp.OTP_RESERVA_SALON, sujeto, incorrecto)[0], otp.OTP_INCORRECTO)
+        self.assertEqual(otp.verificar_codigo(otp.OTP_RESERVA_SALON, sujeto, incorrecto)[0], otp.OTP_BLOQUEADO)
+        # Bloqueado: ni el código correcto vale ya
+        self.assertEqual(otp.verificar_codigo(otp.OTP_RESERVA_SALON, sujeto, codigo)[0], otp.OTP_EXPIRADO)
+
+    def test_expiracion(self):
+        with mock.patch.object(otp, 'OTP_TTL_SEGUNDOS', 0):
+            sujeto, codigo = otp.emitir_codigo(otp.OTP_RESERVA_SALON, 'usuario-2')
+        self.assertEqual(otp.verificar_codigo(otp.OTP_RESERVA_SALON, sujeto, codigo)[0], otp.OTP_EXPIRADO)
+
+    def test_entrada_no_ascii_es_incorrecta(self):
+        sujeto, codigo = otp.emitir_codigo(otp.OTP_RESERVA_SALON, 'usuario-3')
+        for entrada in ('１２３４５６', 'ñ' * 6, None, ' '):
+            self.assertEqual(otp.verificar_codigo(otp.OTP_RESERVA_SALON, sujeto, entrada, consumir=False)[0], otp.OTP_INCORRECTO)
+
+
+class RolEnTokenTest(TestCase):
+
+    def setUp(self):
+        self.usuario = User.objects.create_user('gerente', 'gerente@test.com', 'x')
+        self.perfil = Perfil.objects.create(usuario=self.usuario, rol='ADMINISTRADOR', documento_identidad='V-1')
+        token = RefreshTokenConRol.for_user(self.usuario).access_token
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.url = reverse('tarifa-dinamica-list')
+
+    def test_rol_con_el_usuario_en_una_consulta(self):
+        # Usuario + perfil (JOIN) y el listado
+        with self.assertNumQueries(2):
+            respuesta = self.client.get(self.url)
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_degradar_aplica_a_tokens_ya_emitidos(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        Perfil.objects.filter(pk=self.perfil.pk).update(rol='CLIENTE')
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_desactivar_aplica_a_tokens_ya_emitidos(self):
+        User.objects.filter(pk=self.usuario.pk).update(is_active=False)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+
+class CacheCatalogoTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.servicio = ServicioAdicional.objects.create(nombre='Spa', tipo=ServicioAdicional.TIPO_SPA, precio=Decimal('30'))
+        self.url = reverse('servicio-adicional-list')
+
+    def nombres(self):
+        return [fila['nombre'] for fila in APIClient().get(self.url).data]
+
+    def test_guardar_invalida_tras_el_commit(self):
+        antes = versiones_modelos(ServicioAdicional)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.servicio.save()
+        self.assertNotEqual(versiones_modelos(ServicioAdicional), antes)
+
+    def test_respuesta_cacheada_hasta_invalidar(self):
+        self.assertEqual(self.nombres(), ['Spa'])
+        # update() no emite señales: se sigue sirviendo la copia
+        ServicioAdicional.objects.filter(pk=self.servicio.pk).update(nombre='Masaje')
+        self.assertEqual(self.nombres(), ['Spa'])
+
+    @override_settings(CACHE_COMPARTIDA_REQUERIDA=True)
+    def test_sin_cache_compartida_no_se_cachea(self):
+        self.assertEqual(self.nombres(), ['Spa'])
+        ServicioAdicional.objects.filter(pk=self.servicio.pk).update(nombre='Masaje')
+        self.assertEqual(self.nombres(), ['Masaje'])
+
+
+class GetCondicionalTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        Habitacion.objects.create(numero_habitacion='C1', precio_base=Decimal('100'))
+        self.url = reverse('habitacion-list')
+
+    def test_etag_vigente_responde_304(self):
+        etag = APIClient().get(self.url)['ETag']
+        respuesta = APIClient().get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 304)
+
+    def test_cache_vaciada_no_reutiliza_versiones(self):
+        etag = APIClient().get(self.url)['ETag']
+        # Cambio que no llega a invalidar (p. ej. la caché se vació después)
+        Habitacion.objects.update(precio_base=Decimal('120'))
+        cache.clear()
+        respuesta = APIClient().get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotEqual(respuesta['ETag'], etag)
+
+    def test_modificado_inicial_desde_fecha_actualizacion(self):
+        plato = Plato.objects.create(nombre='Pabellón', precio=Decimal('12'))
+        Plato.objects.filter(pk=plato.pk).update(fecha_actualizacion=timezone.make_aware(datetime(2030, 1, 2, 3, 4, 5)))
+        cache.clear()
+        esperado = int(timezone.make_aware(datetime(2030, 1, 2, 3, 4, 5)).timestamp())
+        self.assertEqual(ultima_modificacion(Plato), esperado)
+
+
+class BandejaSalidaTest(TestCase):
+
+    def setUp(self):
+        for nombre, valor in (('CORREO_ENVIADOR', 'local'), ('CORREO_DESPACHO', 'sincrono')):
+            ajuste = mock.patch.object(correo, nombre, valor)
+            ajuste.start()
+            self.addCleanup(ajuste.stop)
+        correo.EnviadorLocal.enviados.clear()
+
+    def encolar(self, mensaje='123456'):
+        return correo.encolar_correo('huesped@test.com', mensaje, nombre='Huésped')
+
+    def test_envio_solo_tras_el_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            creado = self.encolar()
+            self.assertEqual(list(correo.EnviadorLocal.enviados), [])
+        self.assertEqual([e['mensaje'] for e in correo.EnviadorLocal.enviados], ['123456'])
+        creado.refresh_from_db()
+        self.assertEqual(creado.estado, CorreoSaliente.ESTADO_ENVIADO)
+        # El mensaje (puede ser un OTP) no se conserva tras el envío
+        self.assertEqual(creado.mensaje, '')
+
+    def test_rollback_no_envia(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    self.encolar()
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertEqual(callbacks, [])
+        self.assertFalse(CorreoSaliente.objects.exists())
+        self.assertEqual(list(correo.EnviadorLocal.enviados), [])
+
+    def test_fallo_programa_reintento(self):
+        with mock.patch.object(correo.EnviadorLocal, 'enviar', side_effect=correo.ErrorEnvio('API Error: 500')), \
+                self.assertLogs(correo.logger, 'WARNING'), self.captureOnCommitCallbacks(execute=True):
+            creado = self.encolar()
+        creado.refresh_from_db()
+        self.assertEqual((creado.estado, creado.intentos), (CorreoSaliente.ESTADO_PENDIENTE, 1))
+        self.assertEqual(creado.ultimo_error, 'API Error: 500')
+        self.assertEqual(creado.mensaje, '123456')
+        espera = creado.proximo_intento - timezone.now()
+        self.assertTrue(timedelta(seconds=25) < espera <= timedelta(seconds=correo.ESPERA_BASE_SEGUNDOS))
+
+    def test_fallido_al_agotar_intentos(self):
+        creado = self.encolar()
+        CorreoSaliente.objects.filter(pk=creado.pk).update(intentos=correo.CORREO_MAX_INTENTOS - 1)
+        with mock.patch.object(correo.EnviadorLocal, 'enviar', side_effect=correo.ErrorEnvio('timeout')), \
+                self.assertLogs(correo.logger, 'WARNING'):
+            self.assertEqual(correo.despachar_pendientes(), 1)
+        creado.refresh_from_db()
+        self.assertEqual((creado.estado, creado.intentos), (CorreoSaliente.ESTADO_FALLIDO, correo.CORREO_MAX_INTENTOS))
+        # Fallido: el despachador ya no lo toma
+        self.assertEqual(correo.despachar_pendientes(), 0)
+
+    def test_las_vistas_solo_encolan(self):
+        usuario = User.objects.create_user('huesped', 'huesped@test.com', 'x', first_name='Ana')
+        client = APIClient()
+        client.force_authenticate(usuario)
+        peticiones = [
+            (APIClient(), reverse('password-reset-solicitar'), {'email': 'huesped@test.com'}),
+            (client, reverse('solicitar-codigo'), {}),
+            (client, reverse('solicitar-codigo-salon'), {}),
+        ]
+        with mock.patch.object(correo.EnviadorEmailJS, 'enviar', side_effect=AssertionError), \
+                mock.patch.object(correo, '_sesion_http', side_effect=AssertionError):
+            for cliente, url, datos in peticiones:
+                with self.captureOnCommitCallbacks() as callbacks:
+                    respuesta = cliente.post(url, datos, format='json')
+                self.assertEqual(respuesta.status_code, 200, url)
+                self.assertEqual(callbacks, [correo.notificar_despachador], url)
+        self.assertEqual(
+            list(CorreoSaliente.objects.values_list('destinatario', 'estado')),
+            [('huesped@test.com', CorreoSaliente.ESTADO_PENDIENTE)] * 3,
+        )
+        self.assertEqual(list(correo.EnviadorLocal.enviados), [])
@@ -1,6 +1,3 @@
-import random
-import os
-import requests
 from rest_framework import viewsets, generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
@@ -10,10 +7,12 @@ from django.contrib.auth.models import User
 from django.db.models import Sum, Q, Count
 from django.utils import timezone
 from datetime import timedelta
-from django.contrib.sessions.backends.db import SessionStore
 
 from rest_framework_simplejwt.views import TokenObtainPairView
-from .models import Perfil 
+from .models import Perfil, ResumenDiario
+from .correo import encolar_correo, emailjs_configurado
+from .paginacion import CursorPaginacion
+from .otp import OTP_RECUPERAR_PASSWORD, OTP_VALIDO, emitir_codigo, verificar_codigo
 from .serializers import (
     MyTokenObtainPairSerializer, 
     RegistroUsuarioSerializer, 
@@ -41,6 +40,8 @@ class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all().annotate(total_reservas=Count('reservas_habitacion'))
     serializer_class = UsuarioAdminSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CursorPaginacion
+    orden_paginacion = '-id'
 
 class PerfilViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
@@ -59,67 +60,58 @@ class PerfilViewSet(viewsets.ViewSet):
 
 # --- DASHBOARD STATS ---
 class DashboardStatsView(APIView):
+    """
+    Estadísticas del Dashboard.
+    - Conteos: una consulta por tabla con agregación condicional.
+    - Ingresos y ocupación semanal: desde la tabla pre-agregada resumen_diario.
+    """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         now = timezone.now()
-        today = now.date() 
-        total_usuarios = User.objects.filter(is_superuser=False).count()
-
-        activas_hab = ReservaHabitacion.objects.filter(estado__in=['pendiente', 'confirmada']).count()
-        activas_mesa = ReservaRestaurante.objects.filter(estado__in=['pendiente', 'confirmada']).count()
-        activas_salon = ReservaSalon.objects.filter(estado__in=['pendiente', 'confirmada']).count()
-        total_reservas_activas = activas_hab + activas_mesa + activas_salon
-
-        ocupadas_hoy = ReservaHabitacion.objects.filter(
-            Q(estado='confirmada') | Q(estado='completada'),
-            fecha_checkin__lte=today,
-            fecha_checkout__gt=today
-        ).count()
-        
-        try:
-            total_habitaciones = Habitacion.objects.count()
-        except:
-            total_habitaciones = 20
-
-        ingresos_hab = ReservaHabitacion.objects.filter(
-            estado__in=['confirmada', 'completada']
-        ).aggregate(total=Sum('total'))['total'] or 0
+        today = timezone.localdate(now)
+        estados_activos = ['pendiente', 'confirmada']
 
-        ingresos_salon = ReservaSalon.objects.filter(
-            estado__in=['confirmada']
-        ).aggregate(total=Sum('total_reserva'))['total'] or 0
-        
-        ingresos_rest = ReservaRestaurante.objects.filter(
-             estado__in=['confirmada']
-        ).aggregate(total=Sum('total_reserva'))['total'] or 0
-
-        total_ingresos = ingresos_hab + ingresos_salon + ingresos_rest
+        total_usuarios = User.objects.filter(is_superuser=False).count()
 
+        stats_hab = ReservaHabitacion.objects.aggregate(
+            activas=Count('id', filter=Q(estado__in=estados_activos)),
+            ocupadas_hoy=Count('id', filter=Q(
+                estado__in=['confirmada', 'completada'],
+                fecha_checkin__lte=today,
+                fecha_checkout__gt=today
+            )),
+        )
+        activas_mesa = ReservaRestaurante.objects.aggregate(
+            activas=Count('id', filter=Q(estado__in=estados_activos))
+        )['activas']
+        activas_salon = ReservaSalon.objects.aggregate(
+            activas=Count('id', filter=Q(estado__in=estados_activos))
+        )['activas']
+        total_reservas_activas = stats_hab['activas'] + activas_mesa + activas_salon
+
+        total_habitaciones = Habitacion.objects.count()
+
+        total_ingresos = ResumenDiario.objects.aggregate(
+            total=Sum('ingresos')
+        )['total'] or 0
+
+        # Ocupación semanal: GROUP BY día sobre el resumen (últimos 7 días)
         semana_data = [0] * 7 
         fecha_inicio_semana = today - timedelta(days=6)
 
-        def procesar_fechas(queryset, campo_fecha):
-            for res in queryset:
-                fecha = getattr(res, campo_fecha)
-                if isinstance(fecha, timezone.datetime):
-                    fecha = fecha.date()
-                if fecha >= fecha_inicio_semana and fecha <= today:
-                    dia_semana = fecha.weekday()
-                    semana_data[dia_semana] += 1
-
-        res_hab = ReservaHabitacion.objects.filter(fecha_checkin__gte=fecha_inicio_semana)
-        res_mesa = ReservaRestaurante.objects.filter(fecha_reserva__gte=fecha_inicio_semana)
-        res_salon = ReservaSalon.objects.filter(fecha_evento__gte=fecha_inicio_semana)
+        reservas_por_dia = ResumenDiario.objects.filter(
+            fecha__gte=fecha_inicio_semana,
+            fecha__lte=today
+        ).values('fecha').annotate(total=Sum('reservas'))
 
-        procesar_fechas(res_hab, 'fecha_checkin')
-        procesar_fechas(res_mesa, 'fecha_reserva')
-        procesar_fechas(res_salon, 'fecha_evento')
+        for fila in reservas_por_dia:
+            semana_data[fila['fecha'].weekday()] += fila['total']
 
         data = {
             "usuarios": total_usuarios,
             "reservasActivas": total_reservas_activas,
-            "habitacionesOcupadas": ocupadas_hoy,
+            "habitacionesOcupadas": stats_hab['ocupadas_hoy'],
             "totalHabitaciones": total_habitaciones,
             "ingresos": total_ingresos,
             "ocupacionSemanal": semana_data
@@ -140,58 +132,36 @@ def solicitar_recuperacion_password(request):
     except User.DoesNotExist:
         return Response({"error": "No existe un usuario con este correo electrónico."}, status=status.HTTP_404_NOT_FOUND)
 
-    # 1. Generar código de 6 dígitos
-    codigo = str(random.randint(100000, 999999))
-    
-    # 2. Guardar en sesión (Igual que en reservas de habitaciones)
-    request.session['reset_password_otp'] = codigo
-    request.session['reset_password_user_id'] = user.id
-    request.session.modified = True
-    request.session.save()
-
-    # 3. Parámetros de EmailJS (Leídos de variables de entorno)
-    service_id = os.environ.get("EMAILJS_SERVICE_ID")
-    template_id = os.environ.get("EMAILJS_TEMPLATE_ID")
-    user_id = os.environ.get("EMAILJS_USER_ID")
-    private_key = os.environ.get("EMAILJS_PRIVATE_KEY")
-
-    payload = {
-        "service_id": service_id,
-        "template_id": template_id,
-        "user_id": user_id,
-        "accessToken": private_key,
-        "template_params": {
-            "to_name": user.first_name or user.username,
-            "to_email": user.email,
-            "message": f"Tu código de recuperación es: {codigo}",
-            "reply_to": "no-reply@hotelindigo.com"
-        }
-    }
+    # 1-2. Generar código de 6 dígitos y guardarlo en caché con TTL.
+    # El cliente recibe un token aleatorio (session_key_manual) para confirmar.
+    token, codigo = emitir_codigo(OTP_RECUPERAR_PASSWORD, datos={'user_id': user.id})
 
+    # 3. Encolar el correo (lo envía el despachador en segundo plano)
     try:
+        encolar_correo(
+            user.email,
+            f"Tu código de recuperación es: {codigo}",
+            nombre=user.first_name or user.username,
+        )
+
         # Modo Debug si no hay variables configuradas en local
-        if not all([service_id, template_id, user_id, private_key]):
+        if not emailjs_configurado():
             return Response({
                 'message': 'Modo simulación activado.',
                 'debug_code': codigo,
-                'session_key_manual': request.session.session_key
+                'session_key_manual': token
             })
 
-        response = requests.post("https://api.emailjs.com/api/v1.0/email/send", json=payload)
-        
-        if response.status_code == 200:
-            return Response({
-                'message': 'Código enviado exitosamente.',
-                'session_key_manual': request.session.session_key 
-            })
-        else:
-            raise Exception(f"EmailJS Error: {response.text}")
+        return Response({
+            'message': 'Código enviado exitosamente.',
+            'session_key_manual': token 
+        })
             
     except Exception as e:
         return Response({
             'message': 'Error al enviar email, usa el código de prueba.',
             'debug_code': codigo,
-            'session_key_manual': request.session.session_key,
+            'session_key_manual': token,
             'error_detail': str(e)
         }, status=status.HTTP_200_OK)
 
@@ -202,23 +172,18 @@ def confirmar_recuperacion_password(request):
     nueva_password = request.data.get('new_password')
     manual_key = request.data.get('session_key_manual')
 
-    # Recuperar sesión manualmente del Store (Vital para producción/Railway)
-    s = SessionStore(session_key=manual_key)
-    codigo_real = s.get('reset_password_otp')
-    user_id = s.get('reset_password_user_id')
+    # Verificar el código en caché (con límite de intentos)
+    resultado, datos = verificar_codigo(OTP_RECUPERAR_PASSWORD, manual_key, codigo_ingresado)
 
-    if not codigo_real or str(codigo_ingresado) != str(codigo_real):
+    if resultado != OTP_VALIDO:
         return Response({"detail": "Código incorrecto o expirado."}, status=status.HTTP_400_BAD_REQUEST)
 
+    user_id = datos['user_id']
+
     try:
         user = User.objects.get(id=user_id)
         user.set_password(nueva_password)
         user.save()
-        
-        # Limpieza de sesión
-        if 'reset_password_otp' in s: del s['reset_password_otp']
-        if 'reset_password_user_id' in s: del s['reset_password_user_id']
-        s.save()
 
         return Response({"message": "Contraseña actualizada correctamente."})
     except Exception as e:
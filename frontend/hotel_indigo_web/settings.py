@@ -77,4 +77,18 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'frontend'), # <-- ¡Tu carpeta 'frontend' para CSS/JS/Imágenes!
 ]
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Cliente de la API del backend (website/cliente_backend.py)
+# BACKEND_TRANSPORTE: 'http' o 'wsgi' (aplicación BACKEND_WSGI_APP en el mismo proceso)
+BACKEND_BASE_URL = os.environ.get('BACKEND_BASE_URL', 'http://127.0.0.1:8000')
+BACKEND_TRANSPORTE = os.environ.get('BACKEND_TRANSPORTE', 'http')
+BACKEND_WSGI_APP = os.environ.get('BACKEND_WSGI_APP', '')
+BACKEND_TIMEOUT = (
+    float(os.environ.get('BACKEND_TIMEOUT_CONEXION', 3.05)),
+    float(os.environ.get('BACKEND_TIMEOUT_LECTURA', 10)),
+)
+BACKEND_REINTENTOS = int(os.environ.get('BACKEND_REINTENTOS', 2))
+BACKEND_POOL = int(os.environ.get('BACKEND_POOL', 10))
+BACKEND_CIRCUITO_UMBRAL = int(os.environ.get('BACKEND_CIRCUITO_UMBRAL', 5))
+BACKEND_CIRCUITO_ENFRIAMIENTO = int(os.environ.get('BACKEND_CIRCUITO_ENFRIAMIENTO', 30))
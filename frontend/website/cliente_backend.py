@@ -0,0 +1,257 @@
+# website/cliente_backend.py
+
+"""
+Cliente de la API del backend para las vistas del frontend.
+
+- Una requests.Session por proceso (creada al primer uso, ya dentro del
+  worker): las conexiones al backend quedan vivas en un pool y se reutilizan.
+- Timeout (conexión, lectura) en todas las llamadas; se puede cambiar por llamada.
+- Reintentos con espera creciente: errores de conexión (la petición no llegó
+  a enviarse, vale para cualquier método) y 502/503/504 o timeouts de lectura
+  solo en métodos idempotentes. Un POST nunca se repite tras haber llegado.
+- Circuito: tras BACKEND_CIRCUITO_UMBRAL fallos seguidos (sin conexión,
+  timeout o 5xx) las llamadas fallan al instante con BackendNoDisponible
+  durante BACKEND_CIRCUITO_ENFRIAMIENTO segundos; luego pasa UNA petición de
+  prueba y, si responde bien, se cierra.
+
+Transporte (settings.BACKEND_TRANSPORTE):
+    'http' -> HTTP contra BACKEND_BASE_URL (por defecto).
+    'wsgi' -> llama en el mismo proceso a la aplicación WSGI BACKEND_WSGI_APP
+              (ruta con puntos, p. ej. 'paquete.wsgi.application'), sin red.
+              La aplicación tiene que poder cargarse junto al frontend: el
+              proyecto Django del backend no (solo hay unos settings por
+              proceso), sí una app WSGI propia o de pruebas. Sin timeouts.
+"""
+
+import logging
+import sys
+import threading
+import time
+from io import BytesIO
+from urllib.parse import unquote, urlsplit
+
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+BACKEND_BASE_URL = getattr(settings, 'BACKEND_BASE_URL', 'http://127.0.0.1:8000').rstrip('/')
+BACKEND_TRANSPORTE = getattr(settings, 'BACKEND_TRANSPORTE', 'http')
+BACKEND_WSGI_APP = getattr(settings, 'BACKEND_WSGI_APP', '')
+# (conexión, lectura) en segundos
+BACKEND_TIMEOUT = getattr(settings, 'BACKEND_TIMEOUT', (3.05, 10))
+BACKEND_REINTENTOS = getattr(settings, 'BACKEND_REINTENTOS', 2)
+# Conexiones vivas por proceso (una por hilo del worker como mucho)
+BACKEND_POOL = getattr(settings, 'BACKEND_POOL', 10)
+BACKEND_CIRCUITO_UMBRAL = getattr(settings, 'BACKEND_CIRCUITO_UMBRAL', 5)
+BACKEND_CIRCUITO_ENFRIAMIENTO = getattr(settings, 'BACKEND_CIRCUITO_ENFRIAMIENTO', 30)
+
+
+class BackendNoDisponible(Exception):
+    """El backend no respondió (conexión, timeout) o el circuito está abierto."""
+
+
+class Circuito:
+    """Cortacircuitos por fallos consecutivos, seguro entre hilos."""
+
+    def __init__(self, umbral, enfriamiento):
+        self.umbral = umbral
+        self.enfriamiento = enfriamiento
+        self._fallos = 0
+        self._abierto_hasta = 0.0
+        self._prueba_en_curso = False
+        self._lock = threading.Lock()
+
+    @property
+    def abierto(self):
+        return self._fallos >= self.umbral
+
+    def permitir(self):
+        with self._lock:
+            if self._fallos < self.umbral:
+                return True
+            if time.monotonic() < self._abierto_hasta or self._prueba_en_curso:
+                return False
+            # Semiabierto: solo la primera petición tras el enfriamiento prueba
+            self._prueba_en_curso = True
+            return True
+
+    def exito(self):
+        with self._lock:
+            self._fallos = 0
+            self._prueba_en_curso = False
+
+    def fallo(self):
+        with self._lock:
+            self._fallos += 1
+            self._prueba_en_curso = False
+            if self._fallos >= self.umbral:
+                self._abierto_hasta = time.monotonic() + self.enfriamiento
+
+
+class AdaptadorWSGI(BaseAdapter):
+    """Adaptador de requests que entrega la petición a una aplicación WSGI."""
+
+    def __init__(self, aplicacion):
+        super().__init__()
+        self.aplicacion = aplicacion
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        url = urlsplit(request.url)
+        cuerpo = request.body or b''
+        if isinstance(cuerpo, str):
+            cuerpo = cuerpo.encode('utf-8')
+        elif not isinstance(cuerpo, bytes):
+            cuerpo = b''.join(cuerpo)
+
+        environ = {
+            'REQUEST_METHOD': request.method,
+            'SCRIPT_NAME': '',
+            # PEP 3333: PATH_INFO decodificado y representado en latin-1
+            'PATH_INFO': unquote(url.path or '/', encoding='latin-1'),
+            'QUERY_STRING': url.query,
+            'SERVER_NAME': url.hostname or 'localhost',
+            'SERVER_PORT': str(url.port or (443 if url.scheme == 'https' else 80)),
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'REMOTE_ADDR': '127.0.0.1',
+            'CONTENT_LENGTH': str(len(cuerpo)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': url.scheme,
+            'wsgi.input': BytesIO(cuerpo),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for nombre, valor in request.headers.items():
+            clave = nombre.upper().replace('-', '_')
+            if clave == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = valor
+            elif clave != 'CONTENT_LENGTH':
+                environ[f'HTTP_{clave}'] = valor
+        environ.setdefault('HTTP_HOST', url.netloc)
+
+        respuesta = {}
+
+        def start_response(estado, cabeceras, exc_info=None):
+            respuesta['estado'] = estado
+            respuesta['cabeceras'] = cabeceras
+
+        resultado = self.aplicacion(environ, start_response)
+        try:
+            contenido = b''.join(resultado)
+        finally:
+            if hasattr(resultado, 'close'):
+                resultado.close()
+
+        codigo, _, razon = respuesta['estado'].partition(' ')
+        response = requests.Response()
+        response.status_code = int(codigo)
+        response.reason = razon
+        response.headers = CaseInsensitiveDict(respuesta['cabeceras'])
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = BytesIO(contenido)
+        response._content = contenido
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
+
+
+class ClienteBackend:
+    """
+    Llamadas a la API del backend: cliente.post('/api/auth/register/', json=...).
+    Retorna la requests.Response (cualquier código HTTP); lanza
+    BackendNoDisponible si no hubo respuesta o el circuito está abierto.
+    """
+
+    def __init__(self, base_url=BACKEND_BASE_URL, timeout=BACKEND_TIMEOUT, reintentos=BACKEND_REINTENTOS,
+                 pool=BACKEND_POOL, circuito=None, aplicacion_wsgi=None):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.circuito = circuito or Circuito(BACKEND_CIRCUITO_UMBRAL, BACKEND_CIRCUITO_ENFRIAMIENTO)
+        self.sesion = requests.Session()
+        self.sesion.headers.update({'Accept': 'application/json'})
+
+        if aplicacion_wsgi is not None:
+            # Las rutas de base_url (y solo esas) van a la aplicación en proceso
+            self.sesion.mount(self.base_url + '/', AdaptadorWSGI(aplicacion_wsgi))
+            return
+
+        reintentos = Retry(
+            total=reintentos,
+            connect=reintentos,
+            read=reintentos,
+            status=reintentos,
+            backoff_factor=0.3,
+            status_forcelist=(502, 503, 504),
+            # GET, HEAD, PUT, DELETE, OPTIONS, TRACE
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+            raise_on_status=False,
+        )
+        adaptador = HTTPAdapter(pool_connections=1, pool_maxsize=pool, max_retries=reintentos)
+        self.sesion.mount('http://', adaptador)
+        self.sesion.mount('https://', adaptador)
+
+    def solicitar(self, metodo, ruta, timeout=None, **kwargs):
+        if not self.circuito.permitir():
+            raise BackendNoDisponible("Circuito abierto: el backend falló repetidamente.")
+
+        url = f"{self.base_url}/{ruta.lstrip('/')}"
+        try:
+            response = self.sesion.request(metodo, url, timeout=timeout or self.timeout, **kwargs)
+        except requests.RequestException as e:
+            self.circuito.fallo()
+            logger.warning("Backend sin respuesta (%s %s): %s", metodo, url, e)
+            raise BackendNoDisponible(str(e)) from e
+        except Exception:
+            # Cualquier otro error (p. ej. de la aplicación WSGI en proceso)
+            # también cuenta: si era la petición de prueba, libera el circuito
+            self.circuito.fallo()
+            raise
+
+        if response.status_code >= 500:
+            self.circuito.fallo()
+        else:
+            self.circuito.exito()
+        return response
+
+    def get(self, ruta, **kwargs):
+        return self.solicitar('GET', ruta, **kwargs)
+
+    def post(self, ruta, **kwargs):
+        return self.solicitar('POST', ruta, **kwargs)
+
+    def put(self, ruta, **kwargs):
+        return self.solicitar('PUT', ruta, **kwargs)
+
+    def patch(self, ruta, **kwargs):
+        return self.solicitar('PATCH', ruta, **kwargs)
+
+    def delete(self, ruta, **kwargs):
+        return self.solicitar('DELETE', ruta, **kwargs)
+
+
+_cliente = None
+_cliente_lock = threading.Lock()
+
+
+def cliente_backend():
+    """ClienteBackend compartido por el proceso, según los settings."""
+    global _cliente
+    if _cliente is None:
+        with _cliente_lock:
+            if _cliente is None:
+                aplicacion = None
+                if BACKEND_TRANSPORTE == 'wsgi':
+                    aplicacion = import_string(BACKEND_WSGI_APP)
+                _cliente = ClienteBackend(aplicacion_wsgi=aplicacion)
+    return _cliente
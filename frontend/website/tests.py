@@ -1,3 +1,141 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+import requests
+from django.contrib.messages import get_messages
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from . import cliente_backend as modulo
+from . import views
+from .cliente_backend import BackendNoDisponible, Circuito, ClienteBackend
+
+
+class AplicacionPrueba:
+    """Aplicación WSGI que responde con el código indicado y cuenta las llamadas."""
+
+    def __init__(self):
+        self.codigo = '200 OK'
+        self.caida = False
+        self.error = None
+        self.llamadas = 0
+
+    def __call__(self, environ, start_response):
+        self.llamadas += 1
+        if self.caida:
+            raise requests.ConnectionError("conexión rechazada")
+        if self.error:
+            raise self.error
+        start_response(self.codigo, [('Content-Type', 'application/json')])
+        return [b'{}']
+
+
+class CircuitoTest(SimpleTestCase):
+
+    def setUp(self):
+        self.ahora = 1000.0
+        reloj = mock.patch.object(modulo.time, 'monotonic', side_effect=lambda: self.ahora)
+        reloj.start()
+        self.addCleanup(reloj.stop)
+        self.circuito = Circuito(umbral=3, enfriamiento=30)
+
+    def test_abre_tras_fallos_seguidos(self):
+        self.circuito.fallo()
+        self.circuito.fallo()
+        self.circuito.exito()
+        self.circuito.fallo()
+        self.circuito.fallo()
+        # Un éxito reinicia la cuenta: dos fallos seguidos no bastan
+        self.assertTrue(self.circuito.permitir())
+        self.circuito.fallo()
+        self.assertTrue(self.circuito.abierto)
+        self.assertFalse(self.circuito.permitir())
+
+    def test_una_sola_prueba_tras_el_enfriamiento(self):
+        for _ in range(3):
+            self.circuito.fallo()
+        self.ahora += 30
+        self.assertTrue(self.circuito.permitir())
+        self.assertFalse(self.circuito.permitir())
+
+        # La prueba falla: otro enfriamiento completo
+        self.circuito.fallo()
+        self.ahora += 29
+        self.assertFalse(self.circuito.permitir())
+        self.ahora += 1
+        self.assertTrue(self.circuito.permitir())
+        self.circuito.exito()
+        self.assertFalse(self.circuito.abierto)
+        self.assertTrue(self.circuito.permitir())
+
+
+class ClienteBackendTest(SimpleTestCase):
+
+    def setUp(self):
+        self.aplicacion = AplicacionPrueba()
+        self.cliente = ClienteBackend(
+            base_url='http://backend.test', circuito=Circuito(umbral=2, enfriamiento=60),
+            aplicacion_wsgi=self.aplicacion,
+        )
+
+    def test_errores_5xx_abren_el_circuito(self):
+        self.aplicacion.codigo = '503 Service Unavailable'
+        self.assertEqual(self.cliente.get('/api/habitaciones/').status_code, 503)
+        self.assertEqual(self.cliente.get('/api/habitaciones/').status_code, 503)
+        with self.assertRaises(BackendNoDisponible):
+            self.cliente.get('/api/habitaciones/')
+        # Abierto: falla al instante, sin llegar al backend
+        self.assertEqual(self.aplicacion.llamadas, 2)
+
+    def test_errores_4xx_no_cuentan(self):
+        self.aplicacion.codigo = '400 Bad Request'
+        for _ in range(3):
+            self.assertEqual(self.cliente.post('/api/auth/register/', json={}).status_code, 400)
+        self.assertFalse(self.cliente.circuito.abierto)
+
+    def test_sin_conexion(self):
+        self.aplicacion.caida = True
+        with self.assertLogs(modulo.logger, 'WARNING'):
+            with self.assertRaises(BackendNoDisponible):
+                self.cliente.post('/api/reservas-habitacion/')
+        self.assertEqual(self.cliente.circuito._fallos, 1)
+
+
+    def test_error_inesperado_en_la_prueba_no_bloquea_el_circuito(self):
+        self.aplicacion.caida = True
+        with self.assertLogs(modulo.logger, 'WARNING'):
+            for _ in range(2):
+                with self.assertRaises(BackendNoDisponible):
+                    self.cliente.get('/api/habitaciones/')
+        self.cliente.circuito._abierto_hasta = 0.0
+
+        # La petición de prueba falla con algo que no es de requests
+        self.aplicacion.caida = False
+        self.aplicacion.error = RuntimeError("fallo de la aplicación")
+        with self.assertRaises(RuntimeError):
+            self.cliente.get('/api/habitaciones/')
+        self.assertFalse(self.cliente.circuito._prueba_en_curso)
+
+        # Tras el siguiente enfriamiento vuelve a probar y se cierra
+        self.cliente.circuito._abierto_hasta = 0.0
+        self.aplicacion.error = None
+        self.assertEqual(self.cliente.get('/api/habitaciones/').status_code, 200)
+        self.assertFalse(self.cliente.circuito.abierto)
+
+
+class VistasBackendNoDisponibleTest(TestCase):
+
+    def test_procesar_reserva_muestra_aviso(self):
+        cliente = mock.Mock()
+        cliente.post.side_effect = BackendNoDisponible("Circuito abierto")
+        with mock.patch.object(views, 'cliente_backend', return_value=cliente), \
+                self.assertLogs(views.logger, 'WARNING'):
+            respuesta = self.client.post(
+                reverse('procesar_reserva'), {'email': 'huesped@test.com', 'cedula': 'V-1'},
+                HTTP_REFERER='/reserva/',
+            )
+
+        self.assertRedirects(respuesta, '/reserva/', fetch_redirect_response=False)
+        self.assertEqual(
+            [m.message for m in get_messages(respuesta.wsgi_request)], [views.MENSAJE_BACKEND_NO_DISPONIBLE]
+        )
+        cliente.post.assert_called_once()
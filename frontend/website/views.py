@@ -1,10 +1,15 @@
-import requests
 # website/views.py (Modificado)
+import logging
+
 from django.shortcuts import render, redirect
 
 from django.contrib import messages
-BACKEND_BASE_URL = "http://127.0.0.1:8000"
-API_REGISTER = "http://127.0.0.1:8000/api/usuarios/"
+
+from .cliente_backend import BackendNoDisponible, cliente_backend
+
+logger = logging.getLogger(__name__)
+
+MENSAJE_BACKEND_NO_DISPONIBLE = "El servicio de reservas no responde en este momento. Intenta de nuevo en unos minutos."
 
 def index(request):
     # Ahora especificamos la ruta COMPLETA: 'nombre_de_la_app/nombre_del_archivo.html'
@@ -113,8 +118,8 @@ def empleo(request):
 
 
 # --- CONFIGURACIÓN ---
-# Cambia esto por la IP/Dominio real de tu servidor Backend cuando lo subas a producción
-# Cambia esto por la ruta que realmente exista en tu backend
+# La URL del backend, timeouts y transporte están en settings (BACKEND_*),
+# ver website/cliente_backend.py
 
 # frontend/website/views.py
 
@@ -146,8 +151,8 @@ def procesar_reserva(request):
 
         try:
             # 3. Registro en el endpoint público
-            URL_REGISTRO = f"{BACKEND_BASE_URL}/api/auth/register/"
-            res_user = requests.post(URL_REGISTRO, json=payload_usuario)
+            cliente = cliente_backend()
+            res_user = cliente.post("/api/auth/register/", json=payload_usuario)
             
             if res_user.status_code == 201:
                 user_data = res_user.json()
@@ -163,7 +168,7 @@ def procesar_reserva(request):
                     "estado": "pendiente"
                 }
 
-                res_reserva = requests.post(f"{BACKEND_BASE_URL}/api/reservas-habitacion/", json=payload_reserva)
+                res_reserva = cliente.post("/api/reservas-habitacion/", json=payload_reserva)
 
                 if res_reserva.status_code == 201:
                     reserva_data = res_reserva.json()
@@ -191,6 +196,9 @@ def procesar_reserva(request):
                 print(f"Error en Usuario: {res_user.text}")
                 messages.error(request, "El correo ya está registrado o los datos son incorrectos.")
 
+        except BackendNoDisponible as e:
+            logger.warning("Backend no disponible: %s", e)
+            messages.error(request, MENSAJE_BACKEND_NO_DISPONIBLE)
         except Exception as e:
             print(f"Error crítico en la vista: {str(e)}")
             messages.error(request, "Error de conexión con el servidor.")
@@ -237,14 +245,16 @@ def reenviar_otp(request):
         return redirect('reserva')
     
     try:
-        url_reenviar = f"{BACKEND_BASE_URL}/api/reservas-habitacion/{reserva_id}/reenviar_otp/"
-        response = requests.post(url_reenviar)
+        response = cliente_backend().post(f"/api/reservas-habitacion/{reserva_id}/reenviar_otp/")
         
         if response.status_code == 200:
             messages.success(request, "Código reenviado exitosamente.")
         else:
             messages.error(request, "Error al reenviar el código.")
             
+    except BackendNoDisponible as e:
+        logger.warning("Backend no disponible: %s", e)
+        messages.error(request, MENSAJE_BACKEND_NO_DISPONIBLE)
     except Exception as e:
         print(f"Error reenviando OTP: {str(e)}")
         messages.error(request, "Error de conexión con el servidor.")